@@ -1,35 +1,21 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import asyncio
-import threading
-import queue
 import time
 from streamlit_lightweight_charts import renderLightweightCharts
 
-from bitget_ws_client import BitgetWebSocketClient
-from data_manager import DataManager
 from pine_converter import PineScriptConverter
 from indicator_executor import IndicatorExecutor
+from components.market_feed import SYMBOL, follow, get_data_manager, get_hub, switch_timeframe
 
 st.set_page_config(layout="wide", page_title="TradingView Pro")
 
 # --- Configuration ---
-SYMBOL = "BTCUSDT"
-AVAILABLE_TIMEFRAMES = ["1m", "3m", "5m", "15m", "30m", "1H", "4H", "1D", "1W", "1M"]
+AVAILABLE_TIMEFRAMES = ["1s", "5s", "15s", "1m", "3m", "5m", "15m", "30m", "1H", "4H", "1D", "1W", "1M"]
+# Bougies supplémentaires (avant la première bougie affichée) pour le warm-up des indicateurs
+INDICATOR_WARMUP_BARS = 200
 
 # --- Session State Initialization ---
-if "data_manager" not in st.session_state:
-    st.session_state.data_manager = DataManager(max_candles=500)
-
-if "ws_client" not in st.session_state:
-    st.session_state.ws_client = None
-
-if "ws_thread" not in st.session_state:
-    st.session_state.ws_thread = None
-
-if "message_queue" not in st.session_state:
-    st.session_state.message_queue = queue.Queue()
+# DataManager partagé par toutes les sessions du processus (alimenté par les flux partagés)
+st.session_state.data_manager = get_data_manager()
 
 if "current_timeframe" not in st.session_state:
     st.session_state.current_timeframe = "1m"
@@ -50,51 +36,6 @@ if "temp_python_code" not in st.session_state:
 if "temp_indicator_name" not in st.session_state:
     st.session_state.temp_indicator_name = ""
 
-if "ws_running" not in st.session_state:
-    st.session_state.ws_running = False
-
-
-# --- WebSocket Background Thread ---
-def websocket_thread(timeframe: str, message_queue: queue.Queue):
-    """Thread pour exécuter le WebSocket en arrière-plan"""
-    def on_candle(candle):
-        # Envoyer la bougie à la queue
-        message_queue.put({"type": "candle", "data": candle, "timeframe": timeframe})
-    
-    # Créer le client
-    client = BitgetWebSocketClient(
-        symbol=SYMBOL,
-        timeframe=timeframe,
-        on_message=on_candle
-    )
-    
-    # Exécuter la boucle asyncio
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        loop.run_until_complete(client.run())
-    except Exception as e:
-        st.error(f"WebSocket error: {e}")
-    finally:
-        loop.close()
-
-
-def start_websocket(timeframe: str):
-    """Démarre le WebSocket dans un thread séparé"""
-    if st.session_state.ws_thread and st.session_state.ws_thread.is_alive():
-        # Arrêter l'ancien thread (simplification, en production utiliser un système plus propre)
-        st.session_state.ws_running = False
-        time.sleep(1)
-    
-    st.session_state.ws_running = True
-    st.session_state.ws_thread = threading.Thread(
-        target=websocket_thread,
-        args=(timeframe, st.session_state.message_queue),
-        daemon=True
-    )
-    st.session_state.ws_thread.start()
-
 
 # --- UI ---
 st.title("🕯️ TradingView Pro - Bitget Live")
@@ -112,9 +53,10 @@ with st.sidebar:
     
     # Si le timeframe a changé
     if selected_timeframe != st.session_state.current_timeframe:
+        previous_timeframe = st.session_state.current_timeframe
         st.session_state.current_timeframe = selected_timeframe
-        # Redémarrer le WebSocket
-        start_websocket(selected_timeframe)
+        # Réabonnement sur la connexion partagée (sauf timeframe dérivé d'un flux déjà actif)
+        switch_timeframe(previous_timeframe, selected_timeframe)
         st.rerun()
     
     st.markdown("---")
@@ -147,12 +89,27 @@ with st.sidebar:
         st.session_state.temp_python_code = ""
         st.session_state.temp_indicator_name = ""
         st.rerun()
+    
+    st.markdown("---")
+    
+    # Connexions partagées (threads/sockets constants quel que soit le nombre de viewers)
+    with st.expander("🔌 Connexions"):
+        stats = get_hub().stats()
+        st.caption(
+            f"Flux: {stats['feeds']} | Lecteurs: {stats['readers']} | Abonnements: {stats['subscriptions']}\n\n"
+            f"Sockets: {stats['sockets']} | Threads hub: {stats['hub_threads']} ({'uvloop' if stats['uvloop'] else 'asyncio'}) "
+            f"| Threads processus: {stats['process_threads']}\n\n"
+            f"Updates: {stats['updates_received']} reçues, {stats['updates_written']} écrites "
+            f"(coalescence ×{stats['coalescing_ratio']:.1f})\n\n"
+            f"File réception: {stats['handoff_depth']} en attente (max {stats['handoff_max_depth']}), "
+            f"retard {stats['handoff_lag_ms']:.1f} ms (max {stats['handoff_max_lag_ms']:.0f}), "
+            f"{stats['handoff_dropped']} perdues"
+        )
 
 
 # --- Main Area ---
-# Démarrer le WebSocket si pas déjà démarré
-if not st.session_state.ws_running:
-    start_websocket(st.session_state.current_timeframe)
+# Démarrer le flux partagé si aucune session ne l'a encore démarré
+follow(st.session_state.current_timeframe)
 
 # --- Éditeur d'Indicateur (Modal) ---
 if st.session_state.show_indicator_editor:
@@ -264,24 +221,110 @@ if st.session_state.show_indicator_editor:
 
 
 # --- Graphique Principal ---
+def compute_indicator_series(candles, indicators):
+    """
+    Exécute les indicateurs activés sur la fenêtre affichée + warm-up
+    
+    Returns:
+        (séries lightweight-charts, messages d'erreur)
+    """
+    series, errors = [], []
+    if not candles or not indicators:
+        return series, errors
+    
+    # Fenêtre affichée + warm-up (complété depuis l'historique froid si disponible)
+    df = st.session_state.data_manager.tail(
+        st.session_state.current_timeframe,
+        len(candles) + INDICATOR_WARMUP_BARS,
+        include_cold=True,
+        as_frame=True
+    )
+    executor = IndicatorExecutor()
+    
+    for ind_name, python_code in indicators:
+        try:
+            # Exécuter l'indicateur
+            results = executor.execute(python_code, df, display_from=candles[0]['time'])
+            
+            # Ajouter chaque série au graphique
+            for series_name, series_data in results.items():
+                series.append(series_data)
+        
+        except Exception as e:
+            errors.append(f"Erreur dans l'indicateur '{ind_name}': {e}")
+    return series, errors
+
+
+def patch_candles(candles, updates, expected, written):
+    """
+    Applique au cache les updates lues sur le flux (bougie live réécrite ou nouvelles bougies)
+    
+    Args:
+        written: Nombre de bougies écrites depuis le dernier rendu (écart de version)
+    
+    Returns:
+        False si le cache ne peut pas être patché (plus de bougies écrites que d'updates
+        lues: lot écrit en bloc dont seule la dernière bougie est publiée, update plus
+        ancienne que la dernière bougie, ou nombre de bougies différent de `expected`):
+        il faut le relire
+    """
+    if written > len(updates):
+        return False
+    for candle in updates:
+        if candles and candle["time"] == candles[-1]["time"]:
+            candles[-1] = candle
+        elif not candles or candle["time"] > candles[-1]["time"]:
+            candles.append(candle)
+        else:
+            return False
+    # Le DataManager a éjecté les plus anciennes au-delà de sa capacité
+    if len(candles) > expected:
+        del candles[:len(candles) - expected]
+    return len(candles) == expected
+
+
 @st.fragment(run_every=1)
 def render_chart():
     """Rendu du graphique avec mise à jour temps réel"""
     
-    # Lire les messages de la queue
-    try:
-        while not st.session_state.message_queue.empty():
-            msg = st.session_state.message_queue.get_nowait()
-            if msg["type"] == "candle":
-                st.session_state.data_manager.add_candle(
-                    msg["timeframe"],
-                    msg["data"]
-                )
-    except queue.Empty:
-        pass
+    timeframe = st.session_state.current_timeframe
+    hub = get_hub()
     
-    # Récupérer les données du timeframe actuel
-    candles = st.session_state.data_manager.get_candles(st.session_state.current_timeframe)
+    # Le hub écrit directement dans le DataManager partagé: signaler que
+    # cette session regarde encore ce timeframe (l'abonnement reste actif)
+    follow(timeframe)
+    
+    # Curseur de cette session sur le flux partagé: sans nouvelle bougie depuis
+    # le dernier rendu, bougies et indicateurs calculés sont réutilisés
+    enabled_indicators = tuple(
+        (name, data['python_code']) for name, data in st.session_state.indicators.items()
+        if data.get('enabled', False)
+    )
+    cursor, updates, missed = hub.read(timeframe, st.session_state.get("chart_cursor", 0))
+    cache = st.session_state.get("chart_cache")
+    data_manager = st.session_state.data_manager
+    # Lue avant les bougies: une écriture concurrente ne peut que provoquer une relecture
+    version = data_manager.get_version(timeframe)
+    if (cache is None or missed or cache["timeframe"] != timeframe
+            or cache["indicators"] != enabled_indicators):
+        cache = {
+            "timeframe": timeframe,
+            "indicators": enabled_indicators,
+            "candles": data_manager.get_candles(timeframe),
+            "version": version,
+        }
+        cache["series"], cache["errors"] = compute_indicator_series(cache["candles"], enabled_indicators)
+        st.session_state.chart_cache = cache
+    elif updates:
+        # Bougies (dicts) gardées d'un rendu à l'autre: seules les updates lues sur le flux
+        # sont appliquées, la liste complète n'est relue que si elles ne suffisent pas
+        if not patch_candles(cache["candles"], updates, data_manager.count_candles(timeframe),
+                             version - cache["version"]):
+            cache["candles"] = data_manager.get_candles(timeframe)
+        cache["version"] = version
+        cache["series"], cache["errors"] = compute_indicator_series(cache["candles"], enabled_indicators)
+    st.session_state.chart_cursor = cursor
+    candles = cache["candles"]
     
     if not candles:
         st.info("📡 Connexion au WebSocket... En attente de données...")
@@ -324,24 +367,9 @@ def render_chart():
     ]
     
     # Ajouter les indicateurs activés
-    if st.session_state.indicators:
-        df = st.session_state.data_manager.get_dataframe(st.session_state.current_timeframe)
-        executor = IndicatorExecutor()
-        
-        for ind_name, ind_data in st.session_state.indicators.items():
-            if not ind_data.get('enabled', False):
-                continue
-            
-            try:
-                # Exécuter l'indicateur
-                results = executor.execute(ind_data['python_code'], df)
-                
-                # Ajouter chaque série au graphique
-                for series_name, series_data in results.items():
-                    series.append(series_data)
-            
-            except Exception as e:
-                st.error(f"Erreur dans l'indicateur '{ind_name}': {e}")
+    series.extend(cache["series"])
+    for error in cache["errors"]:
+        st.error(error)
     
     # Configuration du graphique
     chart_options = {
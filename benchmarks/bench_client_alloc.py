@@ -0,0 +1,106 @@
+"""
+Allocations et mémoire retenue par message dans BitgetWebSocketClient.handle_message
+
+Rejoue --frames frames update synthétiques (une bougie 1m par frame, nouvelle bougie toutes
+les --updates-per-candle frames) dans handle_message, sans réseau ni file de handoff, et
+mesure avec tracemalloc:
+  retained  - mémoire encore allouée après le rejeu (buffers de bougies), par flux
+  peak/msg  - pic d'allocation au-dessus de l'état initial pendant un message
+et le temps par message. Modes:
+  callback  - callback seul (aucun stockage dans le client)
+  deque     - sink DataManager(storage="deque", max_candles=500)
+  columnar  - sink DataManager(storage="columnar", max_candles=500)
+
+Usage:
+    python benchmarks/bench_client_alloc.py --frames 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitget_ws_client import BitgetWebSocketClient
+from data_manager import DataManager
+
+logging.disable(logging.INFO)
+
+
+def make_frames(n: int, updates_per_candle: int):
+    frames = []
+    for i in range(n):
+        t = 1700000000 + (i // updates_per_candle) * 60
+        price = 30000 + (i % 97)
+        row = [str(t * 1000), f"{price:.1f}", f"{price + 5:.1f}", f"{price - 5:.1f}", f"{price + 1:.1f}", "12.5"]
+        frames.append(orjson.dumps({"action": "update", "arg": {"instType": "USDT-FUTURES", "channel": "candle1m",
+                                                                 "instId": "BTCUSDT"},
+                                    "data": [row], "ts": (t + 1) * 1000}).decode())
+    return frames
+
+
+def measure(frames, sink):
+    received = [0]
+
+    def on_candle(_candle):
+        received[0] += 1
+
+    client = BitgetWebSocketClient("BTCUSDT", "1m", on_message=on_candle, handoff_policy=None, sink=sink)
+
+    async def replay(batch):
+        for message in batch:
+            await client.handle_message(message)
+
+    # Temps, sans tracemalloc
+    start = time.perf_counter()
+    asyncio.run(replay(frames))
+    seconds = time.perf_counter() - start
+
+    # Mémoire retenue par un flux neuf, puis pic par message en régime établi
+    if sink is not None:
+        sink = DataManager(max_candles=sink.max_candles, storage=sink.storage)
+    client = BitgetWebSocketClient("BTCUSDT", "1m", on_message=on_candle, handoff_policy=None, sink=sink)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    asyncio.run(replay(frames))
+    retained = tracemalloc.get_traced_memory()[0] - base
+    peaks = []
+
+    async def per_message(batch):
+        for message in batch:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await client.handle_message(message)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+
+    asyncio.run(per_message(frames[-1000:]))
+    tracemalloc.stop()
+    return seconds / len(frames) * 1e6, retained, sorted(peaks)[len(peaks) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20_000)
+    parser.add_argument("--updates-per-candle", type=int, default=10)
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.updates_per_candle)
+    print(f"{args.frames} frames, {args.frames // args.updates_per_candle} candles")
+    print(f"{'mode':<10} {'µs/msg':>8} {'retained KB':>12} {'peak B/msg':>11}")
+    modes = {
+        "callback": None,
+        "deque": DataManager(max_candles=500, storage="deque"),
+        "columnar": DataManager(max_candles=500, storage="columnar"),
+    }
+    for name, sink in modes.items():
+        us, retained, peak = measure(frames, sink)
+        print(f"{name:<10} {us:>8.1f} {retained / 1024:>12.1f} {peak:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark de l'historique froid compressé (fenêtre chaude + chunks compressés)
+
+Mesure la mémoire par bougie, le temps d'ingestion et de décompression, et
+l'erreur de prix selon l'encodage (float32 ou ticks entiers).
+
+Usage:
+    python benchmarks/bench_cold_history.py
+    python benchmarks/bench_cold_history.py --sizes 100000 --budget-mb 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+
+
+def make_arrays(n: int, tick: float = 0.1):
+    """Génère n bougies 1m en marche aléatoire, prix alignés sur le tick"""
+    rng = np.random.default_rng(42)
+    close = np.round((30000 + np.cumsum(rng.normal(0, 5, n))) / tick) * tick
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.round(np.abs(rng.normal(0, 3, n)) / tick) * tick
+    return {
+        "time": 1700000000 + np.arange(n, dtype=np.int64) * 60,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": np.round(rng.exponential(50, n), 3),
+    }
+
+
+def bench(arrays, hot: int, budget: int, tick):
+    n = len(arrays["time"])
+    dm = DataManager(max_candles=hot, cold_budget_bytes=budget, cold_price_tick=tick)
+
+    start = time.perf_counter()
+    dm.add_arrays("1m", arrays)
+    ingest = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = dm.get_arrays("1m", include_cold=True)
+    decode = time.perf_counter() - start
+
+    kept = len(full["time"])
+    error = max(np.abs(full[field] - arrays[field][n - kept:]).max() for field in ("open", "high", "low", "close"))
+    usage = dm.memory_usage("1m")
+    return usage, kept, ingest, decode, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--hot", type=int, default=500)
+    parser.add_argument("--budget-mb", type=float, default=4)
+    args = parser.parse_args()
+    budget = int(args.budget_mb * 1024 * 1024)
+
+    print(f"{'candles':>10} {'prices':<8} {'kept':>9} {'hot KB':>8} {'cold KB':>9} {'B/bar':>6} "
+          f"{'ingest ms':>10} {'decode ms':>10} {'max error':>10}")
+    for n in args.sizes:
+        arrays = make_arrays(n)
+        raw = n * 48
+        for label, tick in (("float32", None), ("tick", 0.1)):
+            usage, kept, ingest, decode, error = bench(arrays, args.hot, budget, tick)
+            per_bar = usage["cold_bytes"] / max(usage["cold_candles"], 1)
+            print(f"{n:>10} {label:<8} {kept:>9} {usage['hot_bytes'] / 1024:>8.0f} {usage['cold_bytes'] / 1024:>9.0f} "
+                  f"{per_bar:>6.1f} {ingest * 1000:>10.1f} {decode * 1000:>10.1f} {error:>10.2g}")
+        print(f"{n:>10} {'raw':<8} {n:>9} {raw / 1024:>8.0f} {'-':>9} {48:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
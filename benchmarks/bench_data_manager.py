@@ -0,0 +1,106 @@
+"""
+Benchmark DataManager: stockage "deque" (deque de dicts) vs "columnar" (ring buffer NumPy)
+
+Usage:
+    python benchmarks/bench_data_manager.py
+    python benchmarks/bench_data_manager.py --sizes 500 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+
+
+def make_candles(n: int):
+    """Génère n bougies 1m synthétiques"""
+    return [
+        {
+            "time": 1700000000 + i * 60,
+            "open": 100.0 + i * 0.01,
+            "high": 101.0 + i * 0.01,
+            "low": 99.0 + i * 0.01,
+            "close": 100.5 + i * 0.01,
+            "volume": 1000.0,
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(func, repeat: int) -> float:
+    """Meilleur temps (secondes) sur `repeat` exécutions"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(storage: str, candles, repeat: int):
+    n = len(candles)
+    dm = DataManager(max_candles=n, storage=storage)
+
+    # Ingestion bougie par bougie (chemin WebSocket)
+    start = time.perf_counter()
+    for candle in candles:
+        dm.add_candle("1m", candle)
+    results = {"add_candle": time.perf_counter() - start}
+
+    # Ingestion en bloc (chemin historique REST)
+    def bulk():
+        dm.clear("1m")
+        dm.add_candles("1m", candles)
+    results["add_candles"] = best_of(bulk, repeat)
+
+    # Lot qui chevauche la fin (snapshot renvoyé après reconnexion): upsert dédoublonné en bloc
+    overlap = candles[-max(1, n // 5):]
+    results["add_overlap"] = best_of(lambda: dm.add_candles("1m", overlap), repeat)
+
+    # Reconstruction complète (cache invalidé à chaque appel)
+    def cold_dataframe():
+        dm._get_series("1m").frame_cache = None
+        dm.get_dataframe("1m")
+    results["get_dataframe"] = best_of(cold_dataframe, repeat)
+    results["df_cached"] = best_of(lambda: dm.get_dataframe("1m"), repeat)
+
+    # Mise à jour de la bougie live puis lecture (patch de la dernière ligne)
+    live = dict(candles[-1])
+    def live_update():
+        live["close"] += 0.01
+        dm.add_candle("1m", live)
+        dm.get_dataframe("1m")
+    results["df_live_patch"] = best_of(live_update, repeat)
+    results["get_candles"] = best_of(lambda: dm.get_candles("1m"), repeat)
+    results["aggregate_many"] = best_of(lambda: dm.aggregate_many("1m", [5, 15, 60, 240]), repeat)
+    if storage == "columnar":
+        results["get_arrays"] = best_of(lambda: dm.get_arrays("1m"), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 10_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'candles':>10} {'operation':<14} {'deque (ms)':>12} {'columnar (ms)':>14} {'speedup':>8}")
+    for n in args.sizes:
+        candles = make_candles(n)
+        repeat = 20 if n <= 10_000 else 3
+        deque_res = bench("deque", candles, repeat)
+        columnar_res = bench("columnar", candles, repeat)
+
+        for op, columnar_time in columnar_res.items():
+            deque_time = deque_res.get(op)
+            if deque_time is None:
+                print(f"{n:>10} {op:<14} {'-':>12} {columnar_time * 1000:>14.3f} {'-':>8}")
+            else:
+                speedup = deque_time / columnar_time if columnar_time > 0 else float("inf")
+                print(f"{n:>10} {op:<14} {deque_time * 1000:>12.3f} {columnar_time * 1000:>14.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark du décodage des messages WebSocket (BitgetWebSocketClient.handle_message)
+
+Compare le chemin historique (json stdlib + une bougie dict par ligne, ajoutée une à une
+au DataManager) au chemin rapide (orjson si installé + conversion des grandes frames en
+colonnes NumPy, ajoutées en bloc via le callback de lot), de la frame brute jusqu'au
+DataManager, sur un échantillon de frames: un enregistrement (record_path du client, ou une
+frame JSON brute par ligne, .gz accepté) ou, à défaut, un échantillon synthétique au format Bitget
+(updates d'une ligne + snapshots).
+
+Usage:
+    python benchmarks/bench_decode.py
+    python benchmarks/bench_decode.py --sample frames.jsonl.gz --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitget_ws_client
+from bitget_ws_client import BitgetWebSocketClient
+from data_manager import DataManager
+from feed_replay import read_frames
+
+logging.getLogger("data_manager").setLevel(logging.WARNING)
+
+
+def synthetic_sample(updates: int, snapshots: int, snapshot_rows: int):
+    """Frames au format Bitget: `updates` updates d'une ligne et `snapshots` snapshots"""
+    rng = np.random.default_rng(0)
+    arg = {"instType": "USDT-FUTURES", "channel": "candle1m", "instId": "BTCUSDT"}
+
+    def row(i):
+        close = 30000 + rng.normal(0, 50)
+        return [str((1700000000 + i * 60) * 1000), f"{close - 5:.1f}", f"{close + 10:.1f}",
+                f"{close - 10:.1f}", f"{close:.1f}", f"{rng.exponential(50):.3f}",
+                f"{rng.exponential(1e6):.2f}", f"{rng.exponential(1e6):.2f}"]
+
+    frames = []
+    for i in range(updates):
+        frames.append(json.dumps({"action": "update", "arg": arg, "data": [row(i)], "ts": 1700000000000 + i}))
+    for _ in range(snapshots):
+        frames.append(json.dumps({"action": "snapshot", "arg": arg,
+                                  "data": [row(i) for i in range(snapshot_rows)], "ts": 1700000000000}))
+    return frames
+
+
+def load_sample(path: str):
+    return [frame for _, frame in read_frames(path)]
+
+
+def bench(frames, fast: bool, repeat: int):
+    """Retourne (messages/s, latences par frame en µs)"""
+    bitget_ws_client.json_loads = bitget_ws_client.orjson.loads if fast and bitget_ws_client.JSON_BACKEND == "orjson" else json.loads
+    data_manager = DataManager(max_candles=1000)
+    client = BitgetWebSocketClient(symbol="BTCUSDT", timeframe=None)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(client.subscribe(
+        "BTCUSDT", "1m",
+        lambda candle: data_manager.add_candle("1m", candle),
+        batch_callback=(lambda arrays: data_manager.add_arrays("1m", arrays)) if fast else None
+    ))
+    latencies = np.empty(len(frames) * repeat)
+    start = time.perf_counter()
+    for r in range(repeat):
+        for i, frame in enumerate(frames):
+            t0 = time.perf_counter()
+            loop.run_until_complete(client.handle_message(frame))
+            latencies[r * len(frames) + i] = time.perf_counter() - t0
+    total = time.perf_counter() - start
+    loop.close()
+    return len(latencies) / total, latencies * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", help="Fichier de frames enregistrées (une frame JSON par ligne)")
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--snapshots", type=int, default=50)
+    parser.add_argument("--snapshot-rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.sample:
+        frames = load_sample(args.sample)
+        groups = {"sample": frames}
+    else:
+        frames = synthetic_sample(args.updates, args.snapshots, args.snapshot_rows)
+        groups = {"update": frames[:args.updates], "snapshot": frames[args.updates:]}
+
+    print(f"JSON backend: {bitget_ws_client.JSON_BACKEND}")
+    print(f"{'frames':<10} {'path':<10} {'msg/s':>10} {'p50 µs':>9} {'p99 µs':>9} {'speedup':>8}")
+    original_loads = bitget_ws_client.json_loads
+    try:
+        for name, group in groups.items():
+            base_rate = None
+            for label, fast in (("legacy", False), ("fast", True)):
+                rate, latencies = bench(group, fast, args.repeat)
+                speedup = f"{rate / base_rate:.1f}x" if base_rate else "-"
+                base_rate = base_rate or rate
+                print(f"{name:<10} {label:<10} {rate:>10.0f} {np.percentile(latencies, 50):>9.1f} "
+                      f"{np.percentile(latencies, 99):>9.1f} {speedup:>8}")
+    finally:
+        bitget_ws_client.json_loads = original_loads
+
+
+if __name__ == "__main__":
+    main()
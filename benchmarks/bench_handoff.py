@@ -0,0 +1,117 @@
+"""
+Latence de réception WebSocket sous charge consommateur, avec et sans file de handoff
+
+Démarre bitget_mock_server dans un processus séparé, abonne --symbols flux 1m sur une
+connexion et branche un consommateur lent: --consumer-ms de CPU par bougie livrée et
+--batch-ms par snapshot (écriture d'un lot d'historique), comme un DataManager en
+concurrence avec des pages. Pour chaque politique (direct =
+callbacks appelés par la boucle de réception, puis coalesce / drop / block), mesure le
+retard entre l'envoi d'une frame par le serveur (champ ts) et son traitement par la
+réception, ainsi que ce que la file a livré, coalescé ou perdu.
+
+Usage:
+    python benchmarks/bench_handoff.py --symbols 20 --rate 50 --consumer-ms 1
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import orjson
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_mock_feed import start_server
+from bitget_mock_server import WS_PATH
+from bitget_ws_client import BitgetWebSocketClient
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class LatencyClient(BitgetWebSocketClient):
+    """Client qui note, pour chaque frame de données, le retard depuis son envoi par le serveur"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    async def handle_message(self, message):
+        if message != "pong":
+            ts = orjson.loads(message).get("ts")
+            if ts is not None:
+                self.latencies.append(time.time() * 1000 - ts)
+        await super().handle_message(message)
+
+
+def run_mode(args, policy):
+    delivered = [0]
+
+    def busy(ms):
+        end = time.perf_counter() + ms / 1000
+        while time.perf_counter() < end:
+            pass
+
+    def slow_consumer(_candle):
+        busy(args.consumer_ms)
+        delivered[0] += 1
+
+    def slow_batch(_arrays):
+        busy(args.batch_ms)
+
+    async def main():
+        client = LatencyClient(timeframe=None, handoff_policy=policy, handoff_maxsize=args.maxsize,
+                               ws_url=f"ws://127.0.0.1:{args.port}{WS_PATH}")
+        for i in range(args.symbols):
+            await client.subscribe(f"SYM{i:03d}USDT", "1m", slow_consumer, slow_batch)
+        task = asyncio.ensure_future(client.run())
+        await asyncio.sleep(args.warmup)
+        client.latencies.clear()
+        delivered[0] = 0
+        start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        elapsed = time.perf_counter() - start
+        latencies = np.array(client.latencies) if client.latencies else np.zeros(1)
+        received = len(client.latencies) / elapsed
+        metrics = client.handoff.metrics() if client.handoff is not None else {}
+        client.stop()
+        await asyncio.gather(task, return_exceptions=True)
+        return latencies, received, delivered[0] / elapsed, metrics
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=50.0, help="Updates/s par symbole")
+    parser.add_argument("--consumer-ms", type=float, default=1.0, help="CPU du consommateur par bougie (ms)")
+    parser.add_argument("--batch-ms", type=float, default=20.0, help="CPU du consommateur par snapshot (ms)")
+    parser.add_argument("--maxsize", type=int, default=1024)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8801)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.rate)
+    try:
+        print(f"symbols {args.symbols}, {args.symbols * args.rate:g} updates/s sent, "
+              f"consumer {args.consumer_ms:g} ms/candle + {args.batch_ms:g} ms/snapshot")
+        print(f"{'mode':<9} {'recv/s':>8} {'lat p50':>9} {'lat p99':>9} {'lat max':>9} "
+              f"{'deliv/s':>8} {'coalesced':>10} {'dropped':>8} {'max depth':>10} {'max lag':>9}")
+        for policy in (None, "coalesce", "drop", "block"):
+            latencies, received, delivered, metrics = run_mode(args, policy)
+            print(f"{policy or 'direct':<9} {received:>8.0f} {np.percentile(latencies, 50):>7.1f}ms "
+                  f"{np.percentile(latencies, 99):>7.1f}ms {latencies.max():>7.1f}ms {delivered:>8.0f} "
+                  f"{metrics.get('coalesced', 0):>10} {metrics.get('dropped', 0):>8} "
+                  f"{metrics.get('max_depth', 0):>10} {metrics.get('max_lag_ms', 0):>7.0f}ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Stress test hors ligne de toute la chaîne: serveur Bitget local -> hub -> lecteurs
+
+Démarre bitget_mock_server dans un processus séparé, ouvre un flux par symbole via le
+MarketDataHub partagé (une connexion multiplexée, historique REST compris) puis simule
+des lecteurs de page: toutes les --poll secondes, chaque lecteur lit son curseur et, s'il
+y a du nouveau, recalcule la page (snapshot DataFrame + SMA 20/50).
+
+Rapporte le débit émis par le serveur, le débit reçu et écrit par le hub (après
+coalescence des updates d'une même bougie) et la latence des recalculs de page.
+
+Usage:
+    python benchmarks/bench_mock_feed.py --symbols 20 --rate 50 --duration 10
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bitget_mock_server import STATS_PATH, WS_PATH
+from bitget_ws_client import BitgetWebSocketClient
+from data_manager import DataManager, DEFAULT_ROLLUP_TIMEFRAMES
+from market_hub import MarketDataHub
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def start_server(port: int, rate: float) -> subprocess.Popen:
+    """Serveur mock dans son propre processus (ne partage pas le GIL du hub)"""
+    script = os.path.join(ROOT, "bitget_mock_server.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port), "--rate", str(rate)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            server_stats(port)
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Mock server did not start")
+
+
+def server_stats(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{STATS_PATH}", timeout=2) as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=20.0, help="Updates/s par symbole")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=2, help="Lecteurs de page par symbole")
+    parser.add_argument("--poll", type=float, default=0.5, help="Période de rafraîchissement d'une page (s)")
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.rate)
+    BitgetWebSocketClient.WS_URL = f"ws://127.0.0.1:{args.port}{WS_PATH}"
+    BitgetWebSocketClient.REST_URL = f"http://127.0.0.1:{args.port}"
+    try:
+        run(args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(args):
+
+    symbols = [f"SYM{i:03d}USDT" for i in range(args.symbols)]
+    data_manager = DataManager(max_candles=500, rollup_timeframes=DEFAULT_ROLLUP_TIMEFRAMES)
+    hub = MarketDataHub(data_manager, symbol=symbols[0], history_depth=500)
+    for symbol in symbols:
+        hub.ensure("1m", symbol)
+    # Laisser l'historique et les snapshots arriver avant de mesurer
+    deadline = time.time() + 30
+    while time.time() < deadline and not all(data_manager.count_candles("1m", s) for s in symbols):
+        time.sleep(0.1)
+
+    sent0 = server_stats(args.port)["messages"]
+    stats0 = hub.stats()
+    cursors = {(s, r): hub.read("1m", 0, s)[0] for s in symbols for r in range(args.readers)}
+    recompute = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        tick = time.perf_counter()
+        for (symbol, reader), cursor in cursors.items():
+            cursor, updates, missed = hub.read("1m", cursor, symbol)
+            cursors[(symbol, reader)] = cursor
+            if updates or missed:
+                t0 = time.perf_counter()
+                _, df = data_manager.get_snapshot("1m", symbol)
+                df["close"].rolling(20).mean()
+                df["close"].rolling(50).mean()
+                recompute.append(time.perf_counter() - t0)
+        time.sleep(max(0.0, args.poll - (time.perf_counter() - tick)))
+    elapsed = time.perf_counter() - start
+
+    sent = server_stats(args.port)["messages"] - sent0
+    stats = hub.stats()
+    received = stats["updates_received"] - stats0["updates_received"]
+    written = stats["updates_written"] - stats0["updates_written"]
+    recompute = np.array(recompute) * 1e3 if recompute else np.zeros(1)
+    print(f"symbols {args.symbols}, rate {args.rate:g}/s/symbol, readers {args.readers * args.symbols}")
+    print(f"server sent   {sent / elapsed:>10.0f} msg/s")
+    print(f"hub received  {received / elapsed:>10.0f} updates/s ({received / max(sent, 1):.1%} of sent)")
+    print(f"hub written   {written / elapsed:>10.0f} updates/s (coalescing x{received / max(written, 1):.1f})")
+    print(f"page recompute {len(recompute)} x, p50 {np.percentile(recompute, 50):.2f} ms, "
+          f"p99 {np.percentile(recompute, 99):.2f} ms")
+    print(f"hub stats     {stats}")
+    hub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark du carnet L2: application des deltas du channel books + vérification du checksum
+
+Compare, sur les mêmes messages (carnet synthétique de bitget_mock_server):
+  dict    - un dict {prix: taille} par côté, tri des niveaux à chaque checksum
+  arrays  - order_book.OrderBook (tableaux NumPy triés, deltas en place)
+Tous les checksums doivent correspondre.
+
+Usage:
+    python benchmarks/bench_order_book.py --updates 20000 --levels 400 --changes 10
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitget_mock_server import SyntheticBook
+from order_book import CHECKSUM_LEVELS, OrderBook
+
+
+class DictBook:
+    """Référence: niveaux en dicts, triés à la demande"""
+
+    def __init__(self):
+        self.bids = {}
+        self.asks = {}
+
+    def apply(self, data, snapshot=False):
+        if snapshot:
+            self.bids, self.asks = {}, {}
+        for side, levels in (("bids", self.bids), ("asks", self.asks)):
+            for price, size in data.get(side) or []:
+                if float(size) == 0:
+                    levels.pop(price, None)
+                else:
+                    levels[price] = size
+        bids = sorted(self.bids.items(), key=lambda level: -float(level[0]))[:CHECKSUM_LEVELS]
+        asks = sorted(self.asks.items(), key=lambda level: float(level[0]))[:CHECKSUM_LEVELS]
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts += list(bids[i])
+            if i < len(asks):
+                parts += list(asks[i])
+        crc = zlib.crc32(":".join(parts).encode())
+        return (crc - (1 << 32) if crc >= (1 << 31) else crc) == data["checksum"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--levels", type=int, default=400, help="Niveaux par côté")
+    parser.add_argument("--changes", type=int, default=10, help="Niveaux modifiés par update")
+    args = parser.parse_args()
+
+    source = SyntheticBook(30000.0, levels=args.levels)
+    snapshot = source.snapshot(0)
+    updates = [source.update(i / 1000, args.changes) for i in range(args.updates)]
+
+    results = {}
+    for name in ("dict", "arrays"):
+        if name == "dict":
+            book = DictBook()
+            book.apply(snapshot, snapshot=True)
+            apply = book.apply
+        else:
+            book = OrderBook("BENCH")
+            book.apply_snapshot(snapshot)
+            apply = book.apply_update
+        t0 = time.perf_counter()
+        ok = sum(bool(apply(update)) for update in updates)
+        results[name] = time.perf_counter() - t0
+        assert ok == len(updates), f"{name}: {len(updates) - ok} checksum mismatches"
+
+    print(f"{args.updates} updates, {args.levels} levels/side, {args.changes} changes/update, checksum verified")
+    print(f"{'book':<8} {'seconds':>8} {'updates/s':>12}")
+    for name, seconds in results.items():
+        print(f"{name:<8} {seconds:>8.2f} {args.updates / seconds:>12.0f}")
+    print(f"speedup x{results['dict'] / results['arrays']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
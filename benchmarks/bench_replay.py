@@ -0,0 +1,116 @@
+"""
+Benchmark d'ingestion de bout en bout par rejeu d'un enregistrement, sans réseau
+
+Rejoue des frames WebSocket (enregistrées via BitgetWebSocketClient(record_path=...) ou
+générées de façon déterministe) dans handle_message, le plus vite possible par défaut,
+en trois étapes cumulatives:
+  decode      - décodage et routage seuls (callbacks vides)
+  datamanager - + écriture dans un DataManager avec rollups (comme le hub)
+  recompute   - + recalcul d'une page toutes les --recompute-every frames
+                (snapshot DataFrame + SMA 20/50, comme le graphique principal)
+
+Usage:
+    python benchmarks/bench_replay.py
+    python benchmarks/bench_replay.py --recording .recordings/btc-1m.gz --speed 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitget_ws_client import BitgetWebSocketClient
+from data_manager import DataManager, DEFAULT_ROLLUP_TIMEFRAMES
+from feed_replay import FrameRecorder
+
+logging.getLogger("data_manager").setLevel(logging.WARNING)
+logging.getLogger("feed_replay").setLevel(logging.WARNING)
+
+
+def synthetic_recording(path: str, frames: int, rate: float, symbol: str):
+    """Flux 1m simulé: `rate` updates/s de la bougie live, une nouvelle bougie par minute"""
+    rng = np.random.default_rng(0)
+    arg = {"instType": "USDT-FUTURES", "channel": "candle1m", "instId": symbol}
+    start = 1700000000
+    recorder = FrameRecorder(path)
+    price = 30000.0
+    candle = None
+    for i in range(frames):
+        now = start + i / rate
+        minute = int(now // 60) * 60
+        price += rng.normal(0, 2)
+        if candle is None or candle[0] != minute:
+            candle = [minute, price, price, price, price, 0.0]
+        candle[2] = max(candle[2], price)
+        candle[3] = min(candle[3], price)
+        candle[4] = price
+        candle[5] += rng.exponential(0.5)
+        row = [str(minute * 1000)] + [f"{v:.2f}" for v in candle[1:]]
+        frame = {"action": "update", "arg": arg, "data": [row], "ts": int(now * 1000)}
+        recorder.write(json.dumps(frame, separators=(",", ":")), received_at=now)
+    recorder.close()
+
+
+def run_stage(path: str, symbol: str, stage: str, speed, recompute_every: int):
+    data_manager = DataManager(max_candles=500, rollup_timeframes=DEFAULT_ROLLUP_TIMEFRAMES)
+    client = BitgetWebSocketClient(symbol=symbol, timeframe=None)
+    frames = [0]
+
+    def on_candle(candle):
+        if stage == "decode":
+            return
+        data_manager.add_candle("1m", candle, symbol=symbol)
+        if stage == "recompute":
+            frames[0] += 1
+            if frames[0] % recompute_every == 0:
+                _, df = data_manager.get_snapshot("1m", symbol)
+                df["close"].rolling(20).mean()
+                df["close"].rolling(50).mean()
+
+    def on_batch(arrays):
+        if stage != "decode":
+            data_manager.add_arrays("1m", arrays, symbol=symbol)
+
+    async def main():
+        await client.subscribe(symbol, "1m", on_candle, batch_callback=on_batch)
+        return await client.replay(path, speed)
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recording", help="Enregistrement à rejouer (défaut: flux synthétique)")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--frames", type=int, default=50_000, help="Frames du flux synthétique")
+    parser.add_argument("--rate", type=float, default=20.0, help="Frames/s du flux synthétique")
+    parser.add_argument("--speed", type=float, default=0, help="1 temps réel, N fois plus vite, 0 max")
+    parser.add_argument("--recompute-every", type=int, default=20)
+    args = parser.parse_args()
+
+    path = args.recording
+    tmp = None
+    if path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".gz", delete=False)
+        tmp.close()
+        path = tmp.name
+        synthetic_recording(path, args.frames, args.rate, args.symbol)
+
+    try:
+        print(f"{'stage':<12} {'frames':>8} {'seconds':>8} {'frames/s':>10}")
+        for stage in ("decode", "datamanager", "recompute"):
+            stats = run_stage(path, args.symbol, stage, args.speed, args.recompute_every)
+            print(f"{stage:<12} {stats['frames']:>8} {stats['seconds']:>8.2f} {stats['frames_per_sec']:>10.0f}")
+    finally:
+        if tmp is not None:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
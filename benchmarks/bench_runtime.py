@@ -0,0 +1,87 @@
+"""
+CPU des flux WebSocket: une boucle pour tous les clients vs une boucle (et un thread) par client
+
+Démarre bitget_mock_server dans un processus séparé (son CPU n'est pas compté) puis ouvre
+--clients connexions de --symbols abonnements 1m chacune, exécutées:
+  1 loop    - tous les clients comme tâches d'un seul FeedRuntime
+  N loops   - un FeedRuntime (boucle + thread) par client, comme un thread par flux
+  1 uvloop  - un seul FeedRuntime sur uvloop (si installé)
+Rapporte les messages reçus, le CPU du processus (tous threads) et le CPU pour 10k msg/s.
+
+Usage:
+    python benchmarks/bench_runtime.py --clients 8 --symbols 5 --rate 100
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_mock_feed import start_server
+from bitget_mock_server import WS_PATH
+from bitget_ws_client import BitgetWebSocketClient
+from feed_runtime import FeedRuntime, uvloop
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def run_mode(args, loops: int, use_uvloop: bool):
+    runtimes = [FeedRuntime(use_uvloop, name=f"bench-{i}") for i in range(loops)]
+    clients = []
+    for i in range(args.clients):
+        client = BitgetWebSocketClient(timeframe=None, ws_url=f"ws://127.0.0.1:{args.port}{WS_PATH}")
+        runtime = runtimes[i % loops]
+        for j in range(args.symbols):
+            runtime.submit(client.subscribe(f"SYM{i:02d}{j:02d}USDT", "1m", lambda candle: None)).result()
+        runtime.add(client)
+        clients.append(client)
+
+    def received():
+        return sum(client.handoff.stats["enqueued"] for client in clients)
+
+    time.sleep(args.warmup)
+    threads = threading.active_count()
+    count, cpu, start = received(), time.process_time(), time.perf_counter()
+    time.sleep(args.duration)
+    elapsed = time.perf_counter() - start
+    rate = (received() - count) / elapsed
+    cpu_pct = (time.process_time() - cpu) / elapsed * 100
+    for runtime in runtimes:
+        runtime.stop()
+    return threads, rate, cpu_pct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--symbols", type=int, default=5, help="Abonnements par client")
+    parser.add_argument("--rate", type=float, default=100.0, help="Updates/s par abonnement")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8802)
+    args = parser.parse_args()
+
+    modes = [("1 loop", 1, False), ("N loops", args.clients, False)]
+    if uvloop is not None:
+        modes.append(("1 uvloop", 1, True))
+
+    server = start_server(args.port, args.rate)
+    try:
+        print(f"{args.clients} clients x {args.symbols} symbols, "
+              f"{args.clients * args.symbols * args.rate:g} updates/s sent"
+              + ("" if uvloop is not None else " (uvloop not installed)"))
+        print(f"{'mode':<9} {'threads':>8} {'msg/s':>8} {'CPU %':>7} {'CPU % / 10k msg/s':>18}")
+        for name, loops, use_uvloop in modes:
+            threads, rate, cpu_pct = run_mode(args, loops, use_uvloop)
+            print(f"{name:<9} {threads:>8} {rate:>8.0f} {cpu_pct:>7.1f} {cpu_pct / rate * 10_000:>18.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de l'agrégation des trades en bougies 1s/5s/15s/1m (volume acheteur/vendeur compris)
+
+Compare, sur les mêmes messages trade Bitget synthétiques:
+  per-trade  - un dict par trade, mise à jour bucket par bucket en Python
+  vectorized - parse_trades (colonnes) + TickAggregator.add_trades (reduceat par message)
+et vérifie que les deux donnent les mêmes buckets.
+
+Usage:
+    python benchmarks/bench_ticks.py --messages 20000 --trades-per-message 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tick_aggregator import DEFAULT_BUCKETS, TickAggregator, parse_trades
+
+
+def synthetic_messages(messages: int, per_message: int, rate: float):
+    """`messages` messages de `per_message` trades (le plus récent en tête), `rate` trades/s"""
+    rng = np.random.default_rng(0)
+    n = messages * per_message
+    ts = 1700000000000 + np.cumsum(rng.exponential(1000 / rate, n)).astype(np.int64)
+    price = 30000 + np.cumsum(rng.normal(0, 0.5, n))
+    size = rng.exponential(0.05, n)
+    side = rng.random(n) < 0.5
+    rows = [{"ts": str(t), "price": f"{p:.1f}", "size": f"{q:.4f}", "side": "buy" if b else "sell",
+             "tradeId": str(i)}
+            for i, (t, p, q, b) in enumerate(zip(ts.tolist(), price.tolist(), size.tolist(), side.tolist()))]
+    return [rows[i:i + per_message][::-1] for i in range(0, n, per_message)]
+
+
+def per_trade(messages):
+    """Référence: un dict par trade et par taille de bucket"""
+    buckets = {seconds: {} for seconds in DEFAULT_BUCKETS}
+    for rows in messages:
+        for row in sorted(rows, key=lambda r: int(r["ts"])):
+            trade = {"time": int(row["ts"]), "price": float(row["price"]), "size": float(row["size"]),
+                     "is_buy": row["side"] == "buy"}
+            for seconds, candles in buckets.items():
+                start = trade["time"] // (seconds * 1000) * seconds
+                candle = candles.get(start)
+                if candle is None:
+                    candles[start] = candle = {"time": start, "open": trade["price"], "high": trade["price"],
+                                               "low": trade["price"], "close": trade["price"], "volume": 0.0,
+                                               "buy_volume": 0.0, "sell_volume": 0.0, "trades": 0}
+                candle["high"] = max(candle["high"], trade["price"])
+                candle["low"] = min(candle["low"], trade["price"])
+                candle["close"] = trade["price"]
+                candle["volume"] += trade["size"]
+                candle["buy_volume" if trade["is_buy"] else "sell_volume"] += trade["size"]
+                candle["trades"] += 1
+    return buckets
+
+
+def vectorized(messages):
+    aggregator = TickAggregator(capacity={seconds: 1_000_000 for seconds in DEFAULT_BUCKETS})
+    for rows in messages:
+        aggregator.add_trades(parse_trades(rows))
+    return aggregator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--trades-per-message", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=500.0, help="Trades/s simulés")
+    args = parser.parse_args()
+
+    messages = synthetic_messages(args.messages, args.trades_per_message, args.rate)
+    trades = args.messages * args.trades_per_message
+
+    t0 = time.perf_counter()
+    reference = per_trade(messages)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    aggregator = vectorized(messages)
+    fast = time.perf_counter() - t0
+
+    for seconds, candles in reference.items():
+        arrays = aggregator.arrays(seconds)
+        expected = sorted(candles.values(), key=lambda c: c["time"])
+        assert len(expected) == len(arrays["time"]), seconds
+        for field in arrays:
+            assert np.allclose([c[field] for c in expected], arrays[field]), (seconds, field)
+
+    print(f"{trades} trades in {args.messages} messages ({args.rate:g} trades/s simulated)")
+    print(f"{'mode':<12} {'seconds':>8} {'trades/s':>12}")
+    print(f"{'per-trade':<12} {legacy:>8.2f} {trades / legacy:>12.0f}")
+    print(f"{'vectorized':<12} {fast:>8.2f} {trades / fast:>12.0f}  (x{legacy / fast:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Serveur local compatible Bitget (WebSocket public v2 + REST /candles), pour tester
+et benchmarker toute la chaîne hors ligne
+
+    python bitget_mock_server.py --port 8800 --rate 50
+    BITGET_WS_URL=ws://127.0.0.1:8800/v2/ws/public BITGET_REST_URL=http://127.0.0.1:8800 streamlit run Home.py
+
+Les bougies sont synthétiques mais déterministes: une bougie (symbol, timeframe, time)
+clôturée a toujours les mêmes valeurs, en REST comme en WebSocket. N'importe quel
+instId est accepté, le nombre de symboles n'est limité que par les abonnements.
+Le channel trade envoie des trades synthétiques autour du prix de la bougie 1m en cours,
+le channel books un carnet synthétique (snapshot puis deltas, checksum CRC32 Bitget).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from aiohttp import web, WSMsgType
+
+from bitget_rest import CANDLES_PATH, GRANULARITY_SECONDS
+from order_book import BOOK_CHANNEL, CHECKSUM_LEVELS
+from tick_aggregator import TRADE_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+WS_PATH = "/v2/ws/public"
+STATS_PATH = "/mock/stats"
+
+# Granularité d'un channel candlestick ("candle1Dutc" -> "1D")
+CHANNEL_GRANULARITY = {f"candle{tf}{'utc' if tf in ('1D', '1W', '1M') else ''}": tf
+                       for tf in GRANULARITY_SECONDS}
+
+# Nombre de bougies du snapshot envoyé après un subscribe
+SNAPSHOT_ROWS = 500
+
+# Nombre max de bougies par appel REST (comme Bitget)
+REST_MAX_LIMIT = 1000
+
+# Trades du snapshot du channel trade, et trades par update
+TRADE_SNAPSHOT_ROWS = 50
+TRADES_PER_UPDATE = 5
+
+# Niveaux par côté du carnet synthétique, et niveaux modifiés par update
+BOOK_LEVELS = 200
+BOOK_CHANGES_PER_UPDATE = 10
+
+
+class SyntheticMarket:
+    """
+    Prix synthétiques déterministes: tendance lente + bruit haché sur (symbol, time)
+
+    Vectorisé: une page REST de 1000 bougies se génère en une passe NumPy.
+    """
+
+    def __init__(self, base_price: float = 30000.0, volatility: float = 0.002):
+        self.base_price = base_price
+        self.volatility = volatility
+        # Valeurs finales de la bougie en cours par (symbol, timeframe): (start, o, h, l, c, v)
+        self._live: Dict[Tuple[str, str], Tuple[int, float, float, float, float, float]] = {}
+
+    @staticmethod
+    def _noise(times: np.ndarray, seed: int, salt: float) -> np.ndarray:
+        """Bruit pseudo-aléatoire dans [0, 1) fonction de (time, seed)"""
+        x = np.sin(times.astype(np.float64) * 12.9898 + seed * 78.233 + salt) * 43758.5453
+        return x - np.floor(x)
+
+    def _price(self, times: np.ndarray, seed: int) -> np.ndarray:
+        base = self.base_price * (1 + (seed % 97) / 100)
+        trend = 0.02 * np.sin(times / 86400 * 2 * np.pi + seed)
+        return base * (1 + trend + self.volatility * (self._noise(times, seed, 0.0) - 0.5))
+
+    def candles(self, symbol: str, timeframe: str, start_time: int, end_time: int) -> Dict[str, np.ndarray]:
+        """Bougies de [start_time, end_time] (alignées sur le timeframe), colonnes triées"""
+        seconds = GRANULARITY_SECONDS[timeframe]
+        seed = zlib.crc32(symbol.encode())
+        first = -(-start_time // seconds) * seconds
+        times = np.arange(first, end_time + 1, seconds, dtype=np.int64)
+        open_ = self._price(times, seed)
+        close = self._price(times + seconds, seed)
+        spread = np.abs(close - open_) + open_ * self.volatility * self._noise(times, seed, 1.0)
+        return {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + spread * self._noise(times, seed, 2.0),
+            "low": np.minimum(open_, close) - spread * self._noise(times, seed, 3.0),
+            "close": close,
+            "volume": 10 + 1000 * self._noise(times, seed, 4.0),
+        }
+
+    def live_candle(self, symbol: str, timeframe: str, now: float) -> List[str]:
+        """Ligne Bitget de la bougie en cours: la clôture converge vers sa valeur finale"""
+        seconds = GRANULARITY_SECONDS[timeframe]
+        start = int(now // seconds) * seconds
+        final = self._live.get((symbol, timeframe))
+        if final is None or final[0] != start:
+            arrays = self.candles(symbol, timeframe, start, start)
+            final = (start,) + tuple(arrays[field][0].item() for field in ("open", "high", "low", "close", "volume"))
+            self._live[(symbol, timeframe)] = final
+        _, open_, final_high, final_low, final_close, volume = final
+        progress = (now - start) / seconds
+        jitter = open_ * self.volatility * 0.1 * (math.sin(now * 1000 * 12.9898) % 1 - 0.5)
+        close = open_ + (final_close - open_) * progress + jitter
+        high = max(open_, close, final_high * progress + open_ * (1 - progress))
+        low = min(open_, close, final_low * progress + open_ * (1 - progress))
+        return [str(start * 1000), f"{open_:.2f}", f"{high:.2f}", f"{low:.2f}", f"{close:.2f}",
+                f"{volume * progress:.3f}", "0", "0"]
+
+    def trades(self, symbol: str, now: float, count: int) -> List[Dict[str, str]]:
+        """Trades Bitget (le plus récent en tête) des `count` dernières millisecondes avant `now`"""
+        seed = zlib.crc32(symbol.encode())
+        ts = int(now * 1000) - np.arange(count, dtype=np.int64)
+        price = float(self.live_candle(symbol, "1m", now)[4])
+        prices = price * (1 + self.volatility * 0.05 * (self._noise(ts, seed, 5.0) - 0.5))
+        sizes = 0.001 + 2 * self._noise(ts, seed, 6.0) ** 3
+        buys = self._noise(ts, seed, 7.0) < 0.5
+        return [{"ts": str(t), "price": f"{p:.2f}", "size": f"{q:.4f}", "side": "buy" if b else "sell",
+                 "tradeId": f"{t}{i}"}
+                for i, (t, p, q, b) in enumerate(zip(ts.tolist(), prices.tolist(), sizes.tolist(), buys.tolist()))]
+
+
+class SyntheticBook:
+    """
+    Carnet synthétique d'un abonnement books: grille de prix fixe autour du prix à l'abonnement,
+    tailles modifiées / niveaux retirés ou ajoutés au hasard à chaque update
+
+    Tenu en dicts {prix: taille} (chaînes), indépendamment de order_book.OrderBook, pour que
+    le checksum vérifie vraiment le carnet reconstruit côté client.
+    """
+
+    def __init__(self, mid: float, levels: int = BOOK_LEVELS, tick: float = 0.1, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.tick = tick
+        base = round(mid / tick)
+        self.bid_grid = [f"{(base - i - 1) * tick:.1f}" for i in range(levels + levels // 2)]
+        self.ask_grid = [f"{(base + i + 1) * tick:.1f}" for i in range(levels + levels // 2)]
+        self.bids = {price: self._size() for price in self.bid_grid[:levels]}
+        self.asks = {price: self._size() for price in self.ask_grid[:levels]}
+        self.seq = 0
+
+    def _size(self) -> str:
+        return f"{self.rng.exponential(2.0) + 0.001:.3f}"
+
+    def checksum(self) -> int:
+        bids = sorted(self.bids.items(), key=lambda level: -float(level[0]))[:CHECKSUM_LEVELS]
+        asks = sorted(self.asks.items(), key=lambda level: float(level[0]))[:CHECKSUM_LEVELS]
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts += list(bids[i])
+            if i < len(asks):
+                parts += list(asks[i])
+        crc = zlib.crc32(":".join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def _message(self, bids: List[List[str]], asks: List[List[str]], now: float) -> Dict:
+        self.seq += 1
+        return {"asks": asks, "bids": bids, "checksum": self.checksum(), "seq": self.seq,
+                "ts": str(int(now * 1000))}
+
+    def snapshot(self, now: float) -> Dict:
+        return self._message([[p, q] for p, q in self.bids.items()], [[p, q] for p, q in self.asks.items()], now)
+
+    def update(self, now: float, changes: int) -> Dict:
+        """Deltas: ~70% changements de taille, ~15% retraits, ~15% ajouts"""
+        deltas = {"bids": [], "asks": []}
+        for _ in range(changes):
+            side = "bids" if self.rng.random() < 0.5 else "asks"
+            levels = self.bids if side == "bids" else self.asks
+            grid = self.bid_grid if side == "bids" else self.ask_grid
+            price = grid[int(self.rng.integers(len(grid)))]
+            action = self.rng.random()
+            if price in levels and action < 0.15:
+                del levels[price]
+                size = "0"
+            else:
+                size = self._size()
+                levels[price] = size
+            deltas[side].append([price, size])
+        return self._message(deltas["bids"], deltas["asks"], now)
+
+
+def to_rows(arrays: Dict[str, np.ndarray]) -> List[List[str]]:
+    """Colonnes -> lignes Bitget [ts_ms, open, high, low, close, volume, quoteVol, usdtVol]"""
+    return [[str(t * 1000), f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.3f}", "0", "0"]
+            for t, o, h, l, c, v in zip(arrays["time"].tolist(), arrays["open"].tolist(),
+                                        arrays["high"].tolist(), arrays["low"].tolist(),
+                                        arrays["close"].tolist(), arrays["volume"].tolist())]
+
+
+class BitgetMockServer:
+    """
+    Serveur aiohttp: WebSocket public (subscribe/unsubscribe/ping, snapshot puis updates)
+    et GET /api/v2/mix/market/candles, sur le même port
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8800, rate: float = 10.0,
+                 snapshot_rows: int = SNAPSHOT_ROWS, market: Optional[SyntheticMarket] = None,
+                 trades_per_update: int = TRADES_PER_UPDATE):
+        """
+        Args:
+            rate: Updates par seconde et par abonnement
+            snapshot_rows: Bougies du snapshot envoyé après chaque subscribe
+            trades_per_update: Trades par message du channel trade
+        """
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.snapshot_rows = snapshot_rows
+        self.trades_per_update = trades_per_update
+        self.market = market or SyntheticMarket()
+        self.stats = {"connections": 0, "subscriptions": 0, "messages": 0, "rest_requests": 0}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}{WS_PATH}"
+
+    @property
+    def rest_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get(WS_PATH, self._handle_ws)
+        app.router.add_get(CANDLES_PATH, self._handle_candles)
+        app.router.add_get(STATS_PATH, self._handle_stats)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🧪 Mock Bitget server on {self.ws_url} / {self.rest_url}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        """Compteurs du serveur (pour les benchmarks qui le lancent dans un autre processus)"""
+        return web.json_response(self.stats)
+
+    async def _handle_candles(self, request: web.Request) -> web.Response:
+        self.stats["rest_requests"] += 1
+        query = request.query
+        timeframe = query.get("granularity")
+        if timeframe not in GRANULARITY_SECONDS or not query.get("symbol"):
+            return web.json_response({"code": "40034", "msg": "Parameter verification failed", "data": None})
+        limit = min(int(query.get("limit", 100)), REST_MAX_LIMIT)
+        seconds = GRANULARITY_SECONDS[timeframe]
+        now = int(time.time())
+        end_time = min(int(query["endTime"]) // 1000 if "endTime" in query else now, now)
+        start_time = int(query["startTime"]) // 1000 if "startTime" in query else end_time - (limit - 1) * seconds
+        start_time = max(start_time, end_time - (limit - 1) * seconds)
+        arrays = self.market.candles(query["symbol"], timeframe, start_time, end_time)
+        return web.json_response({"code": "00000", "msg": "success", "data": to_rows(arrays)})
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats["connections"] += 1
+        subscriptions: Dict[Tuple[str, str], dict] = {}
+        # Carnets synthétiques des abonnements books de la connexion
+        books: Dict[Tuple[str, str], SyntheticBook] = {}
+        sender = asyncio.create_task(self._send_updates(ws, subscriptions, books))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                if msg.data == "ping":
+                    await ws.send_str("pong")
+                    continue
+                try:
+                    request_data = json.loads(msg.data)
+                except json.JSONDecodeError:
+                    await ws.send_str(json.dumps({"event": "error", "code": 30001, "msg": "Invalid request"}))
+                    continue
+                op = request_data.get("op")
+                if op == "ping":
+                    await ws.send_str("pong")
+                elif op in ("subscribe", "unsubscribe"):
+                    for arg in request_data.get("args", []):
+                        await self._handle_op(ws, op, arg, subscriptions, books)
+        finally:
+            sender.cancel()
+            self.stats["connections"] -= 1
+            self.stats["subscriptions"] -= len(subscriptions)
+        return ws
+
+    async def _handle_op(self, ws, op: str, arg: dict, subscriptions: Dict[Tuple[str, str], dict],
+                         books: Dict[Tuple[str, str], SyntheticBook]):
+        channel, inst_id = arg.get("channel"), arg.get("instId")
+        if (channel not in CHANNEL_GRANULARITY and channel not in (TRADE_CHANNEL, BOOK_CHANNEL)) or not inst_id:
+            await ws.send_str(json.dumps({"event": "error", "arg": arg, "code": 30001,
+                                          "msg": f"channel:{channel},instId:{inst_id} doesn't exist"}))
+            return
+        key = (inst_id, channel)
+        await ws.send_str(json.dumps({"event": op, "arg": arg}))
+        if op == "unsubscribe":
+            if subscriptions.pop(key, None) is not None:
+                self.stats["subscriptions"] -= 1
+            books.pop(key, None)
+            return
+        if key not in subscriptions:
+            self.stats["subscriptions"] += 1
+        subscriptions[key] = arg
+        if channel == BOOK_CHANNEL:
+            mid = float(self.market.live_candle(inst_id, "1m", time.time())[4])
+            book = books[key] = SyntheticBook(mid, seed=zlib.crc32(inst_id.encode()))
+            await ws.send_str(json.dumps({"action": "snapshot", "arg": arg, "data": [book.snapshot(time.time())],
+                                          "ts": int(time.time() * 1000)}))
+            self.stats["messages"] += 1
+            return
+        if channel == TRADE_CHANNEL:
+            rows = self.market.trades(inst_id, time.time(), TRADE_SNAPSHOT_ROWS)
+            await ws.send_str(json.dumps({"action": "snapshot", "arg": arg, "data": rows,
+                                          "ts": int(time.time() * 1000)}))
+            self.stats["messages"] += 1
+            return
+        timeframe = CHANNEL_GRANULARITY[channel]
+        now = int(time.time())
+        seconds = GRANULARITY_SECONDS[timeframe]
+        closed = self.market.candles(inst_id, timeframe, now - self.snapshot_rows * seconds, now - seconds)
+        rows = to_rows(closed)[-(self.snapshot_rows - 1):] + [self.market.live_candle(inst_id, timeframe, time.time())]
+        await ws.send_str(json.dumps({"action": "snapshot", "arg": arg, "data": rows, "ts": now * 1000}))
+        self.stats["messages"] += 1
+
+    async def _send_updates(self, ws, subscriptions: Dict[Tuple[str, str], dict],
+                            books: Dict[Tuple[str, str], SyntheticBook]):
+        """Updates de la bougie live de chaque abonnement, `rate` par seconde (rattrapage par lots)"""
+        start = time.perf_counter()
+        sent = 0
+        tick = min(0.01, 1 / self.rate)
+        while not ws.closed:
+            await asyncio.sleep(tick)
+            due = int((time.perf_counter() - start) * self.rate) - sent
+            if due <= 0 or not subscriptions:
+                sent += max(due, 0)
+                continue
+            now = time.time()
+            for _ in range(due):
+                for (inst_id, channel), arg in list(subscriptions.items()):
+                    if channel == TRADE_CHANNEL:
+                        rows = self.market.trades(inst_id, now, self.trades_per_update)
+                    elif channel == BOOK_CHANNEL:
+                        book = books.get((inst_id, channel))
+                        if book is None:
+                            continue  # Désabonné pendant l'envoi
+                        rows = [book.update(now, BOOK_CHANGES_PER_UPDATE)]
+                    else:
+                        rows = [self.market.live_candle(inst_id, CHANNEL_GRANULARITY[channel], now)]
+                    await ws.send_str(json.dumps({"action": "update", "arg": arg, "data": rows,
+                                                  "ts": int(now * 1000)}))
+                    self.stats["messages"] += 1
+            sent += due
+
+
+async def serve(host: str, port: int, rate: float, snapshot_rows: int, trades_per_update: int):
+    server = BitgetMockServer(host, port, rate, snapshot_rows, trades_per_update=trades_per_update)
+    await server.start()
+    try:
+        while True:
+            await asyncio.sleep(10)
+            logger.info(f"📈 {server.stats}")
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--rate", type=float, default=10.0, help="Updates/s par abonnement")
+    parser.add_argument("--snapshot-rows", type=int, default=SNAPSHOT_ROWS)
+    parser.add_argument("--trades-per-update", type=int, default=TRADES_PER_UPDATE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port, args.rate, args.snapshot_rows, args.trades_per_update))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+from itertools import chain
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REST_URL = "https://api.bitget.com"
+CANDLES_PATH = "/api/v2/mix/market/candles"
+
+# Nombre max de bougies par appel /candles
+CANDLES_PAGE_LIMIT = 500
+
+# Limite de débit REST (Bitget: 20 requêtes/s par IP sur /candles, on garde de la marge)
+REST_RATE_LIMIT = 10
+REST_BURST = 10
+
+# Nombre max de requêtes /candles en vol simultanément
+REST_MAX_CONCURRENCY = 4
+
+# Durée d'une bougie par granularité Bitget (1M approximé à 31 jours pour découper les fenêtres)
+GRANULARITY_SECONDS = {
+    "1m": 60,
+    "3m": 180,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1H": 3600,
+    "4H": 4 * 3600,
+    "6H": 6 * 3600,
+    "12H": 12 * 3600,
+    "1D": 86400,
+    "1W": 7 * 86400,
+    "1M": 31 * 86400,
+}
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à jetons pour une boucle asyncio
+
+    `rate` jetons par seconde, au plus `capacity` accumulés (rafale). acquire()
+    attend qu'un jeton soit disponible.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def plan_history_windows(timeframe: str, depth: int, end_time: int,
+                         since: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Découpe à l'avance l'historique à charger en fenêtres d'une page /candles
+
+    Args:
+        depth: Nombre de bougies voulues jusqu'à `end_time` inclus
+        end_time: Timestamp (s) de la bougie la plus récente voulue
+        since: Si spécifié, seules les bougies strictement plus récentes sont voulues
+
+    Returns:
+        [(start, end)] bornes incluses en secondes, de la plus récente à la plus ancienne
+    """
+    seconds = GRANULARITY_SECONDS[timeframe]
+    end_time = (end_time // seconds) * seconds
+    first = end_time - (depth - 1) * seconds
+    if since is not None:
+        first = max(first, since + 1)
+    windows = []
+    end = end_time
+    while end >= first:
+        start = max(first, end - (CANDLES_PAGE_LIMIT - 1) * seconds)
+        windows.append((start, end))
+        end = start - seconds
+    return windows
+
+
+class BitgetRestClient:
+    """
+    Client REST Bitget pour l'historique des bougies
+
+    Les pages /candles sont demandées en parallèle (au plus `max_concurrency` en vol)
+    sous un TokenBucket partagé, sur une seule session aiohttp (pool de connexions)
+    créée à la première requête et gardée jusqu'à close(). Utilisable aussi comme
+    context manager async.
+    """
+
+    def __init__(self, base_url: str = REST_URL, rate: float = REST_RATE_LIMIT,
+                 burst: float = REST_BURST, max_concurrency: int = REST_MAX_CONCURRENCY):
+        self.base_url = base_url
+        self.limiter = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """Ferme la session (une nouvelle sera créée à la prochaine requête)"""
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+    async def fetch_page(self, symbol: str, timeframe: str, start_time: Optional[int] = None,
+                         end_time: Optional[int] = None, limit: int = CANDLES_PAGE_LIMIT) -> List[List]:
+        """
+        Une page /candles brute (lignes Bitget), bornes en secondes incluses
+
+        Raises:
+            RuntimeError: Réponse HTTP ou code Bitget en erreur
+        """
+        params = {
+            "symbol": symbol,
+            "productType": "USDT-FUTURES",
+            "granularity": timeframe,
+            "limit": str(limit)
+        }
+        if start_time is not None:
+            params["startTime"] = str(start_time * 1000)
+        if end_time is not None:
+            params["endTime"] = str(end_time * 1000)
+
+        session = self._ensure_session()
+        async with self._semaphore:
+            await self.limiter.acquire()
+            async with session.get(f"{self.base_url}{CANDLES_PATH}", params=params) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status} on {CANDLES_PATH}")
+                data = await response.json()
+        if data.get("code") != "00000":
+            raise RuntimeError(f"Bitget error {data.get('code')}: {data.get('msg')}")
+        return data.get("data") or []
+
+    async def fetch_range(self, symbol: str, timeframe: str, start_time: int,
+                          end_time: int) -> Dict[str, np.ndarray]:
+        """
+        Toutes les bougies de [start_time, end_time] (secondes), triées et dédoublonnées
+
+        La plage est découpée en fenêtres d'une page, demandées en parallèle.
+        """
+        span = GRANULARITY_SECONDS[timeframe] * CANDLES_PAGE_LIMIT
+        windows = [(start, min(start + span - 1, end_time))
+                   for start in range(start_time, end_time + 1, span)]
+        pages = await asyncio.gather(*(self.fetch_page(symbol, timeframe, start, end)
+                                       for start, end in windows))
+        return merge_pages(pages, start_time, end_time)
+
+    async def iter_history(self, symbol: str, timeframe: str, depth: int,
+                           since: Optional[int] = None, end_time: Optional[int] = None
+                           ) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """
+        Charge `depth` bougies jusqu'à maintenant et les produit par lots au fur et à mesure
+
+        Toutes les fenêtres sont planifiées d'avance (plan_history_windows) et demandées
+        en parallèle, la plus récente en premier. Chaque lot produit est trié et strictement
+        plus ancien que le précédent: le plus récent arrive d'abord, l'affichage peut
+        commencer sans attendre le reste. Une page vide (début de l'historique du
+        contrat) arrête le chargement.
+        """
+        end_time = int(time.time()) if end_time is None else end_time
+        windows = plan_history_windows(timeframe, depth, end_time, since)
+        tasks = [asyncio.ensure_future(self.fetch_page(symbol, timeframe, start, end))
+                 for start, end in windows]
+        try:
+            i = 0
+            while i < len(tasks):
+                await asyncio.wait([tasks[i]])
+                # Prendre aussi les pages suivantes déjà arrivées (contiguës)
+                pages, j, exhausted = [], i, False
+                while j < len(tasks) and tasks[j].done():
+                    page = tasks[j].result()
+                    j += 1
+                    if not page:
+                        exhausted = True
+                        break
+                    pages.append(page)
+                if pages:
+                    arrays = merge_pages(pages, windows[j - 1][0], windows[i][1])
+                    if len(arrays["time"]):
+                        yield arrays
+                if exhausted:
+                    break
+                i = j
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # Erreur déjà remontée ou sans objet: ne pas la signaler deux fois
+                task.cancel()
+
+
+def merge_pages(pages: List[List[List]], start_time: int, end_time: int) -> Dict[str, np.ndarray]:
+    """Fusionne des pages /candles brutes en colonnes triées et dédoublonnées dans [start_time, end_time]"""
+    arrays = parse_candle_rows(list(chain.from_iterable(pages)))
+    # Bornes strictes (certaines pages débordent d'une bougie) et ordre chronologique
+    times = arrays["time"]
+    inside = (times >= start_time) & (times <= end_time)
+    _, index = np.unique(times[inside], return_index=True)
+    return {field: arr[inside][index] for field, arr in arrays.items()}
+
+
+def parse_candle_rows(rows: List[List]) -> Dict[str, np.ndarray]:
+    """
+    Convertit des lignes Bitget [timestamp_ms, open, high, low, close, volume, ...]
+    (chaînes ou nombres) en colonnes NumPy, en une seule passe sans dict intermédiaire
+
+    Raises:
+        ValueError: Si une ligne a moins de 6 champs ou un champ non numérique
+    """
+    n = len(rows)
+    if any(len(row) < 6 for row in rows):
+        raise ValueError("Candle row with less than 6 fields")
+    values = chain.from_iterable(row[:6] for row in rows)
+    table = np.fromiter(map(float, values), dtype=np.float64, count=n * 6).reshape(n, 6)
+    return {
+        "time": table[:, 0].astype(np.int64) // 1000,  # ms → secondes
+        "open": table[:, 1],
+        "high": table[:, 2],
+        "low": table[:, 3],
+        "close": table[:, 4],
+        "volume": table[:, 5],
+    }
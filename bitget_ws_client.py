@@ -1,11 +1,29 @@
 import asyncio
 import json
 import logging
+import os
 import time
-from typing import Callable, Optional, Dict, List
+from typing import Any, Callable, Optional, Dict, List, Tuple
+import numpy as np
 import websockets
-import aiohttp
-from collections import deque
+
+from functools import partial
+
+from bitget_rest import BitgetRestClient, CANDLES_PAGE_LIMIT, GRANULARITY_SECONDS, parse_candle_rows
+from candle_buffer import arrays_to_candles, candles_to_arrays
+from feed_handoff import FeedHandoff, HANDOFF_MAXSIZE
+from feed_replay import FeedReplay, FrameRecorder
+from order_book import BOOK_CHANNEL, BOOK_CHANNELS, OrderBook
+from tick_aggregator import TRADE_CHANNEL, parse_trades
+
+# Décodage JSON: orjson si installé (pip install orjson), sinon la stdlib
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    json_loads = json.loads
+    JSON_BACKEND = "json"
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,6 +34,16 @@ class BitgetWebSocketClient:
     Client WebSocket pour Bitget API v2 - Futures USDT
     Support multi-timeframe avec reconnexion automatique
     Charge l'historique via REST API puis écoute les updates temps réel
+    
+    Une seule connexion peut porter plusieurs abonnements (instId, channel), ajoutés
+    ou retirés à chaud via subscribe()/unsubscribe(). Chaque abonnement a son propre
+    callback: les bougies reçues sont routées selon l'`arg` du message. Les trades
+    (channel trade, subscribe_trades()) sont livrés en colonnes, un appel par message;
+    le carnet (channel books, subscribe_book()) est tenu à jour dans un OrderBook.
+    
+    Pendant run(), les callbacks ne sont pas appelés par la boucle de réception: les
+    messages décodés sont déposés dans une file bornée (FeedHandoff) livrée par une tâche
+    séparée, par tranches courtes. Un consommateur lent ne bloque ni la socket ni les pings.
     """
     
     # Mapping des timeframes vers les channels Bitget
@@ -34,138 +62,350 @@ class BitgetWebSocketClient:
         "1M": "candle1Mutc",
     }
     
-    WS_URL = "wss://ws.bitget.com/v2/ws/public"
-    REST_URL = "https://api.bitget.com"
+    # Surchargeables par variables d'environnement (ex: serveur local bitget_mock_server.py)
+    WS_URL = os.environ.get("BITGET_WS_URL", "wss://ws.bitget.com/v2/ws/public")
+    REST_URL = os.environ.get("BITGET_REST_URL", "https://api.bitget.com")
+    
+    CHANNEL_TIMEFRAMES = {channel: tf for tf, channel in TIMEFRAME_MAPPING.items()}
+    
+    # Nombre max d'appels REST pour combler le trou depuis un warm start
+    MAX_HISTORY_PAGES = 10
+    
+    # Profondeur d'historique chargée par défaut (bougies)
+    HISTORY_DEPTH = 1000
+    
+    # Nombre max d'abonnements par message subscribe/unsubscribe (limite de taille des messages Bitget)
+    SUBSCRIBE_BATCH_SIZE = 40
+    
+    # À partir de ce nombre de lignes (ou si c'est un snapshot), une frame est livrée en colonnes
+    # NumPy au callback de lot de l'abonnement (s'il en a un); en dessous (updates d'une ligne)
+    # bougie par bougie
+    BATCH_PARSE_MIN_ROWS = 16
     
     def __init__(self, symbol: str = "BTCUSDT", timeframe: str = "1m", 
-                 on_message: Optional[Callable] = None):
+                 on_message: Optional[Callable] = None,
+                 history_since: Optional[int] = None,
+                 history_depth: Optional[int] = None,
+                 record_path: Optional[str] = None,
+                 ws_url: Optional[str] = None,
+                 rest_url: Optional[str] = None,
+                 handoff_policy: Optional[str] = "coalesce",
+                 handoff_maxsize: int = HANDOFF_MAXSIZE,
+                 sink: Optional[Any] = None):
         """
         Args:
             symbol: Trading pair (default: BTCUSDT)
-            timeframe: Timeframe (1m, 3m, 5m, etc.)
+            timeframe: Timeframe (1m, 3m, 5m, etc.), None pour une connexion sans
+                abonnement initial (abonnements ajoutés ensuite via subscribe())
             on_message: Callback function when new candle data arrives
+            history_since: Timestamp (s) de la dernière bougie déjà disponible localement,
+                seules les bougies plus récentes sont chargées via REST
+            history_depth: Nombre de bougies d'historique chargées via REST (défaut: HISTORY_DEPTH)
+            record_path: Si spécifié, les frames reçues sont enregistrées (gzip) dans ce fichier
+                pour être rejouées ensuite via replay()
+            ws_url, rest_url: URLs WebSocket / REST (défaut: WS_URL / REST_URL)
+            handoff_policy: Politique de la file réception -> callbacks quand elle est pleine
+                (coalesce, drop, block, cf. feed_handoff), None pour appeler les callbacks
+                directement depuis la boucle de réception
+            handoff_maxsize: Taille max de cette file
+            sink: Stockage alimenté directement par le client (ex: un DataManager), avec
+                add_candle(timeframe, candle, symbol=) et add_arrays(timeframe, arrays, symbol=):
+                les bougies de tous les abonnements candlestick y sont écrites avant leurs
+                callbacks (lots en un appel). None: le client ne garde aucune bougie
         """
         self.symbol = symbol
         self.timeframe = timeframe
         self.on_message = on_message
+        self.history_since = history_since
+        self.history_depth = history_depth or self.HISTORY_DEPTH
+        # Client REST (historique, backfill): une session et un token bucket pour tous les appels
+        if ws_url:
+            self.WS_URL = ws_url
+        if rest_url:
+            self.REST_URL = rest_url
+        self.rest = BitgetRestClient(self.REST_URL)
+        self.record_path = record_path
+        self.recorder: Optional[FrameRecorder] = None
+        # File réception -> callbacks, active pendant run() (hors run(): appels directs, ex. replay)
+        self.handoff = FeedHandoff(handoff_maxsize, handoff_policy) if handoff_policy else None
+        self.sink = sink
         self.ws = None
         self.running = False
         self.reconnect_delay = 5
         self.last_ping = time.time()
         self.ping_interval = 30  # Ping every 30 seconds
         
-        # Buffer pour stocker les bougies
-        self.candles_buffer = deque(maxlen=500)
+        # Abonnements de la connexion: {(instId, channel): callback}
+        self.subscriptions: Dict[Tuple[str, str], Optional[Callable]] = {}
+        # Callbacks de lot optionnels: {(instId, channel): callback(arrays)}
+        self.batch_callbacks: Dict[Tuple[str, str], Callable] = {}
+        if timeframe is not None:
+            self._set_callbacks((symbol, self._channel(timeframe)), on_message, None)
+        # Dernière bougie reçue par abonnement (s), point de départ du backfill après reconnexion
+        self.last_candle_times: Dict[Tuple[str, str], int] = {}
+        # Dernier trade reçu par abonnement trade (ms): les snapshots (ré)envoient des trades déjà vus
+        self.last_trade_ts: Dict[Tuple[str, str], int] = {}
+        # Callbacks de trou dans le flux trades (reconnexion, désabonnement): {(instId, trade): on_gap}
+        self.trade_gap_callbacks: Dict[Tuple[str, str], Callable] = {}
+        # Carnets des abonnements books: {(instId, channel): OrderBook}
+        self.books: Dict[Tuple[str, str], OrderBook] = {}
+        # Abonnements books en cours de resynchronisation (nouveau snapshot demandé)
+        self._book_resyncs: set = set()
+        self.connected = False
+        # Tâche de run() et sa boucle, pour l'annuler depuis n'importe quel thread (stop())
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _channel(self, timeframe: str) -> str:
+        channel = self.TIMEFRAME_MAPPING.get(timeframe)
+        if not channel:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        return channel
+    
+    def _set_callbacks(self, key: Tuple[str, str], callback: Optional[Callable],
+                       batch_callback: Optional[Callable]):
+        """
+        Enregistre les callbacks d'un abonnement candlestick, précédés de l'écriture dans le
+        sink s'il y en a un: une bougie par add_candle(), un lot par add_arrays() (le
+        callback bougie par bougie reçoit alors aussi les bougies du lot)
+        """
+        sink = self.sink
+        if sink is not None:
+            symbol, timeframe = key[0], self.CHANNEL_TIMEFRAMES[key[1]]
+            on_candle, on_batch = callback, batch_callback
+
+            def callback(candle):
+                sink.add_candle(timeframe, candle, symbol=symbol)
+                if on_candle:
+                    on_candle(candle)
+
+            def batch_callback(arrays):
+                sink.add_arrays(timeframe, arrays, symbol=symbol)
+                if on_batch is not None:
+                    on_batch(arrays)
+                elif on_candle:
+                    for candle in arrays_to_candles(arrays):
+                        on_candle(candle)
+        self.subscriptions[key] = callback
+        if batch_callback is not None:
+            self.batch_callbacks[key] = batch_callback
+        else:
+            self.batch_callbacks.pop(key, None)
+        
+    async def fetch_historical_candles(self, symbol: Optional[str] = None, timeframe: Optional[str] = None,
+                                       callback: Optional[Callable] = None,
+                                       history_since: Optional[int] = None,
+                                       depth: Optional[int] = None,
+                                       batch_callback: Optional[Callable] = None):
+        """
+        Récupère l'historique des bougies via REST API
+        
+        Les fenêtres endTime couvrant `depth` bougies sont planifiées d'avance et demandées
+        en parallèle sur la session REST partagée (token bucket). Les lots sont transmis
+        dès leur arrivée, du plus récent au plus ancien (chaque lot trié): le graphique
+        peut s'afficher avant la fin du chargement.
+        Avec `history_since` (warm start depuis le store local): seules les bougies
+        plus récentes sont chargées.
         
-    async def fetch_historical_candles(self):
-        """Récupère l'historique des bougies via REST API - Fait 2 appels pour 1000 bougies"""
+        Args:
+            symbol, timeframe, history_since: Abonnement à charger
+                (défaut: l'abonnement initial du client)
+            callback: Callback bougie par bougie (défaut, sans batch_callback non plus:
+                les callbacks de l'abonnement, sink compris)
+            depth: Nombre de bougies à charger (défaut: history_depth du client)
+            batch_callback: Reçoit chaque lot en colonnes {field: np.ndarray}, à la place
+                de `callback` bougie par bougie (dès 2 bougies: le lot est déjà en colonnes)
+        """
+        initial = symbol is None and timeframe is None
+        symbol = symbol or self.symbol
+        timeframe = timeframe or self.timeframe
+        key = (symbol, self._channel(timeframe))
+        if initial:
+            history_since = self.history_since
+        if callback is None and batch_callback is None:
+            callback, batch_callback = self.subscriptions.get(key), self.batch_callbacks.get(key)
+        depth = depth or self.history_depth
+        if history_since is not None:
+            # Combler le trou depuis le store local, même au-delà de la profondeur demandée
+            depth = max(depth, self.MAX_HISTORY_PAGES * CANDLES_PAGE_LIMIT)
+        
+        total = 0
         try:
-            url = f"{self.REST_URL}/api/v2/mix/market/candles"
-            all_candles = []
-            
-            # Bitget limite à 500 max par appel, on fait 2 appels
-            # 1er appel: 500 bougies les plus récentes
-            params = {
-                "symbol": f"{self.symbol}USDT_UMCBL",
-                "productType": "USDT-FUTURES", 
-                "granularity": self.timeframe,
-                "limit": "500"
-            }
-            
-            logger.info(f"Fetching {self.timeframe} historical data (call 1/2)...")
-            
-            async with aiohttp.ClientSession() as session:
-                # Premier appel - 500 bougies récentes
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if data.get("code") == "00000" and data.get("data"):
-                            candles_batch1 = data["data"]
-                            all_candles.extend(candles_batch1)
-                            logger.info(f"✅ Batch 1: {len(candles_batch1)} candles")
-                            
-                            # Deuxième appel - 500 bougies avant
-                            if len(candles_batch1) > 0:
-                                # Prendre le timestamp de la bougie la plus ancienne du 1er batch
-                                oldest_time = int(candles_batch1[-1][0])  # Timestamp en ms
-                                
-                                params["endTime"] = str(oldest_time - 1)  # Avant le 1er batch
-                                
-                                logger.info(f"Fetching older data (call 2/2)...")
-                                async with session.get(url, params=params) as response2:
-                                    if response2.status == 200:
-                                        data2 = await response2.json()
-                                        if data2.get("code") == "00000" and data2.get("data"):
-                                            candles_batch2 = data2["data"]
-                                            all_candles.extend(candles_batch2)
-                                            logger.info(f"✅ Batch 2: {len(candles_batch2)} candles")
-                        
-                        # Traiter toutes les bougies (du plus ancien au plus récent)
-                        logger.info(f"✅ Total loaded: {len(all_candles)} candles")
-                        
-                        # Les données sont du plus récent au plus ancien, on reverse
-                        for candle_data in reversed(all_candles):
-                            try:
-                                candle = {
-                                    "time": int(candle_data[0]) // 1000,  # ms → secondes
-                                    "open": float(candle_data[1]),
-                                    "high": float(candle_data[2]),
-                                    "low": float(candle_data[3]),
-                                    "close": float(candle_data[4]),
-                                    "volume": float(candle_data[5]) if len(candle_data) > 5 else 0
-                                }
-                                self.candles_buffer.append(candle) # Add to buffer
-                                if self.on_message:
-                                    self.on_message(candle)
-                            except (IndexError, ValueError) as e:
-                                logger.warning(f"Error parsing candle: {e}")
-                                continue
-                    else:
-                        logger.error(f"HTTP {response.status} - Using limit=500 instead")
-                        
+            logger.info(f"Fetching {symbol} {timeframe} historical data (depth {depth})...")
+            async for arrays in self.rest.iter_history(symbol, timeframe, depth, since=history_since):
+                total += len(arrays["time"])
+                self._dispatch(arrays, callback, batch_callback)
+                self._mark(key, int(arrays["time"][-1]))
+            logger.info(f"✅ Total loaded: {total} candles")
         except Exception as e:
             logger.error(f"Error fetching historical candles: {e}")
     
     async def connect(self):
         """Établit la connexion WebSocket et subscribe au channel"""
         try:
+            await self.close_socket()
             logger.info(f"Connecting to {self.WS_URL}...")
             self.ws = await websockets.connect(self.WS_URL)
+            self.connected = True
             logger.info("WebSocket connected!")
             
-            # Subscribe to candle channel
-            await self.subscribe()
+            # (Ré)abonner tous les channels de la connexion
+            await self._send_op("subscribe", list(self.subscriptions))
             
             return True
         except Exception as e:
             logger.error(f"Connection failed: {e}")
             return False
     
-    async def subscribe(self):
-        """Subscribe au channel candlestick"""
-        channel = self.TIMEFRAME_MAPPING.get(self.timeframe)
-        if not channel:
-            raise ValueError(f"Unsupported timeframe: {self.timeframe}")
-        
-        subscribe_msg = {
-            "op": "subscribe",
-            "args": [
-                {
-                    "instType": "USDT-FUTURES",
-                    "channel": channel,
-                    "instId": self.symbol
-                }
-            ]
-        }
+    async def close_socket(self):
+        """Ferme la connexion courante (s'il y en a une)"""
+        self.connected = False
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception as e:
+                logger.debug(f"Error closing WebSocket: {e}")
+    
+    async def subscribe(self, symbol: Optional[str] = None, timeframe: Optional[str] = None,
+                        callback: Optional[Callable] = None,
+                        batch_callback: Optional[Callable] = None):
+        """
+        Ajoute un abonnement candlestick (envoyé immédiatement si la connexion est ouverte,
+        sinon à la prochaine connexion)
         
-        logger.info(f"Subscribing to {channel} for {self.symbol}")
-        await self.ws.send(json.dumps(subscribe_msg))
+        Args:
+            symbol: instId (défaut: symbole du client)
+            timeframe: Timeframe (défaut: timeframe du client)
+            callback: Callback des bougies de cet abonnement (défaut: on_message)
+            batch_callback: Callback recevant en un appel les colonnes {field: np.ndarray}
+                des snapshots et des frames d'au moins BATCH_PARSE_MIN_ROWS lignes
+        """
+        key = (symbol or self.symbol, self._channel(timeframe or self.timeframe))
+        self._set_callbacks(key, callback or self.on_message, batch_callback)
+        if self.connected:
+            await self._send_op("subscribe", [key])
+    
+    async def unsubscribe(self, symbol: str, timeframe: str):
+        """Retire un abonnement candlestick"""
+        key = (symbol, self._channel(timeframe))
+        if key not in self.subscriptions:
+            return
+        del self.subscriptions[key]
+        self.batch_callbacks.pop(key, None)
+        self.last_candle_times.pop(key, None)
+        if self.connected:
+            await self._send_op("unsubscribe", [key])
+    
+    async def subscribe_trades(self, symbol: str, callback: Callable,
+                               on_gap: Optional[Callable] = None):
+        """
+        Ajoute un abonnement au flux public des trades d'un symbole
+
+        Args:
+            callback: Appelé une fois par message avec les colonnes de parse_trades
+                ({ts, price, size, is_buy}, triées par temps, sans les trades déjà reçus)
+            on_gap: Appelé avec le ts (ms) du dernier trade livré quand des trades ont pu
+                être manqués après lui (snapshot de reconnexion sans recouvrement,
+                désabonnement), dans l'ordre des livraisons de callback
+        """
+        key = (symbol, TRADE_CHANNEL)
+        self.subscriptions[key] = callback
+        if on_gap is not None:
+            self.trade_gap_callbacks[key] = on_gap
+        if self.connected:
+            await self._send_op("subscribe", [key])
+
+    async def unsubscribe_trades(self, symbol: str):
+        """Retire un abonnement trades"""
+        key = (symbol, TRADE_CHANNEL)
+        if self.subscriptions.pop(key, None) is None:
+            return
+        last_ts = self.last_trade_ts.pop(key, None)
+        on_gap = self.trade_gap_callbacks.pop(key, None)
+        if on_gap is not None and last_ts is not None:
+            self._emit(on_gap, last_ts, kind="trades")
+        if self.connected:
+            await self._send_op("unsubscribe", [key])
+    
+    async def subscribe_book(self, symbol: str, callback: Optional[Callable] = None,
+                             channel: str = BOOK_CHANNEL, book: Optional[OrderBook] = None) -> OrderBook:
+        """
+        Ajoute un abonnement au carnet d'ordres d'un symbole
+
+        Args:
+            callback: Appelé avec l'OrderBook après chaque message appliqué
+            channel: books (incrémental, checksum) ou books1/5/15 (snapshots)
+            book: Carnet à alimenter (défaut: un nouvel OrderBook)
+
+        Returns:
+            Le carnet tenu à jour par la connexion
+        """
+        if channel not in BOOK_CHANNELS:
+            raise ValueError(f"Unsupported book channel: {channel}")
+        key = (symbol, channel)
+        book = book or self.books.get(key) or OrderBook(symbol)
+        self.books[key] = book
+        self.subscriptions[key] = callback
+        if self.connected:
+            await self._send_op("subscribe", [key])
+        return book
+
+    async def unsubscribe_book(self, symbol: str, channel: str = BOOK_CHANNEL):
+        """Retire un abonnement carnet"""
+        key = (symbol, channel)
+        if key not in self.subscriptions:
+            return
+        del self.subscriptions[key]
+        self.books.pop(key, None)
+        self._book_resyncs.discard(key)
+        if self.connected:
+            await self._send_op("unsubscribe", [key])
+
+    async def _resync_book(self, key: Tuple[str, str]):
+        """
+        Redemande un snapshot du carnet (unsubscribe puis subscribe)
+
+        La clé reste dans _book_resyncs jusqu'à ce que le snapshot soit appliqué
+        (_handle_book): les deltas de l'ancien abonnement encore en file sont ignorés au
+        lieu de relancer une resynchronisation chacun.
+        """
+        try:
+            if self.connected and key in self.subscriptions:
+                logger.info(f"🔁 Resyncing order book {key[0]} {key[1]}")
+                await self._send_op("unsubscribe", [key])
+                await self._send_op("subscribe", [key])
+                return
+        except Exception as e:
+            logger.error(f"Order book resync failed for {key}: {e}")
+        self._book_resyncs.discard(key)
+    
+    async def _send_op(self, op: str, keys: List[Tuple[str, str]]):
+        """Envoie un subscribe/unsubscribe groupé pour plusieurs (instId, channel)"""
+        for start in range(0, len(keys), self.SUBSCRIBE_BATCH_SIZE):
+            batch = keys[start:start + self.SUBSCRIBE_BATCH_SIZE]
+            message = {
+                "op": op,
+                "args": [
+                    {
+                        "instType": "USDT-FUTURES",
+                        "channel": channel,
+                        "instId": inst_id
+                    }
+                    for inst_id, channel in batch
+                ]
+            }
+            logger.info(f"{op.capitalize()} {len(batch)} channel(s): {batch}")
+            await self.ws.send(json.dumps(message))
     
     async def handle_message(self, message: str):
         """Parse et traite les messages reçus"""
         try:
-            data = json.loads(message)
+            # Réponse au ping: pas la peine de décoder
+            if message == "pong":
+                return
+            
+            data = json_loads(message)
             
             # Gestion des messages de type "pong"
             if data.get("event") == "pong":
@@ -173,8 +413,12 @@ class BitgetWebSocketClient:
                 return
             
             # Gestion de la confirmation de subscription
-            if data.get("event") == "subscribe":
-                logger.info(f"Successfully subscribed: {data}")
+            if data.get("event") in ("subscribe", "unsubscribe"):
+                logger.info(f"Successfully {data['event']}d: {data.get('arg')}")
+                return
+            
+            if data.get("event") == "error":
+                logger.error(f"Subscription error: {data}")
                 return
             
             # Gestion des données de bougies
@@ -185,24 +429,169 @@ class BitgetWebSocketClient:
                 if not candles_data:
                     return
                 
+                # Routage vers l'abonnement (instId, channel) du message
+                key = (arg.get("instId"), arg.get("channel"))
+                if key not in self.subscriptions:
+                    return  # Message d'un abonnement retiré entre-temps
+                callback = self.subscriptions[key]
+                if key[1] == TRADE_CHANNEL:
+                    self._handle_trades(key, candles_data, callback, data["action"] == "snapshot")
+                    return
+                if key[1] in BOOK_CHANNELS:
+                    # Les deltas s'appliquent dans l'ordre: ni coalescés ni appliqués par la réception
+                    self._emit(partial(self._handle_book, key, callback, data["action"] == "snapshot"),
+                               candles_data, kind="book")
+                    return
+                # Snapshot ou grande frame: conversion en colonnes et un seul appel (upsert en bloc)
+                batch_callback = self.batch_callbacks.get(key)
+                if batch_callback is not None and (len(candles_data) >= self.BATCH_PARSE_MIN_ROWS
+                                                   or data["action"] == "snapshot"):
+                    arrays = self.parse_candle_arrays(candles_data)
+                    if len(arrays["time"]):
+                        self._emit(batch_callback, arrays, kind="batch")
+                        self._mark(key, int(arrays["time"].max()))
+                    return
+                
                 # Bitget renvoie les données sous forme: [timestamp, open, high, low, close, volume, ...]
-                for candle_raw in candles_data:
-                    candle = self.parse_candle(candle_raw)
-                    if candle:
-                        # Ajouter au buffer
-                        self.candles_buffer.append(candle)
-                        
-                        # Callback si défini
-                        if self.on_message:
-                            self.on_message(candle)
-                        
-                        logger.debug(f"New candle: {candle}")
+                for candle in self.parse_candles(candles_data):
+                    # Callback si défini (updates d'une même bougie coalescées dans la file)
+                    if callback:
+                        self._emit(callback, candle, (key, candle["time"]), kind="candle")
+                    self._mark(key, candle["time"])
         
         except json.JSONDecodeError:
             logger.error(f"Failed to parse message: {message}")
         except Exception as e:
             logger.error(f"Error handling message: {e}")
     
+    def _handle_trades(self, key: Tuple[str, str], rows: List[Dict], callback: Optional[Callable],
+                       snapshot: bool):
+        """
+        Transmet les trades d'un message en colonnes, sans ceux déjà livrés (snapshot après
+        reconnexion); un snapshot qui ne recouvre pas le dernier trade livré signale un trou
+        """
+        trades = parse_trades(rows)
+        ts = trades["ts"]
+        last_ts = self.last_trade_ts.get(key)
+        if snapshot and last_ts is not None:
+            if ts[0] <= last_ts:
+                fresh = ts > last_ts
+                trades = {field: arr[fresh] for field, arr in trades.items()}
+                ts = trades["ts"]
+            elif key in self.trade_gap_callbacks:
+                self._emit(self.trade_gap_callbacks[key], last_ts, kind="trades")
+        if not len(ts):
+            return
+        self.last_trade_ts[key] = int(ts[-1])
+        if callback:
+            self._emit(callback, trades, kind="trades")
+    
+    def _handle_book(self, key: Tuple[str, str], callback: Optional[Callable], snapshot: bool,
+                     rows: List[Dict]):
+        """Applique un message carnet; carnet désynchronisé: un nouveau snapshot est demandé"""
+        book = self.books.get(key)
+        if book is None:
+            return
+        snapshot = snapshot or key[1] != BOOK_CHANNEL
+        if not snapshot and key in self._book_resyncs:
+            return  # Delta antérieur au snapshot demandé: le carnet l'attend
+        in_sync = True
+        for data in rows:
+            in_sync = book.apply_snapshot(data) if snapshot else book.apply_update(data)
+        if snapshot:
+            self._book_resyncs.discard(key)
+        if not in_sync:
+            if key not in self._book_resyncs and self.connected:
+                self._book_resyncs.add(key)
+                asyncio.ensure_future(self._resync_book(key))
+            return
+        if callback:
+            callback(book)
+    
+    def _emit(self, callback: Callable, payload, coalesce_key=None, kind: str = "candle"):
+        """Livre payload au callback: via la file pendant run(), directement sinon"""
+        if self.handoff is not None and self.handoff.running:
+            self.handoff.put(callback, payload, coalesce_key, kind)
+        else:
+            callback(payload)
+    
+    def _mark(self, key: Tuple[str, str], candle_time: int):
+        if candle_time > self.last_candle_times.get(key, candle_time - 1):
+            self.last_candle_times[key] = candle_time
+    
+    async def backfill_gaps(self):
+        """
+        Comble les bougies manquées pendant une déconnexion
+        
+        Pour chaque abonnement dont la dernière bougie reçue est close depuis (bougie
+        suivante commencée), la plage [dernière bougie, maintenant] est rechargée via REST
+        (pages en parallèle, débit limité) et livrée dans l'ordre avant la reprise du flux
+        temps réel. La dernière bougie est rechargée aussi: elle était encore ouverte.
+        Après une longue coupure, la plage est limitée aux history_depth dernières bougies.
+        Seuls les abonnements actifs sont comblés (pas l'historique seul, ex. timeframes
+        dérivés, ni les abonnements retirés).
+        """
+        now = int(time.time())
+        gaps = []
+        for key in self.subscriptions:
+            last_time = self.last_candle_times.get(key)
+            timeframe = self.CHANNEL_TIMEFRAMES.get(key[1])
+            if last_time is None or timeframe not in GRANULARITY_SECONDS:
+                continue
+            seconds = GRANULARITY_SECONDS[timeframe]
+            if now >= last_time + seconds:
+                last_time = max(last_time, (now // seconds - self.history_depth + 1) * seconds)
+                gaps.append((key, timeframe, last_time))
+        if not gaps:
+            return
+        
+        results = await asyncio.gather(
+            *(self.rest.fetch_range(key[0], timeframe, last_time, now) for key, timeframe, last_time in gaps),
+            return_exceptions=True
+        )
+        
+        for (key, timeframe, last_time), arrays in zip(gaps, results):
+            if isinstance(arrays, Exception):
+                logger.error(f"Backfill failed for {key}: {arrays}")
+                continue
+            if key not in self.subscriptions or not len(arrays["time"]):
+                continue
+            logger.info(f"🩹 Backfilled {len(arrays['time'])} candles for {key[0]} {timeframe} "
+                        f"since {last_time}")
+            self.deliver(key, arrays)
+    
+    def deliver(self, key: Tuple[str, str], arrays: Dict[str, np.ndarray]):
+        """Transmet des bougies triées (colonnes) aux callbacks d'un abonnement"""
+        self._dispatch(arrays, self.subscriptions.get(key), self.batch_callbacks.get(key))
+        self._mark(key, int(arrays["time"][-1]))
+    
+    def _dispatch(self, arrays: Dict[str, np.ndarray], callback: Optional[Callable],
+                  batch_callback: Optional[Callable]):
+        """Appelle le callback de lot (déjà en colonnes: dès 2 bougies) ou le callback bougie par bougie"""
+        if batch_callback is not None and len(arrays["time"]) > 1:
+            self._emit(batch_callback, arrays, kind="batch")
+            return
+        if callback:
+            for candle in arrays_to_candles(arrays):
+                self._emit(callback, candle)
+    
+    def parse_candles(self, rows: List[List]) -> List[Dict]:
+        """Convertit toutes les lignes d'une frame en bougies (lignes invalides ignorées)"""
+        candles = []
+        for raw_data in rows:
+            candle = self.parse_candle(raw_data)
+            if candle:
+                candles.append(candle)
+        return candles
+    
+    def parse_candle_arrays(self, rows: List[List]) -> Dict:
+        """Convertit toutes les lignes d'une frame en colonnes NumPy"""
+        try:
+            return parse_candle_rows(rows)
+        except (ValueError, TypeError):
+            # Lignes incomplètes ou invalides: repli ligne par ligne
+            return candles_to_arrays(self.parse_candles(rows))
+    
     def parse_candle(self, raw_data: List) -> Optional[Dict]:
         """
         Convertit les données brutes Bitget en format lightweight-charts
@@ -213,15 +602,15 @@ class BitgetWebSocketClient:
             if len(raw_data) < 6:
                 return None
             
-            timestamp = int(raw_data[0]) // 1000  # Convertir ms en secondes
+            timestamp, open_, high, low, close, volume = raw_data[:6]
             
             candle = {
-                "time": timestamp,
-                "open": float(raw_data[1]),
-                "high": float(raw_data[2]),
-                "low": float(raw_data[3]),
-                "close": float(raw_data[4]),
-                "volume": float(raw_data[5])
+                "time": int(timestamp) // 1000,  # Convertir ms en secondes
+                "open": float(open_),
+                "high": float(high),
+                "low": float(low),
+                "close": float(close),
+                "volume": float(volume)
             }
             
             return candle
@@ -240,13 +629,39 @@ class BitgetWebSocketClient:
             logger.error(f"Failed to send ping: {e}")
     
     async def run(self):
-        """Boucle principale du WebSocket avec reconnexion automatique"""
+        """
+        Boucle principale du WebSocket avec reconnexion automatique
+        Se termine (socket fermée) après stop() ou annulation de la tâche
+        """
         self.running = True
-        
-        # ÉTAPE 1: Charger l'historique via REST API
-        logger.info("🔄 Loading historical data...")
-        await self.fetch_historical_candles()
-        logger.info("✅ Historical data loaded, starting real-time updates...")
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        if self.record_path and self.recorder is None:
+            self.recorder = FrameRecorder(self.record_path)
+        if self.handoff is not None:
+            self.handoff.start()
+        try:
+            await self._run()
+        except asyncio.CancelledError:
+            logger.info("WebSocket client cancelled")
+        finally:
+            self.running = False
+            self._task = None
+            if self.handoff is not None:
+                # Livrer ce qui a été reçu avant l'arrêt
+                await self.handoff.stop(drain=True)
+            await self.close_socket()
+            await self.rest.close()
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+    
+    async def _run(self):
+        # ÉTAPE 1: Charger l'historique via REST API (abonnement initial)
+        if self.timeframe is not None:
+            logger.info("🔄 Loading historical data...")
+            await self.fetch_historical_candles()
+            logger.info("✅ Historical data loaded, starting real-time updates...")
         
         # ÉTAPE 2: WebSocket pour les updates temps réel
         while self.running:
@@ -258,6 +673,9 @@ class BitgetWebSocketClient:
                     await asyncio.sleep(self.reconnect_delay)
                     continue
                 
+                # Combler les bougies manquées pendant la coupure avant de reprendre le flux
+                await self.backfill_gaps()
+                
                 # Boucle de réception
                 while self.running:
                     try:
@@ -270,7 +688,11 @@ class BitgetWebSocketClient:
                             self.ws.recv(), 
                             timeout=self.ping_interval + 10
                         )
+                        if self.recorder is not None:
+                            self.recorder.write(message)
                         await self.handle_message(message)
+                        if self.handoff is not None:
+                            await self.handoff.wait_space()
                     
                     except asyncio.TimeoutError:
                         logger.warning("No message received, sending ping...")
@@ -278,24 +700,47 @@ class BitgetWebSocketClient:
                     
                     except websockets.exceptions.ConnectionClosed:
                         logger.warning("Connection closed, reconnecting...")
+                        self.connected = False
                         break
             
             except Exception as e:
                 logger.error(f"Unexpected error: {e}")
+            await self.close_socket()
             
             # Attendre avant de reconnecter
             if self.running:
                 logger.info(f"Reconnecting in {self.reconnect_delay}s...")
                 await asyncio.sleep(self.reconnect_delay)
     
+    async def replay(self, path: str, speed: Optional[float] = 1.0) -> Dict[str, float]:
+        """
+        Rejoue un enregistrement (record_path) dans handle_message, sans réseau
+        
+        Args:
+            speed: 1.0 temps réel, N pour N fois plus vite, None le plus vite possible
+        
+        Returns:
+            {frames, seconds, frames_per_sec}
+        """
+        return await FeedReplay(path, speed).run(self)
+    
     def stop(self):
-        """Arrête le client WebSocket"""
+        """
+        Arrête le client WebSocket (thread-safe)
+        La tâche de run() est annulée: l'attente en cours (recv, reconnexion,
+        historique REST) est interrompue et la socket fermée.
+        """
         logger.info("Stopping WebSocket client...")
         self.running = False
+        loop, task = self._loop, self._task
+        if task is not None and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
     
     def get_candles(self) -> List[Dict]:
-        """Retourne toutes les bougies du buffer"""
-        return list(self.candles_buffer)
+        """Bougies de l'abonnement initial gardées par le sink (aucune sans sink)"""
+        if self.sink is None or self.timeframe is None:
+            return []
+        return self.sink.get_candles(self.timeframe, self.symbol)
 
 
 # Fonction de test
@@ -0,0 +1,698 @@
+import zlib
+import pandas as pd
+import numpy as np
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Dict, List, Optional
+from collections import deque
+
+# Champs d'une bougie et leur type de stockage
+CANDLE_FIELDS = ("time", "open", "high", "low", "close", "volume")
+FIELD_DTYPES = {
+    "time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+
+# Résultats d'un upsert
+APPENDED = "appended"          # Nouvelle bougie la plus récente
+UPDATED_LAST = "updated_last"  # Mise à jour de la bougie live (même timestamp que la dernière)
+MERGED = "merged"              # Doublon d'une bougie plus ancienne, remplacée
+INSERTED = "inserted"          # Bougie hors ordre insérée à sa place
+DROPPED = "dropped"            # Plus ancienne que la fenêtre conservée (buffer plein)
+UPSERT_RESULTS = (APPENDED, UPDATED_LAST, MERGED, INSERTED, DROPPED)
+
+
+def candles_to_arrays(candles: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convertit une liste de bougies (dicts) en colonnes NumPy"""
+    n = len(candles)
+    return {
+        field: np.fromiter(
+            (c.get(field, 0) for c in candles) if field == "volume" else (c[field] for c in candles),
+            dtype=FIELD_DTYPES[field],
+            count=n,
+        )
+        for field in CANDLE_FIELDS
+    }
+
+
+def arrays_to_candles(arrays: Dict[str, np.ndarray]) -> List[Dict]:
+    """Convertit des colonnes NumPy en liste de bougies (dicts, types Python natifs)"""
+    fields = [field for field in CANDLE_FIELDS if field in arrays]
+    columns = [arrays[field].tolist() for field in fields]
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+class DequeCandleBuffer:
+    """
+    Stockage historique: deque de dicts (une bougie = un dict)
+    Conservé comme mode "deque" du DataManager et comme référence pour les benchmarks
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._candles = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    def upsert(self, candle: Dict) -> str:
+        """
+        Insère une bougie à sa place (recherche binaire sur le temps)
+        Une bougie de même timestamp remplace l'existante
+
+        Returns:
+            Un des UPSERT_RESULTS
+        """
+        candles = self._candles
+        candle_time = candle["time"]
+        if not candles or candle_time > candles[-1]["time"]:
+            candles.append(candle)
+            return APPENDED
+        if candle_time == candles[-1]["time"]:
+            candles[-1] = candle
+            return UPDATED_LAST
+
+        pos = bisect_left(candles, candle_time, key=lambda c: c["time"])
+        if candles[pos]["time"] == candle_time:
+            candles[pos] = candle
+            return MERGED
+        if len(candles) == self.capacity:
+            if pos == 0:
+                return DROPPED
+            candles.popleft()
+            pos -= 1
+        candles.insert(pos, candle)
+        return INSERTED
+
+    def last_time(self) -> Optional[int]:
+        return self._candles[-1]["time"] if self._candles else None
+
+    def first_time(self, include_cold: bool = False) -> Optional[int]:
+        return self._candles[0]["time"] if self._candles else None
+
+    def extend(self, candles: List[Dict]):
+        """Ajoute des bougies triées, toutes plus récentes que la dernière"""
+        for candle in candles:
+            self._candles.append(candle)
+
+    def extend_arrays(self, arrays: Dict[str, np.ndarray]):
+        self.extend(arrays_to_candles(arrays))
+
+    def merge_arrays(self, arrays: Dict[str, np.ndarray]) -> Dict[str, int]:
+        """Upsert d'un lot qui chevauche le buffer, bougie par bougie (mode de référence)"""
+        counts = dict.fromkeys(UPSERT_RESULTS, 0)
+        for candle in arrays_to_candles(arrays):
+            counts[self.upsert(candle)] += 1
+        return counts
+
+    def prepend_arrays(self, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        Ajoute des bougies triées, toutes plus anciennes que la première du buffer
+        Seules celles qui tiennent dans la capacité restante sont gardées
+
+        Returns:
+            Nombre de bougies gardées
+        """
+        free = self.capacity - len(self._candles)
+        if free <= 0:
+            return 0
+        candles = arrays_to_candles({field: arr[-free:] for field, arr in arrays.items()})
+        self._candles.extendleft(reversed(candles))
+        return len(candles)
+
+    def last(self) -> Optional[Dict]:
+        if not self._candles:
+            return None
+        return self._candles[-1]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Construit les colonnes NumPy depuis les dicts (copie)"""
+        return candles_to_arrays(list(self._candles))
+
+    def time_range(self, start_time: Optional[int] = None, end_time: Optional[int] = None,
+                   include_cold: bool = False) -> Dict[str, np.ndarray]:
+        """Colonnes des bougies avec start_time <= time <= end_time (copie de la fenêtre seulement)"""
+        candles = self._candles
+        key = lambda c: c["time"]
+        lo = 0 if start_time is None else bisect_left(candles, start_time, key=key)
+        hi = len(candles) if end_time is None else bisect_right(candles, end_time, key=key)
+        return candles_to_arrays(list(islice(candles, lo, max(lo, hi))))
+
+    def tail(self, n: int, include_cold: bool = False) -> Dict[str, np.ndarray]:
+        """Colonnes des `n` bougies les plus récentes (copie de la fenêtre seulement)"""
+        return candles_to_arrays(list(islice(self._candles, max(0, len(self._candles) - n), None)))
+
+    def to_list(self) -> List[Dict]:
+        return list(self._candles)
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self._candles:
+            return pd.DataFrame(columns=list(CANDLE_FIELDS))
+
+        return pd.DataFrame(list(self._candles))
+
+    def clear(self):
+        self._candles.clear()
+
+
+class ColdCandleHistory:
+    """
+    Historique froid compressé: les bougies éjectées du ring buffer chaud
+
+    Les bougies sont regroupées par chunks de `chunk_size`, chaque chunk est encodé
+    colonne par colonne puis compressé (zlib):
+    - time: deltas entiers (quasi constants → se compressent presque entièrement)
+    - prix: deltas de ticks entiers si `price_tick` est fourni (exact pour des prix
+      sur le tick), sinon float32
+    - volume: float32
+    Le chunk en cours de remplissage reste non compressé. Quand la mémoire dépasse
+    `max_bytes`, les chunks les plus anciens sont supprimés.
+    """
+
+    PRICE_FIELDS = ("open", "high", "low", "close")
+
+    def __init__(self, max_bytes: int, chunk_size: int = 4096, price_tick: Optional[float] = None):
+        """
+        Args:
+            max_bytes: Budget mémoire de l'historique froid (chunks + chunk en cours)
+            chunk_size: Nombre de bougies par chunk compressé
+            price_tick: Pas de prix pour la quantification exacte, None pour float32
+        """
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.price_tick = price_tick
+        # Nombre de décimales du tick, pour retrouver exactement les prix au décodage
+        self._tick_decimals = max(0, -int(np.floor(np.log10(price_tick)))) + 2 if price_tick else 0
+        # Chunks compressés: deque de (count, first_time, last_time, {field: bytes}, nbytes)
+        self._chunks = deque()
+        self._chunk_bytes = 0
+        self._staging = {field: np.zeros(chunk_size, dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+        self._staged = 0
+        self._count = 0
+        self.evicted = 0  # Bougies supprimées pour respecter le budget
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire utilisée: chunks compressés + chunk en cours (non compressé)"""
+        return self._chunk_bytes + sum(arr.nbytes for arr in self._staging.values())
+
+    def append(self, arrays: Dict[str, np.ndarray]):
+        """Ajoute des bougies triées, plus récentes que celles déjà présentes"""
+        n = len(arrays["time"])
+        offset = 0
+        while offset < n:
+            take = min(n - offset, self.chunk_size - self._staged)
+            for field, arr in self._staging.items():
+                arr[self._staged:self._staged + take] = arrays[field][offset:offset + take]
+            self._staged += take
+            self._count += take
+            offset += take
+            if self._staged == self.chunk_size:
+                self._flush()
+
+    def _flush(self):
+        """Compresse le chunk en cours et applique le budget mémoire"""
+        times = self._staging["time"]
+        chunk = self._encode({field: arr[:self._staged] for field, arr in self._staging.items()})
+        size = sum(len(payload) for payload in chunk.values())
+        self._chunks.append((self._staged, int(times[0]), int(times[self._staged - 1]), chunk, size))
+        self._chunk_bytes += size
+        self._staged = 0
+        self._trim()
+
+    def prepend(self, arrays: Dict[str, np.ndarray]):
+        """
+        Ajoute des bougies triées, plus anciennes que celles déjà présentes (historique
+        chargé à rebours): encodées en chunks placés en tête, sans décoder l'existant
+        """
+        times = arrays["time"]
+        end = len(times)
+        while end > 0:
+            start = max(0, end - self.chunk_size)
+            chunk = self._encode({field: arrays[field][start:end] for field in CANDLE_FIELDS})
+            size = sum(len(payload) for payload in chunk.values())
+            self._chunks.appendleft((end - start, int(times[start]), int(times[end - 1]), chunk, size))
+            self._chunk_bytes += size
+            self._count += end - start
+            end = start
+        self._trim()
+
+    def _trim(self):
+        """Supprime les chunks les plus anciens au-delà du budget mémoire"""
+        while self._chunks and self.nbytes > self.max_bytes:
+            count, _, _, _, size = self._chunks.popleft()
+            self._chunk_bytes -= size
+            self._count -= count
+            self.evicted += count
+
+    def _encode(self, arrays: Dict[str, np.ndarray]) -> Dict[str, bytes]:
+        times = arrays["time"]
+        chunk = {"time": zlib.compress(np.diff(times, prepend=0).astype(np.int64).tobytes())}
+        for field in self.PRICE_FIELDS:
+            if self.price_tick:
+                ticks = np.round(arrays[field] / self.price_tick).astype(np.int64)
+                chunk[field] = zlib.compress(np.diff(ticks, prepend=0).tobytes())
+            else:
+                chunk[field] = zlib.compress(arrays[field].astype(np.float32).tobytes())
+        chunk["volume"] = zlib.compress(arrays["volume"].astype(np.float32).tobytes())
+        return chunk
+
+    def _decode(self, chunk: Dict[str, bytes]) -> Dict[str, np.ndarray]:
+        arrays = {"time": np.cumsum(np.frombuffer(zlib.decompress(chunk["time"]), dtype=np.int64))}
+        for field in self.PRICE_FIELDS:
+            if self.price_tick:
+                ticks = np.cumsum(np.frombuffer(zlib.decompress(chunk[field]), dtype=np.int64))
+                arrays[field] = np.round(ticks * self.price_tick, self._tick_decimals)
+            else:
+                arrays[field] = np.frombuffer(zlib.decompress(chunk[field]), dtype=np.float32).astype(np.float64)
+        arrays["volume"] = np.frombuffer(zlib.decompress(chunk["volume"]), dtype=np.float32).astype(np.float64)
+        return arrays
+
+    def first_time(self) -> Optional[int]:
+        if self._chunks:
+            return self._chunks[0][1]
+        if self._staged:
+            return int(self._staging["time"][0])
+        return None
+
+    def last_time(self) -> Optional[int]:
+        if self._staged:
+            return int(self._staging["time"][self._staged - 1])
+        if self._chunks:
+            return self._chunks[-1][2]
+        return None
+
+    def arrays(self, start_time: Optional[int] = None, end_time: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Décompresse l'historique froid
+
+        Args:
+            start_time: Si spécifié, ignore les bougies antérieures (et ne décode pas leurs chunks)
+            end_time: Si spécifié, ignore les bougies postérieures
+        """
+        parts = []
+        for _, first_time, last_time, chunk, _ in self._chunks:
+            if start_time is not None and last_time < start_time:
+                continue
+            if end_time is not None and first_time > end_time:
+                break
+            parts.append(self._decode(chunk))
+        parts.append({field: arr[:self._staged].copy() for field, arr in self._staging.items()})
+
+        arrays = {field: np.concatenate([part[field] for part in parts]) for field in CANDLE_FIELDS}
+        times = arrays["time"]
+        lo = 0 if start_time is None else int(np.searchsorted(times, start_time, side="left"))
+        hi = len(times) if end_time is None else int(np.searchsorted(times, end_time, side="right"))
+        if lo > 0 or hi < len(times):
+            arrays = {field: arr[lo:max(lo, hi)] for field, arr in arrays.items()}
+        return arrays
+
+    def tail(self, n: int) -> Dict[str, np.ndarray]:
+        """Décompresse uniquement les chunks nécessaires aux `n` bougies les plus récentes"""
+        needed = n - self._staged
+        parts = []
+        for count, _, _, chunk, _ in reversed(self._chunks):
+            if needed <= 0:
+                break
+            parts.append(self._decode(chunk))
+            needed -= count
+        parts.reverse()
+        parts.append({field: arr[:self._staged].copy() for field, arr in self._staging.items()})
+
+        arrays = {field: np.concatenate([part[field] for part in parts]) for field in CANDLE_FIELDS}
+        if len(arrays["time"]) > n:
+            arrays = {field: arr[len(arr) - n:] for field, arr in arrays.items()}
+        return arrays
+
+    def clear(self):
+        self._chunks.clear()
+        self._chunk_bytes = 0
+        self._staged = 0
+        self._count = 0
+        self.evicted = 0
+
+
+class CandleRingBuffer:
+    """
+    Stockage colonne: un tableau NumPy préalloué par champ (time/open/high/low/close/volume)
+
+    Les tableaux font 2 x capacity. La fenêtre valide est [start, end) et reste
+    toujours contiguë: quand `end` atteint la fin du tableau, on recopie la fenêtre
+    au début (coût amorti O(1) par bougie). Les lectures sont donc de simples slices.
+
+    Avec `cold`, les bougies éjectées de la fenêtre ne sont pas perdues mais
+    versées dans l'historique froid compressé.
+    """
+
+    def __init__(self, capacity: int, cold: Optional[ColdCandleHistory] = None):
+        """
+        Args:
+            capacity: Nombre maximum de bougies conservées (fenêtre chaude)
+            cold: Historique froid recevant les bougies éjectées, None pour les perdre
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity must be > 0, got {capacity}")
+        self.capacity = capacity
+        self._arrays: Dict[str, np.ndarray] = {
+            field: np.zeros(2 * capacity, dtype=FIELD_DTYPES[field])
+            for field in CANDLE_FIELDS
+        }
+        self._start = 0  # Head pointer: plus ancienne bougie
+        self._end = 0    # Position après la bougie la plus récente
+        self.cold = cold
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _evict(self, count: int):
+        """Avance le head pointer de `count` bougies (versées dans l'historique froid)"""
+        if self.cold is not None:
+            self.cold.append({field: arr[self._start:self._start + count] for field, arr in self._arrays.items()})
+        self._start += count
+
+    def _compact(self):
+        """Recopie la fenêtre valide au début des tableaux"""
+        n = len(self)
+        if self._start == 0:
+            return
+        for arr in self._arrays.values():
+            arr[:n] = arr[self._start:self._end]
+        self._start = 0
+        self._end = n
+
+    def _write_row(self, pos: int, candle: Dict):
+        arrays = self._arrays
+        arrays["time"][pos] = candle["time"]
+        arrays["open"][pos] = candle["open"]
+        arrays["high"][pos] = candle["high"]
+        arrays["low"][pos] = candle["low"]
+        arrays["close"][pos] = candle["close"]
+        arrays["volume"][pos] = candle.get("volume", 0)
+
+    def append(self, candle: Dict):
+        """Ajoute une bougie en fin de buffer (éjecte la plus ancienne si plein)"""
+        if self._end == 2 * self.capacity:
+            self._compact()
+        self._write_row(self._end, candle)
+        self._end += 1
+        if len(self) > self.capacity:
+            self._evict(1)
+
+    def upsert(self, candle: Dict) -> str:
+        """
+        Insère une bougie à sa place (np.searchsorted sur la colonne time)
+        Une bougie de même timestamp remplace l'existante
+
+        Returns:
+            Un des UPSERT_RESULTS
+        """
+        times = self._arrays["time"]
+        candle_time = candle["time"]
+        if self._end == self._start or candle_time > times[self._end - 1]:
+            self.append(candle)
+            return APPENDED
+        if candle_time == times[self._end - 1]:
+            self._write_row(self._end - 1, candle)
+            return UPDATED_LAST
+
+        pos = self._start + int(np.searchsorted(times[self._start:self._end], candle_time))
+        if times[pos] == candle_time:
+            self._write_row(pos, candle)
+            return MERGED
+        if len(self) == self.capacity and pos == self._start:
+            return DROPPED
+
+        # Décaler la fin d'une case pour libérer la position
+        if self._end == 2 * self.capacity:
+            offset = self._start
+            self._compact()
+            pos -= offset
+        for arr in self._arrays.values():
+            arr[pos + 1:self._end + 1] = arr[pos:self._end]
+        self._write_row(pos, candle)
+        self._end += 1
+        if len(self) > self.capacity:
+            self._evict(1)
+        return INSERTED
+
+    def last_time(self) -> Optional[int]:
+        if self._end == self._start:
+            return None
+        return int(self._arrays["time"][self._end - 1])
+
+    def first_time(self, include_cold: bool = False) -> Optional[int]:
+        """Première bougie de la fenêtre chaude (ou de l'historique froid si `include_cold`)"""
+        if include_cold and self.cold is not None and len(self.cold):
+            return self.cold.first_time()
+        if self._end == self._start:
+            return None
+        return int(self._arrays["time"][self._start])
+
+    def prepend_arrays(self, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        Ajoute des bougies triées, toutes plus anciennes que la première du buffer,
+        historique froid compris (historique chargé à rebours)
+
+        Les plus récentes complètent la fenêtre chaude si elle n'est pas pleine (et
+        l'historique froid vide), les autres sont ajoutées en tête de l'historique froid
+        (ColdCandleHistory.prepend, sans décoder l'existant). Sans historique froid,
+        seules celles qui tiennent dans la capacité restante sont gardées.
+
+        Returns:
+            Nombre de bougies gardées
+        """
+        n = len(arrays["time"])
+        free = 0 if self.cold is not None and len(self.cold) else self.capacity - len(self)
+        take = min(n, free)
+        if self.cold is None:
+            n = take
+        elif take < n:
+            self.cold.prepend({field: arrays[field][:n - take] for field in CANDLE_FIELDS})
+        if take:
+            window = self._views(self._start, self._end)
+            combined = {field: np.concatenate((arrays[field][len(arrays[field]) - take:], window[field]))
+                        for field in CANDLE_FIELDS}
+            self._start = self._end = 0
+            self.extend_arrays(combined)
+        return n
+
+    def merge_arrays(self, arrays: Dict[str, np.ndarray]) -> Dict[str, int]:
+        """
+        Upsert en bloc d'un lot trié et sans doublons qui chevauche la fenêtre
+
+        Les timestamps déjà présents sont réécrits en place (une affectation indexée par
+        champ), les nouveaux fusionnés avec la fenêtre en un tri. Si la fenêtre dépasse la
+        capacité, les plus anciennes bougies passent dans l'historique froid, nouvelles
+        comprises (sauf celles antérieures à sa dernière bougie); sans historique froid, les
+        nouvelles trop anciennes sont rejetées, comme avec upsert().
+
+        Returns:
+            {result: nombre} pour chacun des UPSERT_RESULTS
+        """
+        counts = dict.fromkeys(UPSERT_RESULTS, 0)
+        times = arrays["time"]
+        if self.cold is not None and len(self.cold) and times[0] <= self.cold.last_time():
+            return self._merge_with_cold(arrays)
+        lo, hi = self._start, self._end
+        window = self._arrays["time"][lo:hi]
+        pos = np.searchsorted(window, times)
+        found = pos < len(window)
+        found[found] = window[pos[found]] == times[found]
+
+        if found.any():
+            rows = lo + pos[found]
+            for field, arr in self._arrays.items():
+                arr[rows] = arrays[field][found] if field in arrays else 0
+            counts[UPDATED_LAST] = int((found & (pos == len(window) - 1)).any())
+            counts[MERGED] = int(found.sum()) - counts[UPDATED_LAST]
+
+        new = ~found
+        if not new.any():
+            return counts
+        appended = new & (times > window[-1]) if len(window) else new
+        n_appended = int(appended.sum())
+        n_inserted = int(new.sum()) - n_appended
+        if not n_inserted:
+            # Seulement des bougies plus récentes: ajout en fin, sans réécrire la fenêtre
+            self.extend_arrays({field: arr[appended] for field, arr in arrays.items()})
+            counts[APPENDED] = n_appended
+            return counts
+
+        combined = {field: np.concatenate((arr[lo:hi], arrays[field][new] if field in arrays
+                                           else np.zeros(int(new.sum()), dtype=arr.dtype)))
+                    for field, arr in self._arrays.items()}
+        order = np.argsort(combined["time"], kind="stable")
+        dropped = 0
+        excess = len(order) - self.capacity
+        if excess > 0:
+            evicted, order = order[:excess], order[excess:]
+            existing = evicted < len(window)
+            if self.cold is not None:
+                # Triées par temps: seules celles antérieures à l'historique froid sont perdues
+                cold_last = self.cold.last_time()
+                kept = np.ones(len(evicted), dtype=bool) if cold_last is None else combined["time"][evicted] > cold_last
+                self.cold.append({field: arr[evicted[kept]] for field, arr in combined.items()})
+                existing |= kept
+            dropped = int((~existing).sum())
+        for field, arr in self._arrays.items():
+            arr[:len(order)] = combined[field][order]
+        self._start, self._end = 0, len(order)
+
+        # Les nouvelles rejetées sont les plus anciennes: prises sur les insérées d'abord
+        counts[DROPPED] = dropped
+        counts[INSERTED] = n_inserted - min(dropped, n_inserted)
+        counts[APPENDED] = n_appended - max(0, dropped - n_inserted)
+        return counts
+
+    def _merge_with_cold(self, arrays: Dict[str, np.ndarray]) -> Dict[str, int]:
+        """
+        Upsert en bloc d'un lot qui chevauche l'historique froid (rare: backfill d'un trou
+        ancien): tri-fusion avec tout l'existant décompressé puis reconstruction du buffer
+        """
+        counts = dict.fromkeys(UPSERT_RESULTS, 0)
+        times = arrays["time"]
+        existing = self.arrays(include_cold=True)
+        old = existing["time"]
+        pos = np.searchsorted(old, times)
+        found = pos < len(old)
+        found[found] = old[pos[found]] == times[found]
+        keep = np.ones(len(old), dtype=bool)
+        keep[pos[found]] = False
+        combined = {field: np.concatenate((existing[field][keep], arrays[field])) for field in CANDLE_FIELDS}
+        order = np.argsort(combined["time"], kind="stable")
+
+        counts[UPDATED_LAST] = int((found & (pos == len(old) - 1)).any())
+        counts[MERGED] = int(found.sum()) - counts[UPDATED_LAST]
+        counts[APPENDED] = int((~found & (times > old[-1])).sum())
+        counts[INSERTED] = int((~found).sum()) - counts[APPENDED]
+        # Reconstruction interne: les évictions passées restent comptées
+        evicted = self.cold.evicted
+        self.clear()
+        self.cold.evicted = evicted
+        self.extend_arrays({field: arr[order] for field, arr in combined.items()})
+        return counts
+
+    def extend(self, candles: List[Dict]):
+        """Ajoute des bougies (dicts) triées, toutes plus récentes que la dernière"""
+        if candles:
+            self.extend_arrays(candles_to_arrays(candles))
+
+    def extend_arrays(self, arrays: Dict[str, np.ndarray]):
+        """
+        Ajoute plusieurs bougies fournies sous forme de colonnes
+        Les bougies doivent être triées et plus récentes que la dernière du buffer
+
+        Args:
+            arrays: {field: np.ndarray} de même longueur pour chaque champ
+        """
+        n = len(arrays["time"])
+        if n == 0:
+            return
+
+        if n >= self.capacity:
+            # Le lot remplace tout le buffer: on ne garde que la fin
+            self._evict(len(self))
+            if self.cold is not None and n > self.capacity:
+                self.cold.append({field: arrays[field][:n - self.capacity] for field in CANDLE_FIELDS})
+            for field, arr in self._arrays.items():
+                arr[:self.capacity] = arrays[field][n - self.capacity:] if field in arrays else 0
+            self._start = 0
+            self._end = self.capacity
+            return
+
+        if self._end + n > 2 * self.capacity:
+            self._compact()
+        for field, arr in self._arrays.items():
+            arr[self._end:self._end + n] = arrays[field] if field in arrays else 0
+        self._end += n
+        if len(self) > self.capacity:
+            self._evict(len(self) - self.capacity)
+
+    def arrays(self, include_cold: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Retourne des vues (lecture seule, sans copie) sur les colonnes valides
+
+        Attention: les vues reflètent les écritures suivantes du buffer,
+        les copier si elles doivent survivre à de nouvelles bougies.
+
+        Args:
+            include_cold: Préfixer avec l'historique froid décompressé (copie)
+        """
+        if include_cold and self.cold is not None and len(self.cold):
+            return self._with_cold(self.cold.arrays(), self._start, self._end)
+        return self._views(self._start, self._end)
+
+    def _views(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Vues en lecture seule sur les positions [lo, hi) des tableaux internes"""
+        views = {}
+        for field, arr in self._arrays.items():
+            view = arr[lo:hi]
+            view.flags.writeable = False
+            views[field] = view
+        return views
+
+    def _with_cold(self, cold: Dict[str, np.ndarray], lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Concatène des colonnes froides décompressées et les positions chaudes [lo, hi)"""
+        return {field: np.concatenate((cold[field], arr[lo:hi])) for field, arr in self._arrays.items()}
+
+    def time_range(self, start_time: Optional[int] = None, end_time: Optional[int] = None,
+                   include_cold: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Colonnes des bougies avec start_time <= time <= end_time (recherche binaire)
+
+        Retourne des vues sans copie, sauf si des bougies de l'historique froid
+        sont incluses (elles sont alors décompressées et concaténées).
+        """
+        times = self._arrays["time"][self._start:self._end]
+        lo = 0 if start_time is None else int(np.searchsorted(times, start_time, side="left"))
+        hi = len(times) if end_time is None else int(np.searchsorted(times, end_time, side="right"))
+        lo, hi = self._start + lo, self._start + max(lo, hi)
+
+        # La plage commence avant la fenêtre chaude: compléter depuis l'historique froid
+        if include_cold and self.cold is not None and len(self.cold) and lo == self._start:
+            cold = self.cold.arrays(start_time, end_time)
+            if len(cold["time"]):
+                return self._with_cold(cold, lo, hi)
+        return self._views(lo, hi)
+
+    def tail(self, n: int, include_cold: bool = False) -> Dict[str, np.ndarray]:
+        """Colonnes des `n` bougies les plus récentes (vues, sauf si l'historique froid est sollicité)"""
+        missing = n - len(self)
+        if include_cold and self.cold is not None and len(self.cold) and missing > 0:
+            return self._with_cold(self.cold.tail(missing), self._start, self._end)
+        return self._views(max(self._start, self._end - n), self._end)
+
+    def last(self) -> Optional[Dict]:
+        if self._end == self._start:
+            return None
+        pos = self._end - 1
+        return {field: arr[pos].item() for field, arr in self._arrays.items()}
+
+    def to_list(self) -> List[Dict]:
+        return arrays_to_candles(self.arrays())
+
+    def to_frame(self, include_cold: bool = False) -> pd.DataFrame:
+        """
+        Construit un DataFrame depuis les colonnes (une copie contiguë par colonne)
+        La copie découple le DataFrame des écritures suivantes du ring buffer
+        """
+        return pd.DataFrame(self.arrays(include_cold), copy=True)
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire préallouée de la fenêtre chaude"""
+        return sum(arr.nbytes for arr in self._arrays.values())
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+        if self.cold is not None:
+            self.cold.clear()
@@ -0,0 +1,175 @@
+import os
+import logging
+import threading
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from candle_buffer import CANDLE_FIELDS, FIELD_DTYPES
+
+logger = logging.getLogger(__name__)
+
+# Format d'un enregistrement sur disque (48 octets par bougie, little-endian)
+RECORD_DTYPE = np.dtype([(field, np.dtype(FIELD_DTYPES[field]).newbyteorder("<")) for field in CANDLE_FIELDS])
+
+# Répertoire par défaut du store (surchargeable par variable d'environnement)
+DEFAULT_STORE_DIR = os.environ.get("CANDLE_STORE_DIR", ".candle_store")
+
+
+class CandleStore:
+    """
+    Stockage persistant des bougies, un fichier append-only par (symbol, timeframe)
+
+    Chaque fichier est une suite d'enregistrements binaires RECORD_DTYPE triés par temps.
+    La lecture se fait par np.memmap: seules les pages réellement lues sont chargées.
+    Seules les bougies clôturées doivent être écrites (la bougie live change encore).
+    Thread-safe: caches et écritures sont protégés par un verrou (écritures depuis le
+    thread d'écriture du hub, lectures depuis les sessions). L'historique plus ancien que
+    la fin du fichier (chargé après coup) est inséré par réécriture complète du fichier:
+    rare, contrairement aux ajouts en fin.
+    """
+
+    def __init__(self, root_dir: str = DEFAULT_STORE_DIR):
+        """
+        Args:
+            root_dir: Répertoire racine du store
+        """
+        self.root_dir = root_dir
+        # Cache du dernier timestamp persisté: {(symbol, timeframe): time}
+        self._last_times: Dict[Tuple[str, str], Optional[int]] = {}
+        # Cache du premier timestamp persisté: {(symbol, timeframe): time}
+        self._first_times: Dict[Tuple[str, str], Optional[int]] = {}
+        self._lock = threading.RLock()
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root_dir, symbol, f"{timeframe}.bin")
+
+    def _open(self, symbol: str, timeframe: str) -> Optional[np.ndarray]:
+        """Ouvre le fichier en memmap lecture seule (None si absent ou vide)"""
+        path = self._path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        # Ignorer un éventuel enregistrement partiel (écriture interrompue)
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return None
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def last_time(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Retourne le timestamp de la dernière bougie persistée (None si aucune)"""
+        with self._lock:
+            key = (symbol, timeframe)
+            if key not in self._last_times:
+                records = self._open(symbol, timeframe)
+                self._last_times[key] = int(records["time"][-1]) if records is not None else None
+            return self._last_times[key]
+
+    def first_time(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Retourne le timestamp de la première bougie persistée (None si aucune)"""
+        with self._lock:
+            key = (symbol, timeframe)
+            if key not in self._first_times:
+                records = self._open(symbol, timeframe)
+                self._first_times[key] = int(records["time"][0]) if records is not None else None
+            return self._first_times[key]
+
+    def load(self, symbol: str, timeframe: str, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Charge les bougies persistées
+
+        Args:
+            limit: Si spécifié, ne charge que les `limit` bougies les plus récentes
+
+        Returns:
+            Colonnes {field: np.ndarray} (vides si rien n'est persisté)
+        """
+        with self._lock:
+            records = self._open(symbol, timeframe)
+            if records is None:
+                return {field: np.empty(0, dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+
+            if limit is not None:
+                records = records[-limit:]
+            return {field: np.ascontiguousarray(records[field], dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+
+    def append(self, symbol: str, timeframe: str, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        Ajoute des bougies clôturées triées par temps
+
+        Les bougies plus récentes que la dernière persistée sont ajoutées en fin de fichier.
+        Les autres (historique chargé après coup, plus ancien que la première ou comblant un
+        trou) sont insérées à leur place par réécriture du fichier, celles déjà persistées
+        ignorées: le fichier reste trié et sans doublon.
+
+        Returns:
+            Nombre de bougies écrites
+        """
+        with self._lock:
+            times = arrays["time"]
+            last_time = self.last_time(symbol, timeframe)
+            start = 0 if last_time is None else int(np.searchsorted(times, last_time, side="right"))
+            missing = np.empty(0, dtype=np.intp)
+            if start:
+                persisted = self._open(symbol, timeframe)["time"]
+                pos = np.searchsorted(persisted, times[:start])
+                found = pos < len(persisted)
+                found[found] = persisted[pos[found]] == times[:start][found]
+                missing = np.flatnonzero(~found)
+            count = len(missing) + len(times) - start
+            if count <= 0:
+                return 0
+
+            path = self._path(symbol, timeframe)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if len(missing):
+                inserted = np.empty(len(missing), dtype=RECORD_DTYPE)
+                for field in CANDLE_FIELDS:
+                    inserted[field] = arrays[field][missing]
+                self._insert(path, inserted)
+                self._first_times[(symbol, timeframe)] = min(int(times[missing[0]]),
+                                                             self.first_time(symbol, timeframe))
+            if start < len(times):
+                with open(path, "ab") as f:
+                    # Retirer un enregistrement partiel laissé par une écriture interrompue
+                    size = f.tell()
+                    if size % RECORD_DTYPE.itemsize:
+                        f.truncate(size - size % RECORD_DTYPE.itemsize)
+                    f.write(self._records(arrays, start, len(times)).tobytes())
+                self._last_times[(symbol, timeframe)] = int(times[-1])
+                if last_time is None:
+                    self._first_times[(symbol, timeframe)] = int(times[0])
+
+            logger.debug(f"Persisted {count} candles for {symbol} {timeframe}")
+            return count
+
+    @staticmethod
+    def _records(arrays: Dict[str, np.ndarray], lo: int, hi: int) -> np.ndarray:
+        records = np.empty(hi - lo, dtype=RECORD_DTYPE)
+        for field in CANDLE_FIELDS:
+            records[field] = arrays[field][lo:hi]
+        return records
+
+    @staticmethod
+    def _insert(path: str, records: np.ndarray):
+        """
+        Réécrit le fichier avec `records` (triés, absents du fichier) insérés à leur place
+        (fichier temporaire puis remplacement atomique)
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        # Sans l'éventuel enregistrement partiel d'une écriture interrompue
+        existing = np.frombuffer(data[:len(data) - len(data) % RECORD_DTYPE.itemsize], dtype=RECORD_DTYPE)
+        merged = np.concatenate((existing, records))
+        merged = merged[np.argsort(merged["time"], kind="stable")]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(merged.tobytes())
+        os.replace(tmp_path, path)
+
+    def delete(self, symbol: str, timeframe: str):
+        """Supprime les bougies persistées d'un (symbol, timeframe)"""
+        with self._lock:
+            path = self._path(symbol, timeframe)
+            if os.path.exists(path):
+                os.remove(path)
+            self._last_times.pop((symbol, timeframe), None)
+            self._first_times.pop((symbol, timeframe), None)
@@ -0,0 +1,92 @@
+"""
+Données de marché partagées par toutes les sessions Streamlit du processus
+
+Un seul DataManager et un seul MarketDataHub (st.cache_resource): une boucle asyncio,
+une connexion WebSocket multiplexée. Cinquante dashboards sur BTCUSDT 1m partagent
+la même copie des bougies et le même abonnement; les sessions ne font que lire.
+"""
+import uuid
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_manager import DataManager, DEFAULT_COLD_BUDGET_BYTES, DEFAULT_ROLLUP_TIMEFRAMES, TIMEFRAME_MINUTES
+from candle_store import CandleStore
+from market_hub import MarketDataHub
+from order_book import BOOK_CHANNEL, OrderBook
+from tick_aggregator import TICK_TIMEFRAMES, TRADE_CHANNEL
+
+SYMBOL = "BTCUSDT"
+
+# Bougies d'historique REST chargées par timeframe (au-delà de la fenêtre chaude: historique froid)
+HISTORY_DEPTH = 5000
+
+
+@st.cache_resource
+def get_data_manager() -> DataManager:
+    """DataManager unique du processus, partagé par toutes les sessions"""
+    return DataManager(
+        max_candles=500,
+        rollup_timeframes=DEFAULT_ROLLUP_TIMEFRAMES,
+        store=CandleStore(),
+        cold_budget_bytes=DEFAULT_COLD_BUDGET_BYTES
+    )
+
+
+@st.cache_resource
+def get_hub() -> MarketDataHub:
+    """Hub de données de marché unique du processus"""
+    return MarketDataHub(get_data_manager(), symbol=SYMBOL, history_depth=HISTORY_DEPTH)
+
+
+def reader_id() -> str:
+    """Identifiant de la session courante auprès du hub (un bail par session)"""
+    if "hub_reader_id" not in st.session_state:
+        st.session_state.hub_reader_id = uuid.uuid4().hex
+    return st.session_state.hub_reader_id
+
+
+def follow(timeframe: str) -> bool:
+    """Renouvelle le bail de la session sur le flux de `timeframe` (à appeler à chaque rerun)"""
+    return get_hub().ensure(timeframe, reader=reader_id())
+
+
+def switch_timeframe(old_timeframe: str, new_timeframe: str) -> bool:
+    """
+    Bascule la session vers un autre timeframe sur la connexion partagée
+    
+    Returns:
+        True si un nouveau flux a été ouvert (historique en cours de chargement)
+    """
+    return get_hub().switch(old_timeframe, new_timeframe, reader=reader_id())
+
+
+def follow_trades() -> bool:
+    """
+    Renouvelle le bail de la session sur le flux des trades (volume agresseur réel)
+    Bail distinct de celui du timeframe: un changement de timeframe ne coupe pas les trades
+    """
+    return get_hub().ensure(TRADE_CHANNEL, reader=f"{reader_id()}:trades")
+
+
+def trade_volume_split(df: pd.DataFrame, timeframe: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Volume acheteur / vendeur réel (trades agressés) des bougies de `df`
+
+    Returns:
+        (buy, sell) alignés sur les lignes de df, NaN pour les bougies que le flux des trades
+        ne couvre pas entièrement (avant son ouverture, ou timeframe non aligné comme 1W/1M)
+    """
+    seconds = TICK_TIMEFRAMES.get(timeframe) or TIMEFRAME_MINUTES.get(timeframe, 0) * 60
+    if not seconds or df.empty:
+        return np.full(len(df), np.nan), np.full(len(df), np.nan)
+    return get_hub().trades(SYMBOL).volume_split(df["time"].to_numpy(), seconds)
+
+
+def follow_book() -> OrderBook:
+    """Renouvelle le bail de la session sur le carnet d'ordres L2 et retourne le carnet partagé"""
+    hub = get_hub()
+    hub.ensure(BOOK_CHANNEL, reader=f"{reader_id()}:book")
+    return hub.book(SYMBOL)
@@ -0,0 +1,60 @@
+"""
+Composant réutilisable: carnet d'ordres L2 (profondeur cumulée et murs de liquidité)
+À importer dans les pages qui ont besoin du contexte de liquidité
+"""
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from components.market_feed import follow_book
+
+
+def order_book_panel(depth: int = 100, walls: int = 3, color_bid: str = "#00e676", color_ask: str = "#ff1744"):
+    """
+    Affiche le carnet L2 partagé: métriques (spread, déséquilibre), profondeur cumulée et murs
+
+    Args:
+        depth: Niveaux affichés par côté
+        walls: Nombre de murs (plus gros niveaux) listés par côté
+    """
+    book = follow_book()
+    snap = book.snapshot(depth)
+    if not len(snap["bid_price"]) or not len(snap["ask_price"]):
+        st.info("⏳ Carnet d'ordres en cours de chargement...")
+        return
+
+    best_bid, best_ask = snap["bid_price"][0], snap["ask_price"][0]
+    bid_total, ask_total = snap["bid_size"].sum(), snap["ask_size"].sum()
+    imbalance = (bid_total - ask_total) / max(bid_total + ask_total, 1e-12)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Best Bid / Ask", f"{best_bid:,.1f} / {best_ask:,.1f}")
+    with col2:
+        st.metric("Spread", f"{best_ask - best_bid:,.2f}", f"{(best_ask - best_bid) / best_ask * 1e4:.2f} bps",
+                  delta_color="off")
+    with col3:
+        st.metric(f"Déséquilibre ({depth} niveaux)", f"{imbalance:+.1%}")
+    with col4:
+        st.metric("Carnet", "✅ Synchronisé" if snap["valid"] else "🔁 Resync", f"seq {snap['seq']}",
+                  delta_color="off")
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=snap["bid_price"], y=np.cumsum(snap["bid_size"]), name="Bids",
+                             line=dict(color=color_bid, shape="hv"), fill="tozeroy"))
+    fig.add_trace(go.Scatter(x=snap["ask_price"], y=np.cumsum(snap["ask_size"]), name="Asks",
+                             line=dict(color=color_ask, shape="hv"), fill="tozeroy"))
+    fig.update_layout(height=300, template="plotly_dark", margin=dict(l=20, r=20, t=20, b=20),
+                      xaxis_title="Prix", yaxis_title="Taille cumulée", hovermode="x unified")
+    st.plotly_chart(fig, use_container_width=True)
+
+    top = book.walls(walls, depth)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🟢 Murs Bid**")
+        for price, size in zip(top["bid_price"], top["bid_size"]):
+            st.write(f"{price:,.1f} — {size:,.3f}")
+    with col2:
+        st.markdown("**🔴 Murs Ask**")
+        for price, size in zip(top["ask_price"], top["ask_size"]):
+            st.write(f"{price:,.1f} — {size:,.3f}")
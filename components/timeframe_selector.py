@@ -4,58 +4,10 @@ Composant réutilisable pour le sélecteur de timeframe
 """
 import streamlit as st
 import time
-import threading
-import asyncio
-import queue
 
-AVAILABLE_TIMEFRAMES = ["1m", "3m", "5m", "15m", "30m", "1H", "4H", "1D", "1W", "1M"]
+from components.market_feed import follow, switch_timeframe
 
-def websocket_thread(timeframe: str, message_queue: queue.Queue):
-    """Thread pour exécuter le WebSocket en arrière-plan"""
-    from bitget_ws_client import BitgetWebSocketClient
-    
-    def on_candle(candle):
-        message_queue.put({"type": "candle", "data": candle, "timeframe": timeframe})
-    
-    client = BitgetWebSocketClient(
-        symbol="BTCUSDT",
-        timeframe=timeframe,
-        on_message=on_candle
-    )
-    
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        loop.run_until_complete(client.run())
-    except Exception as e:
-        st.error(f"WebSocket error: {e}")
-    finally:
-        loop.close()
-
-
-def start_websocket(timeframe: str):
-    """Démarre le WebSocket dans un thread séparé"""
-    if "ws_thread" not in st.session_state:
-        st.session_state.ws_thread = None
-    
-    if "message_queue" not in st.session_state:
-        st.session_state.message_queue = queue.Queue()
-    
-    if "ws_running" not in st.session_state:
-        st.session_state.ws_running = False
-    
-    if st.session_state.ws_thread and st.session_state.ws_thread.is_alive():
-        st.session_state.ws_running = False
-        time.sleep(1)
-    
-    st.session_state.ws_running = True
-    st.session_state.ws_thread = threading.Thread(
-        target=websocket_thread,
-        args=(timeframe, st.session_state.message_queue),
-        daemon=True
-    )
-    st.session_state.ws_thread.start()
+AVAILABLE_TIMEFRAMES = ["1s", "5s", "15s", "1m", "3m", "5m", "15m", "30m", "1H", "4H", "1D", "1W", "1M"]
 
 
 def timeframe_selector(key_suffix=""):
@@ -76,22 +28,24 @@ def timeframe_selector(key_suffix=""):
         AVAILABLE_TIMEFRAMES,
         index=AVAILABLE_TIMEFRAMES.index(st.session_state.current_timeframe),
         key=f"tf_selector_{key_suffix}",
-        help="Changer le timeframe recharge l'historique et redémarre le WebSocket"
+        help="Les timeframes dérivés du flux 1m (5m, 15m, 1H, 4H) ou déjà suivis par une autre "
+             "session basculent instantanément, les autres chargent l'historique et démarrent un flux. "
+             "1s/5s/15s sont construits à partir des trades (pas d'historique, mémoire seulement)"
     )
     
-    # Si le timeframe a changé, recharger l'historique et redémarrer le WebSocket
+    # Si le timeframe a changé, s'assurer qu'un flux partagé l'alimente
     if selected_tf != st.session_state.current_timeframe:
+        previous_tf = st.session_state.current_timeframe
         st.session_state.current_timeframe = selected_tf
         
-        # 1. Clear les anciennes données de ce timeframe
-        if "data_manager" in st.session_state:
-            st.session_state.data_manager.clear(selected_tf)
-        
-        # 2. Redémarrer le WebSocket (qui va charger l'historique via REST)
-        start_websocket(selected_tf)
-        
-        st.success(f"✅ Changement vers {selected_tf} - Chargement de l'historique...")
-        time.sleep(0.5)  # Petit délai pour laisser le temps au WebSocket de se connecter
+        # Timeframe dérivé d'un flux déjà actif (ou déjà suivi par une autre session): bascule instantanée
+        # L'ancien flux est désabonné s'il n'a plus de lecteur, la connexion est réutilisée
+        if switch_timeframe(previous_tf, selected_tf):
+            st.success(f"✅ Changement vers {selected_tf} - Chargement de l'historique...")
+            time.sleep(0.5)  # Petit délai pour laisser le temps au WebSocket de se connecter
         st.rerun()
     
+    # Signaler à chaque rerun que ce flux est encore utilisé
+    follow(st.session_state.current_timeframe)
+    
     return selected_tf
@@ -1,106 +1,793 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
-from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
+import threading
+
+from candle_buffer import (
+    APPENDED,
+    CANDLE_FIELDS,
+    DROPPED,
+    FIELD_DTYPES,
+    INSERTED,
+    MERGED,
+    UPDATED_LAST,
+    UPSERT_RESULTS,
+    CandleRingBuffer,
+    ColdCandleHistory,
+    DequeCandleBuffer,
+    arrays_to_candles,
+    candles_to_arrays,
+)
+from candle_store import CandleStore
 
 logger = logging.getLogger(__name__)
 
+# Modes de stockage disponibles
+STORAGE_BACKENDS = {
+    "columnar": CandleRingBuffer,
+    "deque": DequeCandleBuffer,
+}
+
+# Durée en minutes des timeframes à durée fixe (1W/1M exclus: non alignés sur l'epoch)
+TIMEFRAME_MINUTES = {
+    "1m": 1,
+    "3m": 3,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1H": 60,
+    "4H": 240,
+    "6H": 360,
+    "12H": 720,
+    "1D": 1440,
+}
+
+# Timeframes dérivés du flux 1m par défaut (cf. DataManager(rollup_timeframes=...))
+DEFAULT_ROLLUP_TIMEFRAMES = ("5m", "15m", "1H", "4H")
+
+# Budget mémoire par défaut de l'historique froid compressé, par série (~100k+ bougies 1m)
+DEFAULT_COLD_BUDGET_BYTES = 4 * 1024 * 1024
+
+
+def resample_ohlcv(arrays: Dict[str, np.ndarray], bucket_seconds: int) -> Dict[str, np.ndarray]:
+    """
+    Agrège des colonnes OHLCV triées par temps vers des buckets de `bucket_seconds`
+    
+    Le bucket de chaque bougie est calculé par arithmétique entière, puis chaque
+    segment de bougies consécutives du même bucket est réduit en une fois
+    (np.maximum/minimum/add.reduceat).
+    
+    Args:
+        arrays: {field: np.ndarray} avec au moins time, open, high, low, close, volume
+        bucket_seconds: Durée d'un bucket en secondes
+    
+    Returns:
+        Colonnes agrégées {field: np.ndarray}
+    """
+    times = arrays["time"]
+    if len(times) == 0:
+        return {field: np.empty(0, dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+    
+    buckets = (times // bucket_seconds) * bucket_seconds
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(times)])) - 1
+    
+    return {
+        "time": buckets[starts],
+        "open": arrays["open"][starts],
+        "high": np.maximum.reduceat(arrays["high"], starts),
+        "low": np.minimum.reduceat(arrays["low"], starts),
+        "close": arrays["close"][ends],
+        "volume": np.add.reduceat(arrays["volume"], starts),
+    }
+
+
+def aggregate_arrays(source: Dict[str, np.ndarray],
+                     target_minutes: List[int]) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Agrège des colonnes OHLCV triées vers plusieurs timeframes cibles
+    
+    Les cibles sont traitées de la plus fine à la plus large: chaque cible est
+    calculée depuis la plus grande cible déjà calculée qui la divise
+    (1m → 5m → 15m → 60m → 240m), ce qui réduit le volume à chaque étape.
+    """
+    results: Dict[int, Dict[str, np.ndarray]] = {}
+    for minutes in sorted(set(target_minutes)):
+        # Plus grande cible déjà calculée dont les buckets s'emboîtent dans celle-ci
+        base = source
+        for done in sorted(results, reverse=True):
+            if minutes % done == 0:
+                base = results[done]
+                break
+        results[minutes] = resample_ohlcv(base, minutes * 60)
+    return results
+
+
+class _Rollup:
+    """
+    Bucket ouvert d'un timeframe dérivé, mis à jour en O(1) à chaque bougie de base
+    
+    Les minutes déjà clôturées du bucket sont résumées (open/high/low/volume),
+    la minute en cours est gardée à part car elle est réécrite à chaque update live.
+    Une minute plus ancienne que la minute en cours ne peut pas être intégrée au résumé
+    (is_late): le bucket est alors reconstruit depuis la série de base.
+    """
+    
+    __slots__ = ("bucket_seconds", "start", "first_time", "open", "high", "low",
+                 "closed_volume", "minute")
+    
+    def __init__(self, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.reset()
+    
+    def reset(self):
+        self.start = None
+        self.first_time = None
+        self.open = 0.0
+        self.high = float("-inf")
+        self.low = float("inf")
+        self.closed_volume = 0.0
+        self.minute = None
+    
+    def is_late(self, candle: Dict) -> bool:
+        """Bougie de base antérieure à la minute en cours (update en retard)"""
+        return self.minute is not None and candle["time"] < self.minute["time"]
+    
+    def update(self, candle: Dict) -> Optional[Dict]:
+        """
+        Intègre une bougie de base dans le bucket ouvert
+        
+        Returns:
+            La bougie agrégée du bucket, ou None si la bougie est antérieure à la minute en cours
+        """
+        candle_time = candle["time"]
+        bucket = (candle_time // self.bucket_seconds) * self.bucket_seconds
+        
+        if self.start is None or bucket > self.start:
+            # Passage de frontière: nouveau bucket
+            self.reset()
+            self.start = bucket
+            self.first_time = candle_time
+            self.open = candle["open"]
+        elif bucket < self.start:
+            return None
+        elif candle_time > self.minute["time"]:
+            # Nouvelle minute: la précédente est clôturée
+            self.high = max(self.high, self.minute["high"])
+            self.low = min(self.low, self.minute["low"])
+            self.closed_volume += self.minute.get("volume", 0)
+        elif candle_time < self.minute["time"]:
+            return None
+        
+        if candle_time == self.first_time:
+            self.open = candle["open"]
+        self.minute = candle
+        
+        return {
+            "time": self.start,
+            "open": self.open,
+            "high": max(self.high, candle["high"]),
+            "low": min(self.low, candle["low"]),
+            "close": candle["close"],
+            "volume": self.closed_volume + candle.get("volume", 0),
+        }
+
+
+class _Series:
+    """
+    État d'une série (symbol, timeframe): buffer, verrou et cache
+    Chaque série a son propre verrou (lock striping): des écritures sur des
+    symboles ou timeframes différents ne se bloquent pas entre elles.
+    """
+    
+    __slots__ = ("buffer", "lock", "version", "frame_cache", "frame_shared", "last_row_dirty", "stats", "rollup")
+    
+    def __init__(self, buffer, rollup: Optional[_Rollup] = None):
+        self.buffer = buffer
+        self.lock = threading.RLock()
+        # Version incrémentée à chaque écriture
+        self.version = 0
+        # Cache du DataFrame: (version, DataFrame)
+        self.frame_cache: Optional[Tuple[int, pd.DataFrame]] = None
+        # Le DataFrame en cache a été remis à un lecteur (copy=False): ne plus le modifier
+        self.frame_shared = False
+        # Seule la dernière bougie a changé depuis la mise en cache
+        self.last_row_dirty = False
+        # Compteurs d'écriture: {résultat d'upsert: count}
+        self.stats: Dict[str, int] = {result: 0 for result in UPSERT_RESULTS}
+        # Bucket ouvert si la série est un timeframe dérivé
+        self.rollup = rollup
+
 
 class DataManager:
     """
-    Gestionnaire de données pour multiples timeframes
+    Gestionnaire de données pour multiples symboles et timeframes
     Stocke les bougies et fournit des DataFrames pour les calculs d'indicateurs
+    
+    Thread-safe: chaque série (symbol, timeframe) a son propre verrou, plusieurs
+    threads d'ingestion peuvent écrire des symboles différents en parallèle. Les
+    lectures sont prises sous le verrou: DataFrames et listes de bougies sont des
+    copies cohérentes, mais get_arrays/get_range/tail renvoient par défaut des vues
+    sur le buffer en mode "columnar" (écrasées par les écritures suivantes): passer
+    copy=True (ou as_frame=True) pour les lire depuis un autre thread que l'écrivain.
     """
     
-    def __init__(self, max_candles: int = 1000):
+    def __init__(self, max_candles: int = 1000, storage: str = "columnar",
+                 rollup_timeframes: Optional[Iterable[str]] = None,
+                 base_timeframe: str = "1m",
+                 store: Optional[CandleStore] = None,
+                 default_symbol: str = "BTCUSDT",
+                 cold_budget_bytes: Optional[int] = None,
+                 cold_price_tick: Optional[float] = None):
         """
         Args:
             max_candles: Nombre maximum de bougies à conserver par timeframe
+                (fenêtre chaude si l'historique froid est activé)
+            storage: "columnar" (tableaux NumPy préalloués) ou "deque" (deque de dicts)
+            rollup_timeframes: Timeframes maintenus en continu depuis `base_timeframe`
+                (ex: DEFAULT_ROLLUP_TIMEFRAMES), None pour désactiver
+            base_timeframe: Timeframe source des rollups
+            store: Stockage persistant pour warm_start()/persist(), None pour désactiver
+            default_symbol: Symbole utilisé quand `symbol` n'est pas précisé
+            cold_budget_bytes: Budget mémoire par série de l'historique froid compressé
+                (bougies éjectées de la fenêtre chaude), None pour désactiver
+            cold_price_tick: Pas de prix pour compresser les prix sans perte
+                (sinon float32, ~7 chiffres significatifs)
         """
+        if storage not in STORAGE_BACKENDS:
+            raise ValueError(f"Unsupported storage: {storage} (expected one of {list(STORAGE_BACKENDS)})")
+        if cold_budget_bytes is not None and storage != "columnar":
+            raise ValueError("Cold history requires the columnar storage")
         self.max_candles = max_candles
-        # Structure: {timeframe: deque([candles])}
-        self.data: Dict[str, deque] = {}
+        self.storage = storage
+        self.store = store
+        self.default_symbol = default_symbol
+        self.cold_budget_bytes = cold_budget_bytes
+        self.cold_price_tick = cold_price_tick
+        
+        # Structure: {(symbol, timeframe): _Series}
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        # Protège uniquement la création de séries (pas les lectures/écritures)
+        self._registry_lock = threading.Lock()
+        
+        # Rollups: {timeframe dérivé: durée du bucket en secondes}
+        self.base_timeframe = base_timeframe
+        self._rollup_seconds: Dict[str, int] = {}
+        for tf in rollup_timeframes or ():
+            if tf not in TIMEFRAME_MINUTES or TIMEFRAME_MINUTES[tf] % TIMEFRAME_MINUTES[base_timeframe]:
+                raise ValueError(f"Cannot roll up {tf} from {base_timeframe}")
+            if tf != base_timeframe:
+                self._rollup_seconds[tf] = TIMEFRAME_MINUTES[tf] * 60
+    
+    def is_derived(self, timeframe: str) -> bool:
+        """True si le timeframe est maintenu par rollup depuis le timeframe de base"""
+        return timeframe in self._rollup_seconds
+    
+    def source_timeframe(self, timeframe: str) -> str:
+        """Timeframe du flux à écouter pour alimenter `timeframe`"""
+        return self.base_timeframe if self.is_derived(timeframe) else timeframe
+    
+    @property
+    def rollup_timeframes(self) -> List[str]:
+        return list(self._rollup_seconds)
+    
+    def symbols(self) -> List[str]:
+        """Retourne les symboles pour lesquels des données ont été reçues"""
+        with self._registry_lock:
+            return sorted({symbol for symbol, _ in self._series})
+    
+    def _get_series(self, timeframe: str, symbol: Optional[str] = None,
+                    create: bool = True) -> Optional[_Series]:
+        """Retourne la série (symbol, timeframe), la crée si nécessaire"""
+        key = (symbol or self.default_symbol, timeframe)
+        series = self._series.get(key)
+        if series is None and create:
+            with self._registry_lock:
+                series = self._series.get(key)
+                if series is None:
+                    rollup = None
+                    if timeframe in self._rollup_seconds:
+                        rollup = _Rollup(self._rollup_seconds[timeframe])
+                    if self.cold_budget_bytes is not None:
+                        cold = ColdCandleHistory(self.cold_budget_bytes, price_tick=self.cold_price_tick)
+                        buffer = CandleRingBuffer(self.max_candles, cold)
+                    else:
+                        buffer = STORAGE_BACKENDS[self.storage](self.max_candles)
+                    series = _Series(buffer, rollup)
+                    self._series[key] = series
+        return series
+    
+    def _bump_version(self, series: _Series, last_row_only: bool = False, rows: int = 1):
+        """
+        Incrémente la version d'une série du nombre de bougies écrites (verrou de la série tenu)
+        
+        Args:
+            last_row_only: True si seule la dernière bougie a été réécrite,
+                le DataFrame en cache peut alors être patché au lieu d'être reconstruit
+            rows: Nombre de bougies écrites (écriture en bloc)
+        """
+        series.version += rows
+        if series.frame_cache is None:
+            return
+        if last_row_only:
+            series.last_row_dirty = True
+        else:
+            series.frame_cache = None
+    
+    def get_version(self, timeframe: str, symbol: Optional[str] = None) -> int:
+        """
+        Retourne la version courante d'un timeframe (0 si jamais écrit)
+        
+        La version avance du nombre de bougies écrites: un lecteur qui n'a reçu qu'une
+        bougie par écriture détecte un écart plus grand (lot écrit en bloc) et doit relire.
+        """
+        series = self._get_series(timeframe, symbol, create=False)
+        return series.version if series else 0
+    
+    def get_write_stats(self, timeframe: str, symbol: Optional[str] = None) -> Dict[str, int]:
+        """
+        Retourne les compteurs d'écriture d'un timeframe
         
-    def add_candle(self, timeframe: str, candle: Dict):
+        Returns:
+            {appended, updated_last, merged, inserted, dropped}: bougies ajoutées,
+            mises à jour live, doublons fusionnés, insérées hors ordre, rejetées
+        """
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            return {result: 0 for result in UPSERT_RESULTS}
+        with series.lock:
+            return dict(series.stats)
+    
+    def _upsert(self, series: _Series, candle: Dict) -> str:
+        """Insère une bougie à sa place et met à jour version et compteurs"""
+        result = series.buffer.upsert(candle)
+        series.stats[result] += 1
+        if result != DROPPED:
+            self._bump_version(series, last_row_only=result == UPDATED_LAST)
+        return result
+        
+    def add_candle(self, timeframe: str, candle: Dict, symbol: Optional[str] = None):
         """
         Ajoute une bougie pour un timeframe donné
         
         Args:
             timeframe: Le timeframe (ex: "1m", "5m", "1H")
             candle: Dict avec {time, open, high, low, close, volume}
+            symbol: Symbole (défaut: default_symbol)
+        """
+        series = self._get_series(timeframe, symbol)
+        with series.lock:
+            # Insertion triée: même timestamp = mise à jour, sinon insertion à sa place
+            self._upsert(series, candle)
+            
+            if timeframe == self.base_timeframe:
+                for tf in self._rollup_seconds:
+                    derived = self._get_series(tf, symbol)
+                    if derived.rollup.is_late(candle):
+                        # Minute déjà dépassée: son ancienne version est comptée dans le
+                        # bucket, qui est ré-agrégé depuis la série de base
+                        self._refresh_rollup(series, derived, candle["time"], candle["time"])
+                    else:
+                        self._apply_rollup(derived, candle)
+        
+        logger.debug(f"Added candle for {symbol or self.default_symbol} {timeframe}: {candle}")
+    
+    def add_candles(self, timeframe: str, candles: List[Dict], symbol: Optional[str] = None):
+        """Ajoute plusieurs bougies d'un coup (triées et dédoublonnées à l'écriture)"""
+        if not candles:
+            return
+        self.add_arrays(timeframe, candles_to_arrays(candles), symbol)
+    
+    def add_arrays(self, timeframe: str, arrays: Dict[str, np.ndarray], symbol: Optional[str] = None):
+        """
+        Ajoute plusieurs bougies fournies sous forme de colonnes NumPy
+        
+        Args:
+            arrays: {field: np.ndarray} pour time, open, high, low, close, volume
+            symbol: Symbole (défaut: default_symbol)
+        """
+        times = arrays["time"]
+        if len(times) == 0:
+            return
+        
+        series = self._get_series(timeframe, symbol)
+        with series.lock:
+            times = self._write_arrays(series, arrays)
+            if timeframe == self.base_timeframe and self._rollup_seconds:
+                self._seed_rollups(series, symbol, int(times[0]), int(times[-1]))
+        
+        logger.debug(f"Added {len(times)} candles for {symbol or self.default_symbol} {timeframe}")
+    
+    def _write_arrays(self, series: _Series, arrays: Dict[str, np.ndarray]) -> np.ndarray:
         """
-        if timeframe not in self.data:
-            self.data[timeframe] = deque(maxlen=self.max_candles)
+        Écrit un lot de colonnes dans une série (verrou de la série tenu)
         
-        # Vérifier si la bougie existe déjà (même timestamp)
-        existing = self.data[timeframe]
-        if existing and existing[-1]["time"] == candle["time"]:
-            # Mettre à jour la dernière bougie (update en temps réel)
-            existing[-1] = candle
+        Returns:
+            Temps du lot trié et dédoublonné
+        """
+        times = arrays["time"]
+        # Trier le lot et garder la dernière occurrence de chaque timestamp
+        if len(times) > 1 and (np.diff(times) <= 0).any():
+            _, last_index = np.unique(times[::-1], return_index=True)
+            keep = len(times) - 1 - last_index
+            series.stats[MERGED] += len(times) - len(keep)
+            arrays = {field: arr[keep] for field, arr in arrays.items()}
+            times = arrays["time"]
+        
+        last_time = series.buffer.last_time()
+        if last_time is None or times[0] > last_time:
+            # Cas courant: tout le lot est plus récent, ajout en bloc
+            series.buffer.extend_arrays(arrays)
+            series.stats[APPENDED] += len(times)
+            self._bump_version(series, rows=len(times))
+        elif times[-1] < series.buffer.first_time(include_cold=True):
+            # Historique chargé à rebours: tout le lot est plus ancien (historique froid compris)
+            kept = series.buffer.prepend_arrays(arrays)
+            series.stats[INSERTED] += kept
+            series.stats[DROPPED] += len(times) - kept
+            if kept:
+                self._bump_version(series, rows=kept)
         else:
-            # Nouvelle bougie
-            self.data[timeframe].append(candle)
+            # Chevauchement avec l'existant (snapshot après reconnexion, backfill):
+            # upsert en bloc, doublons réécrits en place
+            counts = series.buffer.merge_arrays(arrays)
+            for result, count in counts.items():
+                series.stats[result] += count
+            if len(times) > counts[DROPPED]:
+                self._bump_version(series, last_row_only=counts[UPDATED_LAST] == len(times),
+                                   rows=len(times) - counts[DROPPED])
+        return times
+    
+    def warm_start(self, timeframe: str, symbol: Optional[str] = None) -> Optional[int]:
+        """
+        Charge l'historique persisté d'un timeframe (si le timeframe est encore vide)
         
-        logger.debug(f"Added candle for {timeframe}: {candle}")
+        Returns:
+            Timestamp de la dernière bougie disponible, à partir duquel il suffit
+            de récupérer la fin manquante via REST (None si rien n'est persisté)
+        """
+        if self.store is None:
+            return None
+        symbol = symbol or self.default_symbol
+        if self.count_candles(timeframe, symbol) == 0:
+            # Avec l'historique froid, tout l'historique persisté est rechargé (dans la limite du budget)
+            limit = None if self.cold_budget_bytes is not None else self.max_candles
+            self.add_arrays(timeframe, self.store.load(symbol, timeframe, limit=limit), symbol)
+        latest = self.get_latest_candle(timeframe, symbol)
+        return latest["time"] if latest else None
+    
+    def persist(self, timeframe: str, symbol: Optional[str] = None) -> int:
+        """
+        Écrit dans le store les bougies clôturées pas encore persistées
+        La dernière bougie (live, encore modifiée) n'est pas écrite. L'historique chargé
+        après coup (plus ancien que le store, fenêtre chaude ou historique froid) est
+        écrit aussi, en tête du store.
+        
+        Returns:
+            Nombre de bougies écrites
+        """
+        if self.store is None:
+            return 0
+        symbol = symbol or self.default_symbol
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            return 0
+        
+        with series.lock:
+            buffer = series.buffer
+            if len(buffer) < 2:
+                return 0
+            last_time = buffer.last_time()
+            first_time = buffer.first_time(include_cold=True)
+            first_persisted = self.store.first_time(symbol, timeframe)
+            last_persisted = self.store.last_time(symbol, timeframe)
+            parts = []
+            if first_persisted is not None and first_time < first_persisted:
+                parts.append(buffer.time_range(None, first_persisted - 1, include_cold=True))
+            if last_persisted is None or last_persisted < last_time:
+                start = None if last_persisted is None else last_persisted + 1
+                # Historique froid compris: des bougies ont pu y être évincées depuis le dernier persist
+                newer = buffer.time_range(start, None, include_cold=True)
+                parts.append({field: arr[:-1] for field, arr in newer.items()})
+            if not parts:
+                return 0
+            closed = {field: np.concatenate([part[field] for part in parts]) for field in CANDLE_FIELDS}
+        return self.store.append(symbol, timeframe, closed)
     
-    def add_candles(self, timeframe: str, candles: List[Dict]):
-        """Ajoute plusieurs bougies d'un coup"""
-        if timeframe not in self.data:
-            self.data[timeframe] = deque(maxlen=self.max_candles)
+    def _apply_rollup(self, series: _Series, candle: Dict):
+        """Met à jour le bucket ouvert d'un timeframe dérivé avec une bougie de base"""
+        with series.lock:
+            derived = series.rollup.update(candle)
+            if derived is None:
+                return
+            
+            last_time = series.buffer.last_time()
+            if last_time is not None and derived["time"] < last_time:
+                # Historique REST du timeframe dérivé déjà plus récent que ce bucket
+                return
+            
+            self._upsert(series, derived)
+    
+    def _seed_rollups(self, base_series: _Series, symbol: Optional[str], start_time: int, end_time: int):
+        """
+        Recalcule les timeframes dérivés après un ajout en bloc [start_time, end_time] sur le
+        timeframe de base (verrou de la série de base tenu)
+        """
+        for tf in self._rollup_seconds:
+            self._refresh_rollup(base_series, self._get_series(tf, symbol), start_time, end_time)
+    
+    def _refresh_rollup(self, base_series: _Series, series: _Series, start_time: int, end_time: int):
+        """
+        Reconstruit un timeframe dérivé sur la plage [start_time, end_time] du timeframe de base
+        (ajout en bloc ou bougie de base en retard, verrou de la série de base tenu)
         
-        for candle in candles:
-            self.data[timeframe].append(candle)
+        Les buckets clôturés couverts par la plage sont ré-agrégés depuis la série de base et
+        écrits dans le timeframe dérivé (ajout, insertion en tête ou fusion, comme
+        add_arrays), sans le premier bucket de l'historique de base s'il est incomplet. Le
+        bucket qui suit la plage l'est aussi: un lot plus ancien peut compléter le bucket
+        jusque-là incomplet. Le bucket ouvert est reconstruit en rejouant les bougies de
+        base qu'il couvre.
+        """
+        buffer = base_series.buffer
+        base = buffer.arrays()
+        times = base["time"]
+        if len(times) == 0:
+            return
+        base_first = buffer.first_time(include_cold=True)
+        after = int(np.searchsorted(times, end_time, side="right"))
+        end_time = int(times[after]) if after < len(times) else end_time
         
-        logger.info(f"Added {len(candles)} candles for {timeframe}")
+        with series.lock:
+            bucket_seconds = series.rollup.bucket_seconds
+            open_bucket = (times[-1] // bucket_seconds) * bucket_seconds
+            lo = (start_time // bucket_seconds) * bucket_seconds
+            if base_first > lo:
+                lo += bucket_seconds
+            hi = min(open_bucket, (end_time // bucket_seconds + 1) * bucket_seconds)
+            if hi > lo:
+                closed = resample_ohlcv(buffer.time_range(lo, hi - 1, include_cold=True), bucket_seconds)
+                if len(closed["time"]):
+                    self._write_arrays(series, closed)
+            
+            series.rollup.reset()
+            start = int(np.searchsorted(times, open_bucket))
+            for candle in arrays_to_candles({field: arr[start:] for field, arr in base.items()}):
+                self._apply_rollup(series, candle)
     
-    def get_candles(self, timeframe: str) -> List[Dict]:
+    def get_candles(self, timeframe: str, symbol: Optional[str] = None) -> List[Dict]:
         """Retourne toutes les bougies pour un timeframe"""
-        if timeframe not in self.data:
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
             return []
-        return list(self.data[timeframe])
+        with series.lock:
+            return series.buffer.to_list()
+    
+    def get_arrays(self, timeframe: str, symbol: Optional[str] = None,
+                   copy: bool = False, include_cold: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Retourne les colonnes d'un timeframe sous forme de tableaux NumPy
+        En mode "columnar" ce sont des vues en lecture seule qui partagent la mémoire
+        du buffer, en mode "deque" des copies construites depuis les dicts
+        
+        Args:
+            copy: True pour un snapshot indépendant des écritures suivantes
+                (nécessaire si d'autres threads écrivent dans ce timeframe)
+            include_cold: Préfixer avec l'historique froid décompressé
+        
+        Returns:
+            Dict {field: np.ndarray} pour time, open, high, low, close, volume
+        """
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            return {field: np.empty(0, dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+        with series.lock:
+            if include_cold and self.cold_budget_bytes is not None:
+                return series.buffer.arrays(include_cold=True)
+            arrays = series.buffer.arrays()
+            if copy and self.storage == "columnar":
+                arrays = {field: arr.copy() for field, arr in arrays.items()}
+            return arrays
+    
+    def get_range(self, timeframe: str, start: Optional[int] = None, end: Optional[int] = None,
+                  symbol: Optional[str] = None, include_cold: bool = False,
+                  as_frame: bool = False, copy: bool = False):
+        """
+        Retourne les bougies d'une plage de temps (bornes incluses)
+        Les bornes sont cherchées par recherche binaire sur les timestamps triés
+        
+        Args:
+            start: Timestamp de début (secondes), None pour le début de l'historique
+            end: Timestamp de fin (secondes), None pour la dernière bougie
+            include_cold: Compléter depuis l'historique froid si la plage le couvre
+            copy: True pour des copies indépendantes des écritures suivantes
+            as_frame: True pour un DataFrame (copie de la plage uniquement)
+        
+        Returns:
+            Dict {field: np.ndarray} (vues en lecture seule en mode "columnar",
+            cf. get_arrays) ou DataFrame si `as_frame`
+        """
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            arrays = {field: np.empty(0, dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+        else:
+            with series.lock:
+                arrays = series.buffer.time_range(start, end, include_cold=include_cold)
+                if as_frame:
+                    return pd.DataFrame(arrays, copy=True)
+                if copy:
+                    arrays = {field: arr.copy() for field, arr in arrays.items()}
+        return pd.DataFrame(arrays) if as_frame else arrays
     
-    def get_dataframe(self, timeframe: str) -> pd.DataFrame:
+    def tail(self, timeframe: str, n: int, symbol: Optional[str] = None,
+             include_cold: bool = False, as_frame: bool = False, copy: bool = False):
+        """
+        Retourne les `n` bougies les plus récentes d'un timeframe
+        Ex: tail("5m", bars_affichées + warm-up des indicateurs)
+        
+        Args:
+            n: Nombre de bougies
+            include_cold: Compléter depuis l'historique froid si la fenêtre chaude ne suffit pas
+            copy: True pour des copies indépendantes des écritures suivantes
+            as_frame: True pour un DataFrame (copie des `n` bougies uniquement)
+        
+        Returns:
+            Dict {field: np.ndarray} (vues en lecture seule en mode "columnar",
+            cf. get_arrays) ou DataFrame si `as_frame`
+        """
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            arrays = {field: np.empty(0, dtype=FIELD_DTYPES[field]) for field in CANDLE_FIELDS}
+        else:
+            with series.lock:
+                arrays = series.buffer.tail(n, include_cold=include_cold)
+                if as_frame:
+                    return pd.DataFrame(arrays, copy=True)
+                if copy:
+                    arrays = {field: arr.copy() for field, arr in arrays.items()}
+        return pd.DataFrame(arrays) if as_frame else arrays
+    
+    def get_dataframe(self, timeframe: str, copy: bool = True,
+                      symbol: Optional[str] = None, include_cold: bool = False) -> pd.DataFrame:
         """
         Retourne les données sous forme de DataFrame pandas
         Utile pour les calculs d'indicateurs
         
+        Le DataFrame est mis en cache par version: il n'est reconstruit que si des
+        bougies ont été ajoutées, et simplement patché si seule la bougie live a changé.
+        
+        Args:
+            copy: Si False, retourne le DataFrame en cache lui-même (à ne pas modifier),
+                c'est un snapshot: les écritures suivantes ne le modifient plus
+            symbol: Symbole (défaut: default_symbol)
+            include_cold: Inclure l'historique froid (décompressé à chaque appel, non mis en cache)
+        
         Returns:
             DataFrame avec colonnes: time, open, high, low, close, volume
         """
-        candles = self.get_candles(timeframe)
-        if not candles:
-            return pd.DataFrame(columns=["time", "open", "high", "low", "close", "volume"])
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            return pd.DataFrame(columns=list(CANDLE_FIELDS))
+        
+        with series.lock:
+            if include_cold and self.cold_budget_bytes is not None:
+                return series.buffer.to_frame(include_cold=True)
+            
+            df = self._cached_frame(series)
+            if copy:
+                return df.copy()
+            series.frame_shared = True
+            return df
+    
+    def get_snapshot(self, timeframe: str, symbol: Optional[str] = None) -> Tuple[int, pd.DataFrame]:
+        """
+        Retourne un snapshot versionné d'un timeframe, sans copie
+        
+        Le DataFrame est partagé entre tous les lecteurs de la même version (à ne pas
+        modifier): les écritures suivantes produisent un nouveau DataFrame (copy-on-write).
+        Un lecteur peut comparer la version à celle de son dernier snapshot pour éviter
+        de recalculer quand rien n'a changé.
+        
+        Returns:
+            (version, DataFrame)
+        """
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
+            return 0, pd.DataFrame(columns=list(CANDLE_FIELDS))
+        with series.lock:
+            df = self._cached_frame(series)
+            series.frame_shared = True
+            return series.version, df
+    
+    def _cached_frame(self, series: _Series) -> pd.DataFrame:
+        """DataFrame en cache de la version courante, reconstruit ou patché si nécessaire (verrou tenu)"""
+        cached = series.frame_cache
         
-        df = pd.DataFrame(candles)
-        df = df.sort_values("time")
-        df = df.reset_index(drop=True)
+        if cached is not None and cached[0] != series.version:
+            # Seule la bougie live a changé: patcher la dernière ligne
+            # (en place, ou sur une copie si le DataFrame a été remis à un lecteur)
+            df = cached[1].copy() if series.frame_shared else cached[1]
+            if self._patch_last_row(series, df):
+                cached = (series.version, df)
+            else:
+                cached = None
+            series.frame_cache = cached
+            series.frame_shared = False
         
-        return df
+        if cached is None:
+            cached = (series.version, series.buffer.to_frame())
+            series.frame_cache = cached
+            series.frame_shared = False
+        series.last_row_dirty = False
+        return cached[1]
     
-    def get_latest_candle(self, timeframe: str) -> Optional[Dict]:
+    def _patch_last_row(self, series: _Series, df: pd.DataFrame) -> bool:
+        """
+        Réécrit la dernière ligne du DataFrame en cache avec la bougie live
+        
+        Returns:
+            False si le patch est impossible (le DataFrame doit être reconstruit)
+        """
+        if not series.last_row_dirty or df.empty:
+            return False
+        
+        candle = series.buffer.last()
+        if candle is None or df["time"].iat[-1] != candle["time"]:
+            return False
+        
+        for field in CANDLE_FIELDS[1:]:
+            df.iat[-1, df.columns.get_loc(field)] = candle.get(field, 0)
+        return True
+    
+    def get_latest_candle(self, timeframe: str, symbol: Optional[str] = None) -> Optional[Dict]:
         """Retourne la dernière bougie pour un timeframe"""
-        if timeframe not in self.data or not self.data[timeframe]:
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
             return None
-        return self.data[timeframe][-1]
+        with series.lock:
+            return series.buffer.last()
     
-    def clear(self, timeframe: Optional[str] = None):
+    def clear(self, timeframe: Optional[str] = None, symbol: Optional[str] = None):
         """
         Efface les données
         
         Args:
             timeframe: Si spécifié, efface uniquement ce timeframe, sinon tout
+            symbol: Si spécifié, limite l'effacement à ce symbole
+                (avec `timeframe`, défaut: default_symbol)
         """
         if timeframe:
-            if timeframe in self.data:
-                self.data[timeframe].clear()
-                logger.info(f"Cleared data for {timeframe}")
+            symbol = symbol or self.default_symbol
+            cleared = [timeframe]
+            if timeframe == self.base_timeframe:
+                # Les buckets ouverts des timeframes dérivés ne sont plus valides
+                cleared += self.rollup_timeframes
+            for tf in cleared:
+                series = self._get_series(tf, symbol, create=False)
+                if series is None:
+                    continue
+                with series.lock:
+                    if tf == timeframe:
+                        series.buffer.clear()
+                        self._bump_version(series)
+                    if series.rollup is not None:
+                        series.rollup.reset()
+            logger.info(f"Cleared data for {symbol} {timeframe}")
         else:
-            self.data.clear()
-            logger.info("Cleared all data")
+            with self._registry_lock:
+                all_series = list(self._series.items())
+            for (series_symbol, _), series in all_series:
+                if symbol and series_symbol != symbol:
+                    continue
+                with series.lock:
+                    series.buffer.clear()
+                    self._bump_version(series)
+                    if series.rollup is not None:
+                        series.rollup.reset()
+            logger.info(f"Cleared all data{f' for {symbol}' if symbol else ''}")
     
     def aggregate_timeframe(self, source_tf: str, target_tf: str, 
-                           target_minutes: int) -> List[Dict]:
+                           target_minutes: int, symbol: Optional[str] = None) -> List[Dict]:
         """
         Agrège un timeframe source vers un timeframe cible
         Utile pour créer des timeframes personnalisés (ex: 12m, 24m)
@@ -113,70 +800,60 @@ class DataManager:
         Returns:
             Liste de bougies agrégées
         """
-        source_candles = self.get_candles(source_tf)
-        if not source_candles:
-            return []
-        
-        aggregated = []
-        current_group = []
-        group_start_time = None
-        
-        for candle in source_candles:
-            candle_time = candle["time"]
-            
-            # Déterminer le début du groupe pour cette bougie
-            group_time = (candle_time // (target_minutes * 60)) * (target_minutes * 60)
-            
-            if group_start_time is None:
-                group_start_time = group_time
-            
-            if group_time == group_start_time:
-                current_group.append(candle)
-            else:
-                # Créer la bougie agrégée du groupe précédent
-                if current_group:
-                    agg_candle = self._aggregate_candles(current_group, group_start_time)
-                    aggregated.append(agg_candle)
-                
-                # Nouveau groupe
-                current_group = [candle]
-                group_start_time = group_time
-        
-        # Dernière bougie agrégée
-        if current_group:
-            agg_candle = self._aggregate_candles(current_group, group_start_time)
-            aggregated.append(agg_candle)
-        
-        return aggregated
+        return arrays_to_candles(self.aggregate_many(source_tf, [target_minutes], symbol)[target_minutes])
     
-    def _aggregate_candles(self, candles: List[Dict], timestamp: int) -> Dict:
+    def aggregate_many(self, source_tf: str, target_minutes: List[int],
+                       symbol: Optional[str] = None) -> Dict[int, Dict[str, np.ndarray]]:
         """
-        Agrège plusieurs bougies en une seule
+        Agrège un timeframe source vers plusieurs timeframes cibles en une passe
+        Ex: aggregate_many("1m", [5, 15, 60, 240])
         
         Args:
-            candles: Liste de bougies à agréger
-            timestamp: Timestamp de la bougie agrégée
+            source_tf: Timeframe source (ex: "1m")
+            target_minutes: Durées en minutes des timeframes cibles
         
         Returns:
-            Bougie agrégée
+            {minutes: {field: np.ndarray}} pour chaque cible
         """
-        if not candles:
-            return {}
-        
-        return {
-            "time": timestamp,
-            "open": candles[0]["open"],
-            "high": max(c["high"] for c in candles),
-            "low": min(c["low"] for c in candles),
-            "close": candles[-1]["close"],
-            "volume": sum(c.get("volume", 0) for c in candles)
-        }
+        series = self._get_series(source_tf, symbol, create=False)
+        if series is None:
+            return aggregate_arrays(self.get_arrays(source_tf, symbol), target_minutes)
+        with series.lock:
+            return aggregate_arrays(series.buffer.arrays(), target_minutes)
     
-    def count_candles(self, timeframe: str) -> int:
+    def count_candles(self, timeframe: str, symbol: Optional[str] = None,
+                      include_cold: bool = False) -> int:
         """Retourne le nombre de bougies pour un timeframe"""
-        if timeframe not in self.data:
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None:
             return 0
-        return len(self.data[timeframe])
+        with series.lock:
+            if include_cold and self.cold_budget_bytes is not None:
+                return len(series.buffer) + len(series.buffer.cold)
+            return len(series.buffer)
+    
+    def memory_usage(self, timeframe: str, symbol: Optional[str] = None) -> Dict[str, int]:
+        """
+        Retourne l'occupation mémoire d'un timeframe
+        
+        Returns:
+            {hot_candles, hot_bytes, cold_candles, cold_bytes, cold_evicted}:
+            fenêtre chaude (tableaux préalloués), historique froid compressé et
+            bougies supprimées de l'historique froid pour respecter le budget
+        """
+        usage = {"hot_candles": 0, "hot_bytes": 0, "cold_candles": 0, "cold_bytes": 0, "cold_evicted": 0}
+        series = self._get_series(timeframe, symbol, create=False)
+        if series is None or self.storage != "columnar":
+            return usage
+        with series.lock:
+            usage["hot_candles"] = len(series.buffer)
+            usage["hot_bytes"] = series.buffer.nbytes
+            cold = series.buffer.cold
+            if cold is not None:
+                usage["cold_candles"] = len(cold)
+                usage["cold_bytes"] = cold.nbytes
+                usage["cold_evicted"] = cold.evicted
+        return usage
 
 
 # Test basique
@@ -204,3 +881,72 @@ if __name__ == "__main__":
     agg_5m = dm.aggregate_timeframe("1m", "5m", 5)
     print(f"\nAggregated 5m candles: {len(agg_5m)}")
     print(f"First 5m candle: {agg_5m[0]}")
+    
+    # Agrégation multiple
+    multi = dm.aggregate_many("1m", [5, 15, 60])
+    for minutes, arrays in multi.items():
+        print(f"Aggregated {minutes}m candles: {len(arrays['time'])}")
+    
+    # Non-régression de l'upsert en bloc (merge_arrays): lots aléatoires (désordre, doublons,
+    # bougies plus anciennes que la fenêtre) écrits en bloc vs bougie par bougie
+    rng = np.random.default_rng(0)
+    for storage, cold_budget in (("columnar", None), ("deque", None), ("columnar", 1 << 20)):
+        mismatches = 0
+        for _ in range(2000):
+            capacity = int(rng.integers(5, 60))
+            bulk, reference = (DataManager(max_candles=capacity, storage=storage, cold_budget_bytes=cold_budget)
+                               for _ in range(2))
+            n = int(rng.integers(1, capacity))
+            base = {"time": np.arange(n, dtype=np.int64) * 60,
+                    **{field: rng.random(n) for field in CANDLE_FIELDS[1:]}}
+            n = int(rng.integers(1, 30))
+            batch = {"time": rng.integers(-5, capacity + 10, size=n).astype(np.int64) * 60,
+                     **{field: rng.random(n) for field in CANDLE_FIELDS[1:]}}
+            for dm in (bulk, reference):
+                dm.add_arrays("1m", base)
+            bulk.add_arrays("1m", batch)
+            for candle in arrays_to_candles(batch):
+                reference.add_candle("1m", candle)
+            got = bulk.get_arrays("1m", include_cold=True)
+            expected = reference.get_arrays("1m", include_cold=True)
+            if cold_budget is None:
+                ok = all(np.array_equal(got[field], expected[field]) for field in CANDLE_FIELDS)
+            else:
+                # Bougie par bougie, une bougie plus ancienne que la fenêtre pleine est rejetée
+                # selon l'ordre d'arrivée (même une update d'une bougie déjà dans l'historique
+                # froid): seule la fenêtre chaude est comparée, le tout doit contenir chaque
+                # bougie avec sa dernière version (float32 dans l'historique froid)
+                hot, hot_expected = bulk.get_arrays("1m"), reference.get_arrays("1m")
+                latest = {}
+                for candle in arrays_to_candles(base) + arrays_to_candles(batch):
+                    latest[candle["time"]] = candle
+                truth = candles_to_arrays([latest[t] for t in sorted(latest)])
+                ok = (all(np.array_equal(hot[field], hot_expected[field]) for field in CANDLE_FIELDS)
+                      and np.array_equal(got["time"], truth["time"])
+                      and all(np.allclose(got[field], truth[field], rtol=1e-6) for field in CANDLE_FIELDS))
+            mismatches += not ok
+        print(f"Bulk merge vs per-candle upsert ({storage}, cold={cold_budget}): {mismatches} mismatches / 2000")
+        assert mismatches == 0
+    
+    # Non-régression de l'historique froid: lots en désordre (plus anciens que tout
+    # l'historique, dans un trou, chevauchant froid et chaud) écrits en bloc; le tout doit
+    # rester trié et contenir chaque bougie avec sa dernière version
+    mismatches = 0
+    for _ in range(500):
+        capacity = int(rng.integers(5, 30))
+        dm = DataManager(max_candles=capacity, cold_budget_bytes=1 << 20)
+        latest = {}
+        for _ in range(int(rng.integers(1, 6))):
+            start = int(rng.integers(-50, 50))
+            n = int(rng.integers(1, 40))
+            batch = {"time": (start + np.sort(rng.choice(60, size=n, replace=False))).astype(np.int64) * 60,
+                     **{field: rng.random(n) for field in CANDLE_FIELDS[1:]}}
+            dm.add_arrays("1m", batch)
+            for candle in arrays_to_candles(batch):
+                latest[candle["time"]] = candle
+        got = dm.get_arrays("1m", include_cold=True)
+        truth = candles_to_arrays([latest[t] for t in sorted(latest)])
+        mismatches += not (np.array_equal(got["time"], truth["time"])
+                           and all(np.allclose(got[field], truth[field], rtol=1e-6) for field in CANDLE_FIELDS))
+    print(f"Bulk writes across cold history: {mismatches} mismatches / 500")
+    assert mismatches == 0
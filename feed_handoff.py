@@ -0,0 +1,210 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Éléments en attente au plus (au-delà: politique de la file)
+HANDOFF_MAXSIZE = 4096
+
+# Temps CPU max (secondes) passé à livrer des éléments avant de rendre la main à la boucle
+# (réception WebSocket, pings): borne la latence de réception quel que soit le consommateur
+HANDOFF_SLICE = 0.005
+
+# Tours de boucle sans nouvel élément avant de reprendre la livraison (réception à jour)
+HANDOFF_IDLE_YIELDS = 3
+
+# Politiques quand la file est pleine:
+#   coalesce - les updates d'une même bougie remplacent la précédente (dernière gagne), une
+#              update d'une nouvelle bougie est perdue si la file est pleine
+#   drop     - aucun remplacement, une update de bougie est perdue si la file est pleine
+#   block    - rien n'est perdu: la réception attend que la file repasse sous maxsize (les
+#              updates d'une même bougie restent coalescées)
+# Quelle que soit la politique, les éléments sans clé de coalescence (snapshots, lots
+# d'historique, trades, deltas de carnet) ne sont jamais perdus: déposés au-delà de maxsize,
+# ils font attendre la réception jusqu'à ce que la file repasse sous maxsize.
+HANDOFF_POLICIES = ("coalesce", "drop", "block")
+
+
+class FeedHandoff:
+    """
+    File bornée entre la boucle de réception WebSocket et les consommateurs (callbacks)
+
+    put() est synchrone et ne bloque jamais: la réception décode, route et dépose. Une tâche
+    (run()) livre les éléments dans leur ordre d'arrivée, par tranches d'au plus
+    HANDOFF_SLICE secondes, puis rend la main: un consommateur lent (écriture d'un lot
+    d'historique, verrou du DataManager tenu par une page) ne retarde plus la lecture de
+    la socket ni les pings. Les éléments avec une clé de coalescence (update d'une bougie)
+    remplacent sur place la version encore en attente et gardent sa position (l'update
+    d'une bougie reste livrée avant celles des bougies suivantes). Seul un élément non
+    coalesçable déposé entre-temps (snapshot, lot) fait passer la nouvelle version en fin
+    de file: le snapshot, plus ancien, ne peut pas l'écraser.
+    """
+
+    def __init__(self, maxsize: int = HANDOFF_MAXSIZE, policy: str = "coalesce",
+                 time_slice: float = HANDOFF_SLICE):
+        if policy not in HANDOFF_POLICIES:
+            raise ValueError(f"Unknown handoff policy: {policy} (expected one of {HANDOFF_POLICIES})")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.time_slice = time_slice
+        # {clé: (callback, payload, heure de dépôt, numéro de dépôt)}, ordre = ordre de livraison
+        self._items: "OrderedDict[Hashable, Tuple[Callable, Any, float, int]]" = OrderedDict()
+        self._ids = itertools.count()
+        # Numéro de dépôt du dernier élément non coalesçable
+        self._barrier = -1
+        self._ready: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"enqueued": 0, "delivered": 0, "coalesced": 0, "dropped": 0, "spilled": 0,
+                      "errors": 0, "max_depth": 0, "lag_ms": 0.0, "max_lag_ms": 0.0}
+        # Éléments perdus par nature (ex. "candle"): {kind: count}
+        self.dropped_kinds: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Démarre la tâche de livraison sur la boucle courante"""
+        if not self.running:
+            self._ready = asyncio.Event()
+            self._space = asyncio.Event()
+            self._space.set()
+            if self._items:
+                self._ready.set()
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self, drain: bool = True):
+        """Arrête la livraison (après avoir livré ce qui reste si `drain`)"""
+        if drain:
+            self._deliver(deadline=None)
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def put(self, callback: Callable, payload: Any, coalesce_key: Optional[Hashable] = None,
+            kind: str = "item") -> bool:
+        """
+        Dépose un élément à livrer via callback(payload), sans jamais attendre
+
+        Args:
+            coalesce_key: Clé des updates remplaçables (update d'une bougie), None pour un
+                élément qui ne doit pas être perdu
+            kind: Nature de l'élément, pour les compteurs de pertes (dropped_kinds)
+
+        Returns:
+            False si l'élément a été perdu (file pleine, politique coalesce ou drop)
+        """
+        now = time.perf_counter()
+        self.stats["enqueued"] += 1
+        items = self._items
+        if coalesce_key is not None and self.policy != "drop":
+            key = ("c", coalesce_key)
+            previous = items.get(key)
+            if previous is not None:
+                self.stats["coalesced"] += 1
+                # Garder l'heure de dépôt de la plus ancienne version: le retard reste visible
+                if previous[3] > self._barrier:
+                    items[key] = (callback, payload, previous[2], previous[3])
+                else:
+                    # Un snapshot/lot attend derrière l'ancienne version: livrer après lui
+                    del items[key]
+                    items[key] = (callback, payload, previous[2], next(self._ids))
+                return True
+            seq = next(self._ids)
+        else:
+            key = seq = next(self._ids)
+            if coalesce_key is None:
+                self._barrier = seq
+        if len(items) >= self.maxsize:
+            if coalesce_key is not None and self.policy != "block":
+                self.stats["dropped"] += 1
+                self.dropped_kinds[kind] = self.dropped_kinds.get(kind, 0) + 1
+                return False
+            if self.policy != "block":
+                # Jamais perdu: déposé au-delà de maxsize, la réception attendra (wait_space)
+                self.stats["spilled"] += 1
+        items[key] = (callback, payload, now, seq)
+        depth = len(self._items)
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        if self._ready is not None:
+            self._ready.set()
+            if depth >= self.maxsize:
+                self._space.clear()
+        return True
+
+    async def wait_space(self):
+        """
+        Attend que la file repasse sous maxsize (à appeler par la réception après chaque message)
+
+        Politique block: dès que la file est pleine. Sinon seulement si un élément qui ne
+        peut pas être perdu a été déposé au-delà de maxsize.
+        """
+        depth = len(self._items)
+        if (self._space is not None and self.running
+                and (depth > self.maxsize or (depth == self.maxsize and self.policy == "block"))):
+            await self._space.wait()
+
+    async def run(self):
+        """Livre les éléments en attente, par tranches de time_slice secondes"""
+        while True:
+            await self._ready.wait()
+            self._deliver(deadline=time.perf_counter() + self.time_slice)
+            if not self._items:
+                self._ready.clear()
+            # Rendre la main à la réception tant qu'elle dépose (au plus une tranche): elle vide
+            # son retard socket dans la file, où les updates d'une même bougie se coalescent.
+            # Une frame demande plusieurs tours de boucle (lecture websockets puis recv())
+            deadline = time.perf_counter() + self.time_slice
+            enqueued, idle = self.stats["enqueued"], 0
+            while idle < HANDOFF_IDLE_YIELDS and time.perf_counter() < deadline:
+                await asyncio.sleep(0)
+                if self.stats["enqueued"] != enqueued:
+                    enqueued, idle = self.stats["enqueued"], 0
+                else:
+                    idle += 1
+
+    def _deliver(self, deadline: Optional[float]):
+        """
+        Livre les éléments un par un, dans l'ordre de la file, jusqu'à `deadline`
+
+        Pas de regroupement par série ici: les callbacks de bougie du hub ne font que
+        déposer la dernière version dans son tampon de coalescence, qui écrit chaque série
+        au flush suivant (COALESCE_INTERVAL), et snapshots/lots arrivent déjà en colonnes
+        (un seul add_arrays). Regrouper ici obligerait chaque callback à accepter des listes
+        sans rien gagner sur l'écriture.
+        """
+        items = self._items
+        while items:
+            _, (callback, payload, enqueued_at, _) = items.popitem(last=False)
+            try:
+                callback(payload)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Handoff consumer error: {e}")
+            now = time.perf_counter()
+            lag_ms = (now - enqueued_at) * 1000
+            stats = self.stats
+            stats["delivered"] += 1
+            stats["lag_ms"] += 0.05 * (lag_ms - stats["lag_ms"])  # Moyenne mobile exponentielle
+            if lag_ms > stats["max_lag_ms"]:
+                stats["max_lag_ms"] = lag_ms
+            if deadline is not None and now >= deadline:
+                break
+        if self._space is not None and len(items) < self.maxsize:
+            self._space.set()
+
+    def metrics(self) -> Dict[str, Union[float, str]]:
+        """Compteurs (pertes par nature: dropped_<kind>), profondeur courante de la file et politique"""
+        metrics = dict(self.stats, depth=len(self._items), policy=self.policy)
+        metrics.update((f"dropped_{kind}", count) for kind, count in self.dropped_kinds.items())
+        return metrics
@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Répertoire par défaut des enregistrements (surchargeable par variable d'environnement)
+DEFAULT_RECORDINGS_DIR = os.environ.get("FEED_RECORDINGS_DIR", ".recordings")
+
+
+class FrameRecorder:
+    """
+    Enregistre les frames WebSocket brutes reçues, avec leur heure de réception
+
+    Fichier texte gzip, une frame par ligne: `<timestamp réception (s)>\\t<frame brute>`.
+    Les frames Bitget sont du JSON sur une ligne (ou "pong"); un éventuel saut de ligne
+    est remplacé par un espace, ce qui ne change pas le JSON.
+    """
+
+    def __init__(self, path: str, compresslevel: int = 6):
+        """
+        Args:
+            path: Fichier de sortie (.gz conseillé, toujours écrit compressé)
+            compresslevel: Niveau gzip (6: bon compromis débit / taille)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = gzip.open(path, "at", compresslevel=compresslevel, encoding="utf-8")
+        self.frames = 0
+
+    def write(self, frame, received_at: Optional[float] = None):
+        if isinstance(frame, bytes):
+            frame = frame.decode("utf-8")
+        received_at = time.time() if received_at is None else received_at
+        self._file.write(f"{received_at:.6f}\t{frame.replace(chr(10), ' ')}\n")
+        self.frames += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"💾 Recorded {self.frames} frames to {self.path}")
+
+
+def read_frames(path: str) -> Iterator[Tuple[Optional[float], str]]:
+    """
+    Lit un enregistrement: (timestamp de réception, frame brute)
+
+    Accepte aussi un fichier d'une frame brute par ligne, sans timestamp
+    (timestamp None), compressé (.gz) ou non.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            stamp, sep, frame = line.partition("\t")
+            if sep:
+                try:
+                    yield float(stamp), frame
+                    continue
+                except ValueError:
+                    pass
+            yield None, line
+
+
+class FeedReplay:
+    """
+    Rejoue un enregistrement dans BitgetWebSocketClient.handle_message, sans réseau
+
+    Le chemin de traitement est exactement celui du flux live (routage par abonnement,
+    callbacks, callbacks de lot), seule la source change. Les abonnements du client
+    doivent être déclarés (subscribe()) avant le rejeu.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        """
+        Args:
+            path: Enregistrement de FrameRecorder (ou une frame brute par ligne)
+            speed: 1.0 temps réel, N pour N fois plus vite, None (ou 0) le plus vite possible
+        """
+        self.path = path
+        self.speed = speed or None
+
+    async def run(self, client) -> Dict[str, float]:
+        """
+        Rejoue toutes les frames
+
+        Returns:
+            {frames, seconds, frames_per_sec}
+        """
+        frames = 0
+        first_stamp = None
+        start = time.perf_counter()
+        for stamp, frame in read_frames(self.path):
+            if self.speed is not None and stamp is not None:
+                if first_stamp is None:
+                    first_stamp = stamp
+                delay = (stamp - first_stamp) / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await client.handle_message(frame)
+            frames += 1
+        seconds = time.perf_counter() - start
+        logger.info(f"⏯️ Replayed {frames} frames from {self.path} in {seconds:.2f}s")
+        return {
+            "frames": frames,
+            "seconds": seconds,
+            "frames_per_sec": frames / seconds if seconds > 0 else float("inf"),
+        }
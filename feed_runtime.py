@@ -0,0 +1,119 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+# Boucle uvloop si installée (pip install uvloop, Linux/macOS), sinon la boucle asyncio standard
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+# FEED_UVLOOP=0 force la boucle asyncio standard même si uvloop est installé
+USE_UVLOOP = os.environ.get("FEED_UVLOOP", "1") != "0"
+
+
+def new_event_loop(use_uvloop: Optional[bool] = None) -> asyncio.AbstractEventLoop:
+    """
+    Crée une boucle d'événements: uvloop si demandé et disponible, asyncio sinon
+
+    Args:
+        use_uvloop: True/False pour forcer, None pour USE_UVLOOP (uvloop dès qu'il est installé)
+    """
+    if use_uvloop is None:
+        use_uvloop = USE_UVLOOP
+    if use_uvloop and uvloop is None:
+        logger.debug("uvloop not installed, using the standard asyncio loop")
+    if use_uvloop and uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+class FeedRuntime:
+    """
+    Une boucle asyncio (uvloop si disponible) dans un thread, pour tous les clients WebSocket
+
+    Chaque client ajouté via add() tourne comme une tâche (client.run()) de cette boucle,
+    au lieu d'une boucle et d'un thread par flux: un seul sélecteur pour toutes les
+    sockets, pas de changement de contexte entre threads quasi inactifs. Le MarketDataHub
+    s'exécute sur un FeedRuntime; d'autres clients (ou hubs) peuvent partager le même.
+    """
+
+    def __init__(self, use_uvloop: Optional[bool] = None, name: str = "feed-runtime"):
+        """
+        Args:
+            use_uvloop: Cf. new_event_loop()
+            name: Nom du thread de la boucle
+        """
+        self.loop = new_event_loop(use_uvloop)
+        self.uvloop = uvloop is not None and isinstance(self.loop, uvloop.Loop)
+        # Clients ajoutés: {client: future de leur run()}, tâche une fois démarrée
+        self._futures: Dict[object, concurrent.futures.Future] = {}
+        self._tasks: Dict[object, asyncio.Task] = {}
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name=name)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Planifie une coroutine sur la boucle du runtime (depuis n'importe quel thread)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def add(self, client) -> concurrent.futures.Future:
+        """
+        Lance client.run() comme tâche de la boucle (depuis n'importe quel thread)
+
+        Returns:
+            Future terminée quand run() se termine (après stop_client() ou client.stop())
+        """
+        future = self.submit(self._run_client(client))
+        self._futures[client] = future
+        future.add_done_callback(lambda _: self._futures.pop(client, None))
+        return future
+
+    async def _run_client(self, client):
+        self._tasks[client] = asyncio.current_task()
+        try:
+            await client.run()
+        finally:
+            self._tasks.pop(client, None)
+
+    async def stop_client(self, client):
+        """Arrête un client et attend la fin de sa tâche (à attendre sur la boucle du runtime)"""
+        client.stop()
+        task = self._tasks.get(client)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        else:
+            # Pas encore démarré: ne pas le démarrer
+            future = self._futures.pop(client, None)
+            if future is not None:
+                future.cancel()
+
+    def clients(self) -> int:
+        return len(self._futures)
+
+    def stop(self, timeout: float = 5.0):
+        """Arrête tous les clients (sockets fermées), puis la boucle et son thread"""
+        if not self.alive:
+            return
+
+        async def stop_all():
+            await asyncio.gather(*(self.stop_client(client) for client in list(self._futures)))
+
+        try:
+            self.submit(stop_all()).result(timeout)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            logger.warning("Feed runtime shutdown timed out")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
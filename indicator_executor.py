@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,13 +16,16 @@ class IndicatorExecutor:
         self.last_results = {}
         self.last_error = None
     
-    def execute(self, python_code: str, df: pd.DataFrame) -> Dict[str, Any]:
+    def execute(self, python_code: str, df: pd.DataFrame,
+                display_from: Optional[int] = None) -> Dict[str, Any]:
         """
         Exécute le code Python avec le DataFrame fourni
         
         Args:
             python_code: Code Python à exécuter (doit contenir une fonction calculate(df))
             df: DataFrame avec les données OHLCV
+            display_from: Si spécifié, seuls les points à partir de ce timestamp sont
+                retournés (les bougies antérieures servent uniquement de warm-up)
         
         Returns:
             Dict avec les séries calculées, format: {
@@ -51,7 +54,7 @@ class IndicatorExecutor:
             results = calculate_func(df)
             
             # Convertir les résultats au format lightweight-charts
-            formatted_results = self._format_results(results, df)
+            formatted_results = self._format_results(results, df, display_from)
             
             self.last_results = formatted_results
             return formatted_results
@@ -93,13 +96,15 @@ class IndicatorExecutor:
         
         return context
     
-    def _format_results(self, results: Dict, df: pd.DataFrame) -> Dict[str, Any]:
+    def _format_results(self, results: Dict, df: pd.DataFrame,
+                        display_from: Optional[int] = None) -> Dict[str, Any]:
         """
         Formate les résultats pour lightweight-charts
         
         Args:
             results: Résultats bruts de calculate()
             df: DataFrame original avec timestamps
+            display_from: Timestamp du premier point à conserver
         
         Returns:
             Résultats formatés pour le graphique
@@ -112,13 +117,14 @@ class IndicatorExecutor:
                 if isinstance(value, dict) and 'data' in value:
                     formatted[name] = self._format_series(value['data'], df, 
                                                           value.get('color', 'blue'),
-                                                          value.get('type', 'Line'))
+                                                          value.get('type', 'Line'),
+                                                          display_from)
                 # Si c'est une Series pandas
                 elif isinstance(value, pd.Series):
-                    formatted[name] = self._format_series(value, df, 'blue', 'Line')
+                    formatted[name] = self._format_series(value, df, 'blue', 'Line', display_from)
                 # Si c'est une liste
                 elif isinstance(value, list):
-                    formatted[name] = self._format_series(value, df, 'blue', 'Line')
+                    formatted[name] = self._format_series(value, df, 'blue', 'Line', display_from)
                 else:
                     logger.warning(f"Unknown result type for {name}: {type(value)}")
             
@@ -128,7 +134,7 @@ class IndicatorExecutor:
         return formatted
     
     def _format_series(self, data: Any, df: pd.DataFrame, color: str, 
-                      series_type: str) -> Dict[str, Any]:
+                      series_type: str, display_from: Optional[int] = None) -> Dict[str, Any]:
         """
         Convertit une série de données au format lightweight-charts
         
@@ -137,6 +143,7 @@ class IndicatorExecutor:
             df: DataFrame avec les timestamps
             color: Couleur de la série
             series_type: Type de série (Line, Histogram, etc.)
+            display_from: Timestamp du premier point à conserver (None pour tous)
         
         Returns:
             Dict formaté pour lightweight-charts
@@ -155,9 +162,11 @@ class IndicatorExecutor:
         timestamps = df['time'].tolist() if 'time' in df.columns else range(len(values))
         
         for i, (timestamp, value) in enumerate(zip(timestamps, values)):
-            # Ignorer les NaN
+            # Ignorer les NaN et les bougies de warm-up
             if pd.isna(value):
                 continue
+            if display_from is not None and timestamp < display_from:
+                continue
             
             points.append({
                 'time': int(timestamp),
@@ -0,0 +1,528 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data_manager import DataManager
+from feed_runtime import FeedRuntime
+from order_book import BOOK_CHANNEL, OrderBook
+from tick_aggregator import TICK_TIMEFRAMES, TRADE_CHANNEL, TickAggregator
+
+logger = logging.getLogger(__name__)
+
+# Un flux qu'aucun lecteur n'a demandé depuis ce délai (secondes) est désabonné
+FEED_IDLE_TIMEOUT = 600
+
+# Intervalle minimum (secondes) entre deux écritures des bougies clôturées dans le store
+PERSIST_INTERVAL = 10
+
+# Nombre de mises à jour conservées par topic pour les lecteurs en retard
+UPDATE_RING_CAPACITY = 1024
+
+# Fenêtre de coalescence (secondes): les updates d'une même bougie reçues pendant cette
+# fenêtre ne coûtent qu'une écriture dans le DataManager et une publication (la dernière)
+COALESCE_INTERVAL = 0.05
+
+
+class UpdateRing:
+    """
+    Ring buffer de mises à jour d'un topic (symbol, timeframe), un écrivain et N lecteurs
+
+    Chaque mise à jour reçoit un numéro de séquence croissant. Un lecteur garde son propre
+    curseur (dernière séquence lue) et ne lit que ce qui a été publié depuis: rien n'est
+    copié par lecteur. Un lecteur qui a pris plus de `capacity` mises à jour de retard
+    est signalé (missed) et doit se resynchroniser depuis le DataManager.
+    """
+
+    def __init__(self, capacity: int = UPDATE_RING_CAPACITY):
+        self.capacity = capacity
+        self._items: List[Optional[Dict]] = [None] * capacity
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def seq(self) -> int:
+        """Séquence de la dernière mise à jour publiée (0 si aucune)"""
+        return self._seq
+
+    def publish(self, candle: Dict):
+        with self._lock:
+            self._items[self._seq % self.capacity] = candle
+            self._seq += 1
+
+    def read(self, cursor: int) -> Tuple[int, List[Dict], bool]:
+        """
+        Lit les mises à jour publiées après `cursor`
+
+        Returns:
+            (nouveau curseur, mises à jour, missed) où missed indique que des mises
+            à jour ont été écrasées avant d'être lues
+        """
+        with self._lock:
+            seq = self._seq
+            if cursor >= seq:
+                return seq, [], False
+            first = max(cursor, seq - self.capacity)
+            items = [self._items[i % self.capacity] for i in range(first, seq)]
+        return seq, items, first > cursor
+
+
+class _Feed:
+    """Abonnement d'un (symbol, timeframe) sur la connexion du hub"""
+
+    def __init__(self, symbol: str, timeframe: str, rollup_timeframes: List[str]):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.rollup_timeframes = rollup_timeframes
+        # Lecteurs abonnés: {reader: dernier ensure()}
+        self.readers: Dict[str, float] = {}
+        self.last_persist = 0.0
+        # Écriture en cours dans le store (thread d'écriture du hub)
+        self.persisting: Optional[concurrent.futures.Future] = None
+        # Ouverture en cours (historique REST + subscribe), annulable
+        self.opening: Optional[concurrent.futures.Future] = None
+
+
+class MarketDataHub:
+    """
+    Hub de données de marché du processus
+
+    Tourne sur une seule boucle asyncio (un thread, FeedRuntime, uvloop si disponible) avec
+    une seule connexion WebSocket multiplexée. Les lecteurs déclarent leur intérêt via ensure(): le premier lecteur
+    d'un timeframe déclenche le chargement de l'historique et l'abonnement, les suivants
+    ne font que renouveler leur bail. Un flux est désabonné (et son chargement en cours
+    annulé) dès que son dernier lecteur le libère via release() ou expire.
+    Les bougies sont écrites dans le DataManager partagé et publiées dans un UpdateRing
+    par topic, lu via des curseurs propres à chaque lecteur. Les updates successives d'une
+    même bougie (symbol, timeframe, time) sont coalescées: seule la dernière reçue pendant
+    COALESCE_INTERVAL est écrite et publiée.
+    Les timeframes sous la minute (TICK_TIMEFRAMES) sont servis par le flux des trades du
+    symbole, agrégé au fil de l'eau par un TickAggregator (cf. trades()). Le carnet d'ordres
+    L2 d'un symbole est un flux BOOK_CHANNEL tenu dans un OrderBook (cf. book()).
+    CPU et nombre de sockets ne dépendent donc que des flux suivis, pas des lecteurs.
+    """
+
+    def __init__(self, data_manager: DataManager, symbol: str = "BTCUSDT",
+                 history_depth: Optional[int] = None, handoff_policy: Optional[str] = "coalesce",
+                 runtime: Optional[FeedRuntime] = None, use_uvloop: Optional[bool] = None):
+        """
+        Args:
+            data_manager: DataManager partagé alimenté par le hub
+            symbol: Symbole par défaut de ensure()/read()
+            history_depth: Bougies d'historique REST chargées par timeframe à l'ouverture
+                d'un flux (défaut: celle du client WebSocket)
+            handoff_policy: Politique de la file entre réception et écritures (cf. feed_handoff),
+                None pour écrire depuis la boucle de réception
+            runtime: Boucle partagée sur laquelle tourne le hub (défaut: un FeedRuntime propre
+                au hub, arrêté par stop())
+            use_uvloop: uvloop pour la boucle propre au hub (cf. feed_runtime.new_event_loop)
+        """
+        self.data_manager = data_manager
+        self.symbol = symbol
+        self.history_depth = history_depth
+        self.handoff_policy = handoff_policy
+        self._feeds: Dict[Tuple[str, str], _Feed] = {}
+        self._rings: Dict[Tuple[str, str], UpdateRing] = {}
+        # Agrégateurs des flux de trades, par symbole
+        self._aggregators: Dict[str, TickAggregator] = {}
+        # Carnets d'ordres des flux books, par symbole
+        self._books: Dict[str, OrderBook] = {}
+        self._lock = threading.Lock()
+
+        # Updates en attente d'écriture: {(symbol, timeframe, time): (write, candle)}
+        self._pending: Dict[Tuple[str, str, int], Tuple[Callable, Dict]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._updates_received = 0
+        self._updates_written = 0
+
+        # Écritures disque du store hors de la boucle: un seul thread, dans l'ordre de soumission
+        self._writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="candle-store")
+
+        self._client = None
+        self._owns_runtime = runtime is None
+        self._runtime = runtime or FeedRuntime(use_uvloop, name="market-hub")
+        self._loop = self._runtime.loop
+
+    def _submit(self, coro):
+        """Planifie une coroutine sur la boucle du hub (depuis n'importe quel thread)"""
+        return self._runtime.submit(coro)
+
+    def ensure(self, timeframe: str, symbol: Optional[str] = None, reader: str = "default") -> bool:
+        """
+        Déclare l'intérêt d'un lecteur pour `timeframe` (ou le timeframe dont il est dérivé)
+        À rappeler régulièrement: un lecteur silencieux depuis FEED_IDLE_TIMEOUT expire
+
+        Args:
+            reader: Identifiant du lecteur (ex: une session Streamlit)
+
+        Returns:
+            True si un nouvel abonnement a été ouvert
+        """
+        symbol = symbol or self.symbol
+        feed_tf = self._source_timeframe(timeframe)
+        key = (symbol, feed_tf)
+        now = time.time()
+
+        with self._lock:
+            self._close_idle(now)
+            feed = self._feeds.get(key)
+            if feed is not None:
+                feed.readers[reader] = now
+                return False
+
+            data_manager = self.data_manager
+            if feed_tf == TRADE_CHANNEL:
+                rollup_timeframes = list(TICK_TIMEFRAMES)
+            elif feed_tf == BOOK_CHANNEL:
+                rollup_timeframes = []
+            elif feed_tf == data_manager.base_timeframe:
+                rollup_timeframes = data_manager.rollup_timeframes
+            else:
+                rollup_timeframes = []
+            feed = _Feed(symbol, feed_tf, rollup_timeframes)
+            feed.readers[reader] = now
+            self._feeds[key] = feed
+
+        # Historique local d'abord, le REST ne complète que la fin manquante (pas d'historique trades / carnet)
+        history_since = ({} if feed_tf in (TRADE_CHANNEL, BOOK_CHANNEL) else
+                         {tf: self.data_manager.warm_start(tf, symbol) for tf in rollup_timeframes + [feed_tf]})
+        feed.opening = self._submit(self._open(feed, history_since))
+        return True
+
+    def release(self, timeframe: str, symbol: Optional[str] = None, reader: str = "default"):
+        """
+        Libère l'intérêt d'un lecteur (ex: changement de timeframe)
+        Le flux est désabonné si c'était son dernier lecteur, la connexion est conservée
+        """
+        key = (symbol or self.symbol, self._source_timeframe(timeframe))
+        with self._lock:
+            feed = self._feeds.get(key)
+            if feed is None:
+                return
+            feed.readers.pop(reader, None)
+            if not feed.readers:
+                self._close_feed(key)
+
+    def switch(self, old_timeframe: Optional[str], new_timeframe: str,
+               symbol: Optional[str] = None, reader: str = "default") -> bool:
+        """
+        Bascule un lecteur d'un timeframe à un autre sur la même connexion
+        (abonnement au nouveau flux, désabonnement de l'ancien s'il n'a plus de lecteur)
+
+        Returns:
+            True si un nouvel abonnement a été ouvert
+        """
+        opened = self.ensure(new_timeframe, symbol, reader)
+        if old_timeframe is not None and (self._source_timeframe(old_timeframe)
+                                          != self._source_timeframe(new_timeframe)):
+            self.release(old_timeframe, symbol, reader)
+        return opened
+
+    def _source_timeframe(self, timeframe: str) -> str:
+        """Flux qui alimente `timeframe`: les trades sous la minute, sinon le timeframe source du DataManager"""
+        if timeframe == TRADE_CHANNEL or timeframe in TICK_TIMEFRAMES:
+            return TRADE_CHANNEL
+        if timeframe == BOOK_CHANNEL:
+            return BOOK_CHANNEL
+        return self.data_manager.source_timeframe(timeframe)
+
+    def trades(self, symbol: Optional[str] = None) -> TickAggregator:
+        """
+        Agrégateur des trades d'un symbole (volume agresseur réel, buckets sous la minute)
+        Vide tant qu'aucun lecteur n'a demandé le flux: ensure(TRADE_CHANNEL) ou un timeframe de TICK_TIMEFRAMES
+        """
+        symbol = symbol or self.symbol
+        aggregator = self._aggregators.get(symbol)
+        if aggregator is None:
+            with self._lock:
+                aggregator = self._aggregators.setdefault(symbol, TickAggregator())
+        return aggregator
+
+    def book(self, symbol: Optional[str] = None) -> OrderBook:
+        """
+        Carnet d'ordres L2 d'un symbole (OrderBook.snapshot() pour le lire)
+        Vide tant qu'aucun lecteur n'a demandé le flux: ensure(BOOK_CHANNEL)
+        """
+        symbol = symbol or self.symbol
+        book = self._books.get(symbol)
+        if book is None:
+            with self._lock:
+                book = self._books.setdefault(symbol, OrderBook(symbol))
+        return book
+
+    def read(self, timeframe: str, cursor: int = 0,
+             symbol: Optional[str] = None) -> Tuple[int, List[Dict], bool]:
+        """
+        Lit les bougies publiées pour un timeframe depuis le curseur d'un lecteur
+
+        Returns:
+            (nouveau curseur, bougies, missed), cf. UpdateRing.read
+        """
+        return self._ring(symbol or self.symbol, timeframe).read(cursor)
+
+    def active(self) -> List[Tuple[str, str]]:
+        """Retourne les (symbol, timeframe) des flux abonnés"""
+        with self._lock:
+            return list(self._feeds)
+
+    def close(self, timeframe: str, symbol: Optional[str] = None):
+        """Désabonne un flux, quels que soient ses lecteurs"""
+        with self._lock:
+            self._close_feed((symbol or self.symbol, timeframe))
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Compteurs observables du hub
+
+        Returns:
+            {feeds, readers, subscriptions, sockets, opening, hub_threads, uvloop, process_threads,
+            updates_received, updates_written, coalescing_ratio, trades_received,
+            book_updates, book_resyncs, handoff_depth, handoff_max_depth, handoff_lag_ms,
+            handoff_max_lag_ms, handoff_coalesced, handoff_dropped} où coalescing_ratio est
+            le nombre d'updates reçues par écriture effective (1.0: aucune coalescence) et
+            handoff_lag_ms le retard moyen (ms) entre réception et livraison aux écritures
+        """
+        with self._lock:
+            feeds = list(self._feeds.values())
+            aggregators = list(self._aggregators.values())
+            books = list(self._books.values())
+        client = self._client
+        handoff = client.handoff.metrics() if client is not None and client.handoff is not None else {}
+        return {
+            "feeds": len(feeds),
+            "readers": len({reader for feed in feeds for reader in feed.readers}),
+            "subscriptions": len(client.subscriptions) if client is not None else 0,
+            "sockets": int(client is not None and client.connected),
+            "opening": sum(1 for feed in feeds if feed.opening is not None and not feed.opening.done()),
+            "hub_threads": int(self._runtime.alive),
+            "uvloop": int(self._runtime.uvloop),
+            "process_threads": threading.active_count(),
+            "updates_received": self._updates_received,
+            "updates_written": self._updates_written,
+            "coalescing_ratio": self._updates_received / max(self._updates_written, 1),
+            "trades_received": sum(aggregator.trades_received for aggregator in aggregators),
+            "book_updates": sum(book.stats["updates"] for book in books),
+            "book_resyncs": sum(book.stats["checksum_errors"] for book in books),
+            "handoff_depth": handoff.get("depth", 0),
+            "handoff_max_depth": handoff.get("max_depth", 0),
+            "handoff_lag_ms": handoff.get("lag_ms", 0.0),
+            "handoff_max_lag_ms": handoff.get("max_lag_ms", 0.0),
+            "handoff_coalesced": handoff.get("coalesced", 0),
+            "handoff_dropped": handoff.get("dropped", 0),
+        }
+
+    def _ring(self, symbol: str, timeframe: str) -> UpdateRing:
+        key = (symbol, timeframe)
+        ring = self._rings.get(key)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(key, UpdateRing())
+        return ring
+
+    def _close_idle(self, now: float):
+        """Expire les lecteurs silencieux et désabonne les flux sans lecteur (verrou tenu)"""
+        for key, feed in list(self._feeds.items()):
+            for reader, last_seen in list(feed.readers.items()):
+                if now - last_seen > FEED_IDLE_TIMEOUT:
+                    del feed.readers[reader]
+            if not feed.readers:
+                logger.info(f"Closing idle feed {key[0]} {key[1]}")
+                self._close_feed(key)
+
+    def _close_feed(self, key: Tuple[str, str]):
+        """Retire un flux, annule son ouverture en cours et le désabonne (verrou tenu)"""
+        feed = self._feeds.pop(key, None)
+        if feed is None:
+            return
+        if feed.opening is not None:
+            feed.opening.cancel()
+        self._submit(self._close(feed))
+
+    def _ensure_client(self):
+        """Crée la connexion multiplexée au premier abonnement (boucle du hub)"""
+        if self._client is None:
+            from bitget_ws_client import BitgetWebSocketClient
+            self._client = BitgetWebSocketClient(symbol=self.symbol, timeframe=None,
+                                                 history_depth=self.history_depth,
+                                                 handoff_policy=self.handoff_policy)
+            self._runtime.add(self._client)
+        return self._client
+
+    def _callback(self, feed: _Feed, timeframe: str):
+        data_manager = self.data_manager
+        ring = self._ring(feed.symbol, timeframe)
+        rollup_rings = [(tf, self._ring(feed.symbol, tf)) for tf in feed.rollup_timeframes]
+        is_feed_tf = timeframe == feed.timeframe
+
+        def write(candle):
+            data_manager.add_candle(timeframe, candle, symbol=feed.symbol)
+            ring.publish(candle)
+            if is_feed_tf:
+                # Bougies dérivées mises à jour par le rollup
+                for tf, rollup_ring in rollup_rings:
+                    latest = data_manager.get_latest_candle(tf, feed.symbol)
+                    if latest is not None:
+                        rollup_ring.publish(latest)
+            self._persist(feed)
+
+        def on_candle(candle):
+            self._coalesce((feed.symbol, timeframe, candle["time"]), write, candle)
+        return on_candle
+
+    def _coalesce(self, key: Tuple[str, str, int], write: Callable, candle: Dict):
+        """Garde la dernière version de chaque bougie jusqu'au prochain flush (boucle du hub)"""
+        self._updates_received += 1
+        self._pending[key] = (write, candle)
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(COALESCE_INTERVAL, self._flush)
+
+    def _flush(self):
+        """Écrit et publie les updates en attente, dans leur ordre d'arrivée (boucle du hub)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        for write, candle in pending.values():
+            write(candle)
+        self._updates_written += len(pending)
+
+    def _trade_callback(self, feed: _Feed):
+        """
+        Callback du flux trades: chaque message est agrégé tout de suite (en colonnes), les
+        bougies sous la minute touchées ne sont écrites et publiées qu'au flush suivant
+        """
+        data_manager = self.data_manager
+        aggregator = self.trades(feed.symbol)
+        rings = [(tf, seconds, self._ring(feed.symbol, tf)) for tf, seconds in TICK_TIMEFRAMES.items()]
+        # Plus ancien bucket modifié depuis la dernière écriture, par taille de bucket
+        dirty: Dict[int, int] = {}
+
+        def write(_):
+            for tf, seconds, ring in rings:
+                since = dirty.pop(seconds, None)
+                if since is None:
+                    continue
+                # Buckets modifiés en colonnes: un seul upsert en bloc par timeframe
+                data_manager.add_arrays(tf, aggregator.candles(seconds, since), symbol=feed.symbol)
+                latest = data_manager.get_latest_candle(tf, feed.symbol)
+                if latest is not None:
+                    ring.publish(latest)
+
+        def on_trades(trades):
+            for seconds, first_touched in aggregator.add_trades(trades).items():
+                dirty[seconds] = min(first_touched, dirty.get(seconds, first_touched))
+            self._coalesce((feed.symbol, TRADE_CHANNEL, 0), write, None)
+        return on_trades
+
+    def _batch_callback(self, feed: _Feed, timeframe: str):
+        """Callback des lots (snapshots, historique): ajout en bloc, seule la dernière bougie est publiée"""
+        data_manager = self.data_manager
+        timeframes = [timeframe] + (feed.rollup_timeframes if timeframe == feed.timeframe else [])
+        rings = [(tf, self._ring(feed.symbol, tf)) for tf in timeframes]
+
+        def on_batch(arrays):
+            # Les updates en attente sont plus anciennes que le lot: les écrire d'abord
+            self._flush()
+            data_manager.add_arrays(timeframe, arrays, symbol=feed.symbol)
+            for tf, ring in rings:
+                latest = data_manager.get_latest_candle(tf, feed.symbol)
+                if latest is not None:
+                    ring.publish(latest)
+            self._persist(feed)
+        return on_batch
+
+    async def _open(self, feed: _Feed, history_since: Dict[str, Optional[int]]):
+        """Charge l'historique REST puis abonne le flux sur la connexion partagée"""
+        client = self._ensure_client()
+        try:
+            if feed.timeframe == TRADE_CHANNEL:
+                # Trades manqués (reconnexion, période sans abonnement): bougies non couvertes
+                await client.subscribe_trades(feed.symbol, self._trade_callback(feed),
+                                              on_gap=self.trades(feed.symbol).mark_gap)
+                logger.info(f"🚀 Subscribed shared trade feed {feed.symbol}")
+                return
+            if feed.timeframe == BOOK_CHANNEL:
+                await client.subscribe_book(feed.symbol, book=self.book(feed.symbol))
+                logger.info(f"🚀 Subscribed shared order book {feed.symbol}")
+                return
+            # Historique REST du flux et des timeframes dérivés (une seule fois, pas d'abonnement
+            # dédié), chargés en parallèle: chaque timeframe s'affiche dès son premier lot
+            await asyncio.gather(*(
+                client.fetch_historical_candles(feed.symbol, tf, self._callback(feed, tf), history_since.get(tf),
+                                                batch_callback=self._batch_callback(feed, tf))
+                for tf in feed.rollup_timeframes + [feed.timeframe]
+            ))
+            # Lots plus anciens arrivés après la première écriture (PERSIST_INTERVAL): tout
+            # l'historique chargé est écrit maintenant, pas seulement la fenêtre récente
+            self._persist(feed, force=True)
+            if self._feeds.get((feed.symbol, feed.timeframe)) is feed:
+                await client.subscribe(feed.symbol, feed.timeframe, self._callback(feed, feed.timeframe),
+                                       batch_callback=self._batch_callback(feed, feed.timeframe))
+                logger.info(f"🚀 Subscribed shared feed {feed.symbol} {feed.timeframe}")
+        except Exception as e:
+            logger.error(f"Failed to open feed {feed.symbol} {feed.timeframe}: {e}")
+
+    async def _close(self, feed: _Feed):
+        if self._client is not None:
+            if feed.timeframe == TRADE_CHANNEL:
+                await self._client.unsubscribe_trades(feed.symbol)
+            elif feed.timeframe == BOOK_CHANNEL:
+                await self._client.unsubscribe_book(feed.symbol)
+            else:
+                await self._client.unsubscribe(feed.symbol, feed.timeframe)
+        self._persist(feed, force=True)
+
+    def _persist(self, feed: _Feed, force: bool = False):
+        """
+        Écrit les bougies clôturées du flux dans le store (au plus toutes les PERSIST_INTERVAL
+        secondes), sur le thread d'écriture: la boucle du hub ne fait jamais d'I/O disque
+        """
+        if feed.timeframe in (TRADE_CHANNEL, BOOK_CHANNEL):
+            return  # Bougies sous la minute et carnet: mémoire seulement
+        now = time.time()
+        if not force and (now - feed.last_persist < PERSIST_INTERVAL
+                          or (feed.persisting is not None and not feed.persisting.done())):
+            return
+        feed.last_persist = now
+        try:
+            feed.persisting = self._writer.submit(self._write_store, feed)
+        except RuntimeError:
+            pass  # Thread d'écriture arrêté (stop()): les écritures finales ont été faites
+
+    def _write_store(self, feed: _Feed):
+        """Écrit les timeframes d'un flux dans le store (thread d'écriture)"""
+        for tf in [feed.timeframe] + feed.rollup_timeframes:
+            try:
+                self.data_manager.persist(tf, feed.symbol)
+            except OSError as e:
+                logger.error(f"Failed to persist {feed.symbol} {tf}: {e}")
+
+    def stop(self, timeout: float = 5.0):
+        """Annule les chargements en cours, ferme la connexion et arrête la boucle du hub"""
+        with self._lock:
+            feeds = list(self._feeds.values())
+            self._feeds.clear()
+        for feed in feeds:
+            if feed.opening is not None:
+                feed.opening.cancel()
+
+        if self._runtime.alive:
+            try:
+                self._submit(self._shutdown()).result(timeout)
+            except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+                logger.warning("Market hub shutdown timed out")
+            if self._owns_runtime:
+                self._runtime.stop(timeout)
+
+        for feed in feeds:
+            self._persist(feed, force=True)
+        self._writer.shutdown(wait=True)
+
+    async def _shutdown(self):
+        """Annule la tâche du client (qui livre sa file), attend la fermeture de la socket puis écrit les updates en attente"""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await self._runtime.stop_client(client)
+        self._flush()
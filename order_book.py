@@ -0,0 +1,266 @@
+import logging
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Channel Bitget du carnet complet incrémental (snapshot puis deltas, checksum CRC32)
+BOOK_CHANNEL = "books"
+
+# Channels carnet acceptés: books (incrémental) et books1/5/15 (snapshot à chaque message)
+BOOK_CHANNELS = ("books", "books1", "books5", "books15")
+
+# Nombre de niveaux par côté couverts par le checksum Bitget
+CHECKSUM_LEVELS = 25
+
+
+def parse_levels(rows: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convertit des niveaux Bitget [[price, size], ...] (chaînes) en colonnes
+
+    Les chaînes d'origine sont gardées: le checksum Bitget porte sur leur forme exacte
+    ("27000.50" et "27000.5" ne donnent pas le même CRC).
+
+    Returns:
+        (values, text): float64 (n, 2) [prix, taille] et object (n, 2) des chaînes d'origine
+    """
+    text = np.empty((len(rows), 2), dtype=object)
+    if rows:
+        text[:] = [row[:2] for row in rows]
+    return text.astype(np.float64), text
+
+
+class _BookSide:
+    """
+    Un côté du carnet, trié du meilleur au moins bon prix
+
+    Deux tableaux alignés: `levels` (n, 2) [clé, taille] en float64 et `text` (n, 2) des
+    chaînes [prix, taille] pour le checksum. La clé est croissante (prix pour les asks,
+    -prix pour les bids), ce qui permet le même searchsorted des deux côtés.
+    """
+
+    def __init__(self, descending: bool):
+        self.sign = -1.0 if descending else 1.0
+        self.levels = np.empty((0, 2))
+        self.text = np.empty((0, 2), dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.levels[:, 0] * self.sign
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self.levels[:, 1]
+
+    def reset(self, rows: List[List[str]]):
+        values, text = parse_levels(rows)
+        values[:, 0] *= self.sign
+        order = np.argsort(values[:, 0], kind="stable")
+        order = order[values[order, 1] > 0]
+        self.levels, self.text = values[order], text[order]
+
+    def apply(self, rows: List[List[str]]) -> int:
+        """
+        Applique des deltas (taille 0 = niveau supprimé)
+
+        Les niveaux existants sont modifiés en place; suppressions et insertions se font
+        en un np.delete / np.insert par tableau, quel que soit le nombre de niveaux touchés.
+
+        Returns:
+            Nombre de niveaux touchés
+        """
+        if not rows:
+            return 0
+        if len({row[0] for row in rows}) < len(rows):
+            # Même prix plusieurs fois dans un message: seule la dernière taille compte
+            rows = list({row[0]: row for row in rows}.values())
+        values, text = parse_levels(rows)
+        keys = values[:, 0] * self.sign
+        sizes = values[:, 1]
+        book_keys = self.levels[:, 0]
+        index = np.searchsorted(book_keys, keys)
+        found = index < len(book_keys)
+        found[found] = book_keys[index[found]] == keys[found]
+
+        changed = found & (sizes > 0)
+        if changed.any():
+            self.levels[index[changed], 1] = sizes[changed]
+            self.text[index[changed], 1] = text[changed, 1]
+
+        removed = index[found & (sizes == 0)]
+        inserted = ~found & (sizes > 0)
+        if len(removed):
+            self.levels = np.delete(self.levels, removed, axis=0)
+            self.text = np.delete(self.text, removed, axis=0)
+        if inserted.any():
+            order = np.flatnonzero(inserted)[np.argsort(keys[inserted], kind="stable")]
+            position = np.searchsorted(self.levels[:, 0], keys[order])
+            values[:, 0] = keys
+            self.levels = np.insert(self.levels, position, values[order], axis=0)
+            self.text = np.insert(self.text, position, text[order], axis=0)
+        return len(rows)
+
+    def trim(self, max_levels: int):
+        if len(self.levels) > max_levels:
+            self.levels = self.levels[:max_levels]
+            self.text = self.text[:max_levels]
+
+
+class OrderBook:
+    """
+    Carnet L2 d'un symbole, en tableaux NumPy triés (un par côté et par champ)
+
+    Alimenté par les messages du channel books: un snapshot remplace le carnet, une update
+    applique ses deltas en place (_BookSide.apply). Après chaque message, le checksum CRC32
+    Bitget des CHECKSUM_LEVELS meilleurs niveaux est vérifié: en cas d'écart (ou de carnet
+    croisé) le carnet est marqué invalide et ignore les updates jusqu'au prochain snapshot,
+    que le client redemande. Écrit depuis la boucle du client, lu depuis les sessions
+    Streamlit via snapshot() (copies des meilleurs niveaux, sous verrou).
+    """
+
+    def __init__(self, symbol: str, max_levels: Optional[int] = None, verify_checksum: bool = True):
+        """
+        Args:
+            max_levels: Niveaux gardés par côté (défaut: tous ceux envoyés par Bitget)
+            verify_checksum: Vérifier le checksum de chaque message (si Bitget en fournit un)
+        """
+        self.symbol = symbol
+        self.max_levels = max_levels
+        self.verify_checksum = verify_checksum
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.valid = False
+        self.ts = 0
+        self.seq = 0
+        # Incrémentée à chaque message appliqué: un lecteur peut ignorer un carnet inchangé
+        self.version = 0
+        self.stats = {"snapshots": 0, "updates": 0, "levels": 0, "checksum_errors": 0}
+        self._lock = threading.Lock()
+
+    def apply_snapshot(self, data: Dict) -> bool:
+        """Remplace le carnet. Returns: False si le checksum ne correspond pas"""
+        with self._lock:
+            self.bids.reset(data.get("bids") or [])
+            self.asks.reset(data.get("asks") or [])
+            self.stats["snapshots"] += 1
+            return self._commit(data)
+
+    def apply_update(self, data: Dict) -> bool:
+        """
+        Applique un message incrémental
+
+        Returns:
+            False si le carnet est désynchronisé (checksum, carnet croisé, ou déjà invalide):
+            un nouveau snapshot est nécessaire
+        """
+        with self._lock:
+            if not self.valid:
+                return False
+            touched = self.bids.apply(data.get("bids") or []) + self.asks.apply(data.get("asks") or [])
+            self.stats["updates"] += 1
+            self.stats["levels"] += touched
+            return self._commit(data)
+
+    def _commit(self, data: Dict) -> bool:
+        """Vérifie le carnet après un message et publie la nouvelle version (verrou tenu)"""
+        if self.max_levels is not None:
+            self.bids.trim(self.max_levels)
+            self.asks.trim(self.max_levels)
+        self.ts = int(data.get("ts") or self.ts)
+        self.seq = int(data.get("seq") or self.seq)
+        expected = data.get("checksum")
+        crossed = len(self.bids) and len(self.asks) and self.bids.prices[0] >= self.asks.prices[0]
+        if crossed or (self.verify_checksum and expected and int(expected) != self.checksum()):
+            self.valid = False
+            self.stats["checksum_errors"] += 1
+            logger.warning(f"⚠️ Order book {self.symbol} out of sync (seq {self.seq}), waiting for a new snapshot")
+            return False
+        self.valid = True
+        self.version += 1
+        return True
+
+    def checksum(self, levels: int = CHECKSUM_LEVELS) -> int:
+        """
+        Checksum Bitget: CRC32 signé de "bid1_prix:bid1_taille:ask1_prix:ask1_taille:bid2..."
+        sur les `levels` meilleurs niveaux, chaînes d'origine
+        """
+        bids, asks = self.bids, self.asks
+        n_bids, n_asks = min(levels, len(bids)), min(levels, len(asks))
+        if n_bids == n_asks:
+            # Cas courant: entrelacement bid/ask en une opération
+            parts = np.concatenate((bids.text[:n_bids], asks.text[:n_asks]), axis=1).ravel().tolist()
+            crc = zlib.crc32(":".join(parts).encode())
+            return crc - (1 << 32) if crc >= (1 << 31) else crc
+        parts = []
+        for i in range(max(n_bids, n_asks)):
+            if i < n_bids:
+                parts += bids.text[i].tolist()
+            if i < n_asks:
+                parts += asks.text[i].tolist()
+        crc = zlib.crc32(":".join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def snapshot(self, depth: Optional[int] = None) -> Dict:
+        """
+        Copie des `depth` meilleurs niveaux de chaque côté (tous si None)
+
+        Returns:
+            {bid_price, bid_size, ask_price, ask_size (np.ndarray, meilleur prix en tête),
+            ts (ms), seq, version, valid}
+        """
+        with self._lock:
+            bids, asks = self.bids, self.asks
+            end = depth if depth is not None else max(len(bids), len(asks))
+            return {
+                "bid_price": bids.prices[:end],
+                "bid_size": bids.sizes[:end].copy(),
+                "ask_price": asks.prices[:end],
+                "ask_size": asks.sizes[:end].copy(),
+                "ts": self.ts,
+                "seq": self.seq,
+                "version": self.version,
+                "valid": self.valid,
+            }
+
+    def depth_profile(self, step: float, bins: int = 50) -> Dict[str, np.ndarray]:
+        """
+        Taille cumulée par tranche de prix de `step` autour du mid (colonne de heatmap)
+
+        Returns:
+            {price (centre de tranche), bid_size, ask_size} sur 2 x `bins` tranches
+        """
+        with self._lock:
+            bid_price, bid_size = self.bids.prices, self.bids.sizes.copy()
+            ask_price, ask_size = self.asks.prices, self.asks.sizes.copy()
+        if not len(bid_price) or not len(ask_price):
+            empty = np.empty(0)
+            return {"price": empty, "bid_size": empty, "ask_size": empty}
+        mid = (bid_price[0] + ask_price[0]) / 2
+        base = np.floor(mid / step) - bins
+        result = {"price": (base + np.arange(2 * bins) + 0.5) * step}
+        for name, price, size in (("bid_size", bid_price, bid_size), ("ask_size", ask_price, ask_size)):
+            index = (np.floor(price / step) - base).astype(np.int64)
+            inside = (index >= 0) & (index < 2 * bins)
+            result[name] = np.bincount(index[inside], weights=size[inside], minlength=2 * bins)
+        return result
+
+    def walls(self, n: int = 3, depth: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Les `n` plus gros niveaux de chaque côté parmi les `depth` meilleurs (murs de liquidité)
+
+        Returns:
+            {bid_price, bid_size, ask_price, ask_size}, par taille décroissante
+        """
+        book = self.snapshot(depth)
+        result = {}
+        for side in ("bid", "ask"):
+            order = np.argsort(book[f"{side}_size"])[::-1][:n]
+            result[f"{side}_price"] = book[f"{side}_price"][order]
+            result[f"{side}_size"] = book[f"{side}_size"][order]
+        return result
@@ -9,7 +9,8 @@ import os
 # Ajouter le répertoire parent au path pour importer les modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_manager import DataManager
+from components.market_feed import get_data_manager
+from components.order_book_view import order_book_panel
 from components.timeframe_selector import timeframe_selector
 
 st.set_page_config(layout="wide", page_title="Bitget Sniper + GEX")
@@ -17,9 +18,8 @@ st.set_page_config(layout="wide", page_title="Bitget Sniper + GEX")
 # ==========================================
 # SESSION STATE & DONNÉES PARTAGÉES
 # ==========================================
-# Récupérer le data_manager depuis la session state globale (partagée entre pages)
-if "data_manager" not in st.session_state:
-    st.session_state.data_manager = DataManager(max_candles=500)
+# DataManager partagé par toutes les sessions du processus (cf. components/market_feed.py)
+st.session_state.data_manager = get_data_manager()
 
 if "current_timeframe" not in st.session_state:
     st.session_state.current_timeframe = "1m"
@@ -369,6 +369,13 @@ with col3:
     
     st.write(f"Distance: {abs((last_price - zero_gamma) / last_price * 100):.2f}%")
 
+# ==========================================
+# 7. CARNET D'ORDRES L2 (liquidité réelle)
+# ==========================================
+st.markdown("---")
+st.subheader("📚 Carnet d'Ordres L2")
+order_book_panel()
+
 # Footer
 st.markdown("---")
 st.caption(f"🔄 Timeframe: {st.session_state.current_timeframe} | 📊 Bougies: {len(df)} | 🔴 Données temps réel via Bitget WebSocket")
@@ -9,7 +9,7 @@ import os
 # Ajouter le répertoire parent au path pour importer les modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_manager import DataManager
+from components.market_feed import follow_trades, get_data_manager, trade_volume_split
 from components.timeframe_selector import timeframe_selector
 
 st.set_page_config(layout="wide", page_title="Whale Detector")
@@ -17,8 +17,7 @@ st.set_page_config(layout="wide", page_title="Whale Detector")
 # ==========================================
 # SESSION STATE & DONNÉES PARTAGÉES
 # ==========================================
-if "data_manager" not in st.session_state:
-    st.session_state.data_manager = DataManager(max_candles=500)
+st.session_state.data_manager = get_data_manager()
 
 if "current_timeframe" not in st.session_state:
     st.session_state.current_timeframe = "1m"
@@ -35,6 +34,8 @@ st.caption("Détection d'anomalies de volume - Identifier les gros ordres instit
 with st.sidebar:
     # Sélecteur de timeframe
     current_tf = timeframe_selector("whale_detector")
+    # Flux des trades: volume acheteur/vendeur réel des bougies qu'il couvre
+    follow_trades()
     
     st.markdown("---")
     st.header("⚙️ Configuration Whale Detector")
@@ -78,9 +79,10 @@ if df.empty or len(df) < lookback + 10:
 # 3. CALCULS (WHALE DETECTION)
 # ==========================================
 
-def detect_whale_trades(df, lookback, sensitivity):
+def detect_whale_trades(df, lookback, sensitivity, real_buy=None, real_sell=None):
     """
     Détecte les big trades (whale) basé sur les anomalies de volume
+    real_buy/real_sell: volume agresseur réel par bougie (NaN si inconnu), prioritaire sur l'estimation
     """
     # Calcul du range de chaque bougie
     df['range'] = df['high'] - df['low']
@@ -101,6 +103,12 @@ def detect_whale_trades(df, lookback, sensitivity):
         ((df['high'] - df['close']) / df['range']) * df.get('volume', 0)
     )
     
+    # Volume agresseur réel (flux des trades) là où il couvre la bougie
+    if real_buy is not None:
+        df['real_vol'] = ~np.isnan(real_buy)
+        df['buy_vol'] = np.where(df['real_vol'], real_buy, df['buy_vol'])
+        df['sell_vol'] = np.where(df['real_vol'], real_sell, df['sell_vol'])
+    
     # Moyennes et écarts-types (avec shift pour éviter le look-ahead bias)
     df['avg_buy'] = df['buy_vol'].rolling(lookback).mean().shift(1)
     df['std_buy'] = df['buy_vol'].rolling(lookback).std().shift(1)
@@ -139,7 +147,8 @@ def detect_whale_trades(df, lookback, sensitivity):
 
 # Exécuter la détection
 with st.spinner("🔄 Analyse des volumes..."):
-    df = detect_whale_trades(df, lookback, sensitivity)
+    real_buy, real_sell = trade_volume_split(df, st.session_state.current_timeframe)
+    df = detect_whale_trades(df, lookback, sensitivity, real_buy, real_sell)
 
 # ==========================================
 # 4. MÉTRIQUES
@@ -368,3 +377,4 @@ else:
 st.markdown("---")
 st.caption(f"🔄 Timeframe: {st.session_state.current_timeframe} | 📊 Bougies analysées: {len(df)} | 🔴 Données temps réel via Bitget WebSocket")
 st.caption(f"⚙️ Paramètres: Lookback={lookback}, Sensibilité={sensitivity}σ")
+st.caption(f"🎯 Volume acheteur/vendeur réel (trades) sur {int(df['real_vol'].sum())} bougies, estimé sur les autres")
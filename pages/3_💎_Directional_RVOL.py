@@ -10,7 +10,7 @@ import os
 # Ajouter le répertoire parent au path pour importer les modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_manager import DataManager
+from components.market_feed import follow_trades, get_data_manager, trade_volume_split
 from components.timeframe_selector import timeframe_selector
 
 st.set_page_config(layout="wide", page_title="Directional RVOL")
@@ -18,8 +18,7 @@ st.set_page_config(layout="wide", page_title="Directional RVOL")
 # ==========================================
 # SESSION STATE & DONNÉES PARTAGÉES
 # ==========================================
-if "data_manager" not in st.session_state:
-    st.session_state.data_manager = DataManager(max_candles=500)
+st.session_state.data_manager = get_data_manager()
 
 if "current_timeframe" not in st.session_state:
     st.session_state.current_timeframe = "1m"
@@ -36,6 +35,8 @@ st.caption("Détection d'absorption de volume - Identifier les Limit Orders inst
 with st.sidebar:
     # Sélecteur de timeframe
     current_tf = timeframe_selector("directional_rvol")
+    # Flux des trades: volume acheteur/vendeur réel des bougies qu'il couvre
+    follow_trades()
     
     st.markdown("---")
     st.header("⚙️ Configuration RVOL")
@@ -81,14 +82,21 @@ if df.empty or len(df) < lookback_avg + 10:
 # 3. CALCULS (DIRECTIONAL RVOL)
 # ==========================================
 
-def calculate_directional_rvol(df, lookback, threshold):
+def calculate_directional_rvol(df, lookback, threshold, real_buy=None, real_sell=None):
     """
     Calcule le RVOL directionnel et détecte les absorptions
+    real_buy/real_sell: volume agresseur réel par bougie (NaN si inconnu), prioritaire sur l'estimation
     """
     # Séparation historique buy/sell basée sur la direction de la bougie
     df['hist_buy_vol'] = np.where(df['close'] > df['open'], df.get('volume', 0), 0)
     df['hist_sell_vol'] = np.where(df['close'] < df['open'], df.get('volume', 0), 0)
     
+    # Volume agresseur réel (flux des trades) là où il couvre la bougie
+    if real_buy is not None:
+        df['real_vol'] = ~np.isnan(real_buy)
+        df['hist_buy_vol'] = np.where(df['real_vol'], real_buy, df['hist_buy_vol'])
+        df['hist_sell_vol'] = np.where(df['real_vol'], real_sell, df['hist_sell_vol'])
+    
     # Moyennes historiques (ce qui est "normal")
     df['avg_buy_vol'] = df['hist_buy_vol'].rolling(lookback).mean()
     df['avg_sell_vol'] = df['hist_sell_vol'].rolling(lookback).mean()
@@ -131,7 +139,8 @@ def calculate_directional_rvol(df, lookback, threshold):
 
 # Exécuter le calcul
 with st.spinner("🔄 Calcul du RVOL directionnel..."):
-    df = calculate_directional_rvol(df, lookback_avg, rvol_threshold)
+    real_buy, real_sell = trade_volume_split(df, st.session_state.current_timeframe)
+    df = calculate_directional_rvol(df, lookback_avg, rvol_threshold, real_buy, real_sell)
 
 # ==========================================
 # 4. MÉTRIQUES
@@ -368,3 +377,4 @@ Ces absorptions indiquent souvent des **zones de retournement** où les institut
 st.markdown("---")
 st.caption(f"🔄 Timeframe: {st.session_state.current_timeframe} | 📊 Bougies: {len(df)} | 🔴 Données temps réel via Bitget WebSocket")
 st.caption(f"⚙️ Paramètres: Seuil RVOL={rvol_threshold}x, Moyenne={lookback_avg} périodes")
+st.caption(f"🎯 Volume acheteur/vendeur réel (trades) sur {int(df['real_vol'].sum())} bougies, estimé sur les autres")
@@ -9,7 +9,7 @@ import os
 # Ajouter le répertoire parent au path pour importer les modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_manager import DataManager
+from components.market_feed import get_data_manager
 from components.timeframe_selector import timeframe_selector
 
 st.set_page_config(layout="wide", page_title="FVI Quantum State")
@@ -17,8 +17,7 @@ st.set_page_config(layout="wide", page_title="FVI Quantum State")
 # ==========================================
 # SESSION STATE & DONNÉES PARTAGÉES
 # ==========================================
-if "data_manager" not in st.session_state:
-    st.session_state.data_manager = DataManager(max_candles=500)
+st.session_state.data_manager = get_data_manager()
 
 if "current_timeframe" not in st.session_state:
     st.session_state.current_timeframe = "1m"
@@ -0,0 +1,392 @@
+import threading
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from candle_buffer import CANDLE_FIELDS
+from data_manager import resample_ohlcv
+
+# Channel public Bitget des trades (un message = un ou plusieurs trades, le plus récent en tête)
+TRADE_CHANNEL = "trade"
+
+# Timeframes sous la minute construits à partir des trades: {timeframe: secondes}
+TICK_TIMEFRAMES = {
+    "1s": 1,
+    "5s": 5,
+    "15s": 15,
+}
+
+# Buckets agrégés par défaut: les timeframes ci-dessus + la minute, qui sert au découpage
+# acheteur/vendeur des bougies 1m et plus (cf. TickAggregator.volume_split)
+DEFAULT_BUCKETS = tuple(TICK_TIMEFRAMES.values()) + (60,)
+
+# Colonnes d'un bucket: OHLCV + volume agresseur acheteur/vendeur + nombre de trades
+TICK_FIELDS = CANDLE_FIELDS + ("buy_volume", "sell_volume", "trades")
+TICK_DTYPES = {field: np.float64 for field in TICK_FIELDS}
+TICK_DTYPES["time"] = np.int64
+TICK_DTYPES["trades"] = np.int64
+
+# Buckets conservés par taille (1s: 1h, 5s: 4h, 15s: 12h, 1m: 7 jours)
+DEFAULT_BUCKET_CAPACITY = {1: 3600, 5: 2880, 15: 2880, 60: 10080}
+
+
+def parse_trades(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Convertit les trades d'un message Bitget en colonnes NumPy triées par temps
+
+    Format Bitget: {"ts": "1695716760565", "price": "27000.5", "size": "0.001", "side": "buy", ...}
+    où side est le côté de l'agresseur (taker).
+
+    Returns:
+        {ts (ms, int64), price, size, is_buy (bool)}
+
+    Raises:
+        KeyError, ValueError: Si un trade est incomplet ou non numérique
+    """
+    n = len(rows)
+    # Une seule passe pour les champs numériques (ts en ms: exact en float64)
+    values = chain.from_iterable((row["ts"], row["price"], row["size"]) for row in rows)
+    table = np.fromiter(map(float, values), dtype=np.float64, count=n * 3).reshape(n, 3)
+    ts = table[:, 0].astype(np.int64)
+    price = np.ascontiguousarray(table[:, 1])
+    size = np.ascontiguousarray(table[:, 2])
+    is_buy = np.fromiter((row["side"] == "buy" for row in rows), dtype=bool, count=n)
+    # Bitget envoie le plus récent en tête: tri stable pour garder l'ordre des trades d'une même ms
+    order = np.argsort(ts, kind="stable")
+    return {"ts": ts[order], "price": price[order], "size": size[order], "is_buy": is_buy[order]}
+
+
+def aggregate_trades(trades: Dict[str, np.ndarray], bucket_seconds: int) -> Dict[str, np.ndarray]:
+    """
+    Agrège des trades triés par temps en buckets de `bucket_seconds` (colonnes TICK_FIELDS)
+
+    Même principe que resample_ohlcv: bucket par arithmétique entière, puis une réduction
+    par segment de trades consécutifs du même bucket (reduceat), sans boucle Python.
+    """
+    ts = trades["ts"]
+    if len(ts) == 0:
+        return {field: np.empty(0, dtype=dtype) for field, dtype in TICK_DTYPES.items()}
+    price = trades["price"]
+    size = trades["size"]
+    bucket_ms = bucket_seconds * 1000
+    if ts[0] // bucket_ms == ts[-1] // bucket_ms:
+        # Cas courant: tout le lot tient dans un bucket, réductions simples
+        volume = size.sum()
+        buy_volume = size[trades["is_buy"]].sum()
+        return {
+            "time": np.array([ts[0] // bucket_ms * bucket_seconds]),
+            "open": price[:1],
+            "high": np.array([price.max()]),
+            "low": np.array([price.min()]),
+            "close": price[-1:],
+            "volume": np.array([volume]),
+            "buy_volume": np.array([buy_volume]),
+            "sell_volume": np.array([volume - buy_volume]),
+            "trades": np.array([len(ts)]),
+        }
+    buckets = ts // bucket_ms
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(ts)]))
+    volume = np.add.reduceat(size, starts)
+    buy_volume = np.add.reduceat(np.where(trades["is_buy"], size, 0.0), starts)
+    return {
+        "time": buckets[starts] * bucket_seconds,
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends - 1],
+        "volume": volume,
+        "buy_volume": buy_volume,
+        "sell_volume": volume - buy_volume,
+        "trades": ends - starts,
+    }
+
+
+def resample_ticks(group: Dict[str, np.ndarray], bucket_seconds: int) -> Dict[str, np.ndarray]:
+    """
+    Regroupe des buckets agrégés triés (aggregate_trades) en buckets plus grands
+
+    `bucket_seconds` doit être un multiple de la taille des buckets d'origine. OHLCV par
+    resample_ohlcv, volumes agresseur et nombre de trades sommés par segment (reduceat).
+    """
+    times = group["time"]
+    if len(times) == 0:
+        return group
+    if times[0] // bucket_seconds == times[-1] // bucket_seconds:
+        if len(times) == 1:
+            # Cas courant (un message = un bucket fin): seul le début du bucket change
+            return dict(group, time=times // bucket_seconds * bucket_seconds)
+        return {
+            "time": times[:1] // bucket_seconds * bucket_seconds,
+            "open": group["open"][:1],
+            "high": np.array([group["high"].max()]),
+            "low": np.array([group["low"].min()]),
+            "close": group["close"][-1:],
+            "volume": np.array([group["volume"].sum()]),
+            "buy_volume": np.array([group["buy_volume"].sum()]),
+            "sell_volume": np.array([group["sell_volume"].sum()]),
+            "trades": np.array([group["trades"].sum()]),
+        }
+    resampled = resample_ohlcv(group, bucket_seconds)
+    buckets = times // bucket_seconds
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    for field in ("buy_volume", "sell_volume", "trades"):
+        resampled[field] = np.add.reduceat(group[field], starts)
+    return resampled
+
+
+class _TickBuckets:
+    """
+    Buckets d'une taille donnée, en colonnes (même disposition que CandleRingBuffer:
+    tableaux de 2 x capacity, fenêtre [start, end) compactée quand la fin est atteinte)
+    """
+
+    def __init__(self, bucket_seconds: int, capacity: int):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self._data = {field: np.zeros(2 * capacity, dtype=dtype) for field, dtype in TICK_DTYPES.items()}
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Vues sur les buckets (à copier avant de relâcher le verrou)"""
+        return {field: arr[self._start:self._end] for field, arr in self._data.items()}
+
+    def last_time(self) -> Optional[int]:
+        return int(self._data["time"][self._end - 1]) if self._end > self._start else None
+
+    def _append(self, group: Dict[str, np.ndarray]):
+        n = len(group["time"])
+        if n >= self.capacity:
+            group = {field: arr[-self.capacity:] for field, arr in group.items()}
+            n = self.capacity
+            self._start = self._end = 0
+        elif self._end + n > 2 * self.capacity:
+            # Compaction: ne garder que les capacity - n derniers buckets en tête
+            keep = min(len(self), self.capacity - n)
+            for arr in self._data.values():
+                arr[:keep] = arr[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        for field, arr in self._data.items():
+            arr[self._end:self._end + n] = group[field]
+        self._end += n
+        if len(self) > self.capacity:
+            self._start = self._end - self.capacity
+
+    def _combine(self, index: int, group: Dict[str, np.ndarray], i: int, is_last: bool):
+        """Fusionne le bucket agrégé `i` du lot dans le bucket existant `index`"""
+        data = self._data
+        data["high"][index] = max(data["high"][index], group["high"][i])
+        data["low"][index] = min(data["low"][index], group["low"][i])
+        if is_last:
+            # Trades plus récents que ceux déjà comptés: la clôture avance
+            data["close"][index] = group["close"][i]
+        for field in ("volume", "buy_volume", "sell_volume", "trades"):
+            data[field][index] += group[field][i]
+
+    def merge(self, group: Dict[str, np.ndarray]) -> Tuple[int, int]:
+        """
+        Intègre des buckets agrégés triés (aggregate_trades)
+
+        Les buckets plus récents que le dernier sont ajoutés en bloc, celui du bucket
+        ouvert est fusionné (clôture mise à jour), les trades en retard sont ajoutés à leur
+        bucket s'il est encore en mémoire (ouverture et clôture inchangées) et ignorés sinon.
+
+        Returns:
+            (time du plus ancien bucket modifié ou None, trades ignorés)
+        """
+        times = group["time"]
+        if len(times) == 0:
+            return None, 0
+        last = self.last_time()
+        if last is None:
+            self._append(group)
+            return int(times[0]), 0
+
+        first_touched = None
+        dropped = 0
+        split = int(np.searchsorted(times, last))
+        # Trades en retard (rares): un bucket à la fois
+        if split:
+            window = self._data["time"][self._start:self._end]
+            for i in range(split):
+                index = int(np.searchsorted(window, times[i]))
+                if index < len(window) and window[index] == times[i]:
+                    self._combine(self._start + index, group, i, is_last=False)
+                    if first_touched is None:
+                        first_touched = int(times[i])
+                else:
+                    dropped += int(group["trades"][i])
+        rest = split
+        if rest < len(times) and times[rest] == last:
+            self._combine(self._end - 1, group, rest, is_last=True)
+            if first_touched is None:
+                first_touched = last
+            rest += 1
+        if rest < len(times):
+            self._append({field: arr[rest:] for field, arr in group.items()})
+            if first_touched is None:
+                first_touched = int(times[rest])
+        return first_touched, dropped
+
+
+class TickAggregator:
+    """
+    Construit des bougies à partir du flux de trades, avec le volume agresseur réel
+
+    Chaque lot de trades (un message WebSocket) est agrégé une seule fois en colonnes, à la
+    plus petite taille de bucket (aggregate_trades, reduceat); les tailles supérieures en sont
+    dérivées (resample_ticks, quelques buckets au plus) puis chaque taille est fusionnée dans
+    son dernier bucket ouvert: le coût dépend du nombre de buckets touchés, pas du nombre de
+    trades, et aucun dict n'est créé par trade. Écrit depuis la boucle du hub, lu depuis les
+    sessions Streamlit (verrou).
+    """
+
+    def __init__(self, buckets: Iterable[int] = DEFAULT_BUCKETS,
+                 capacity: Optional[Dict[int, int]] = None):
+        """
+        Args:
+            buckets: Tailles de bucket en secondes
+            capacity: Buckets conservés par taille (défaut: DEFAULT_BUCKET_CAPACITY, 3600 sinon)
+        """
+        capacity = {**DEFAULT_BUCKET_CAPACITY, **(capacity or {})}
+        self._buckets = {seconds: _TickBuckets(seconds, capacity.get(seconds, 3600))
+                         for seconds in sorted(set(buckets))}
+        self._lock = threading.Lock()
+        # Intervalles (ms) couverts par le flux sans interruption: [(premier trade, fin)],
+        # plus l'intervalle en cours, ouvert depuis _segment_start (None: flux interrompu)
+        self._segments: List[Tuple[int, int]] = []
+        self._segment_start: Optional[int] = None
+        self._last_trade_ms: Optional[int] = None
+        self.trades_received = 0
+        self.trades_dropped = 0
+
+    @property
+    def bucket_sizes(self) -> List[int]:
+        return list(self._buckets)
+
+    def add_trades(self, trades: Dict[str, np.ndarray]) -> Dict[int, int]:
+        """
+        Ajoute un lot de trades triés par temps (parse_trades)
+
+        Returns:
+            {bucket_seconds: time du plus ancien bucket modifié}
+        """
+        ts = trades["ts"]
+        if len(ts) == 0:
+            return {}
+        touched = {}
+        with self._lock:
+            if self._segment_start is None:
+                self._segment_start = int(ts[0])
+            self._last_trade_ms = int(ts[-1])
+            self.trades_received += len(ts)
+            group, source = None, None
+            for seconds, buckets in self._buckets.items():
+                if group is None:
+                    group = aggregate_trades(trades, seconds)
+                    # Trades en retard ignorés: comptés sur la plus petite taille seulement
+                    first_touched, dropped = buckets.merge(group)
+                    self.trades_dropped += dropped
+                else:
+                    # Tailles croissantes: dérivée de la précédente si elle en est un multiple
+                    group = (resample_ticks(group, seconds) if seconds % source == 0
+                             else aggregate_trades(trades, seconds))
+                    first_touched, _ = buckets.merge(group)
+                source = seconds
+                if first_touched is not None:
+                    touched[seconds] = first_touched
+        return touched
+
+    def mark_gap(self, end_ms: Optional[int] = None):
+        """
+        Interrompt l'intervalle couvert en cours (reconnexion sans recouvrement, fin du flux):
+        les trades suivants ouvrent un nouvel intervalle, les bougies entre les deux ne sont
+        pas couvertes
+
+        Args:
+            end_ms: Fin de l'intervalle couvert (défaut: dernier trade reçu)
+        """
+        with self._lock:
+            if self._segment_start is None:
+                return
+            end_ms = self._last_trade_ms if end_ms is None else end_ms
+            self._segments.append((self._segment_start, end_ms))
+            self._segment_start = None
+            # Intervalles plus anciens que tous les buckets conservés: inutiles
+            oldest = min((int(buckets.arrays()["time"][0]) * 1000 for buckets in self._buckets.values()
+                          if len(buckets)), default=None)
+            if oldest is not None:
+                self._segments = [segment for segment in self._segments if segment[1] >= oldest]
+
+    def arrays(self, bucket_seconds: int, since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Copie des buckets d'une taille (ceux dont time >= since si spécifié)"""
+        with self._lock:
+            arrays = self._buckets[bucket_seconds].arrays()
+            first = 0 if since is None else int(np.searchsorted(arrays["time"], since))
+            return {field: arr[first:].copy() for field, arr in arrays.items()}
+
+    def candles(self, bucket_seconds: int, since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Comme arrays() mais réduit aux colonnes OHLCV du DataManager"""
+        arrays = self.arrays(bucket_seconds, since)
+        return {field: arrays[field] for field in CANDLE_FIELDS}
+
+    def volume_split(self, times: np.ndarray, bucket_seconds: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Volume agresseur acheteur / vendeur de bougies existantes
+
+        Args:
+            times: Début (s) des bougies, triés
+            bucket_seconds: Durée d'une bougie (multiple de la minute, ou une taille de bucket)
+
+        Returns:
+            (buy_volume, sell_volume) alignés sur `times`, NaN pour les bougies qui ne sont
+            pas entièrement dans un intervalle couvert par le flux (commencées avant le premier
+            trade reçu, ou chevauchant une reconnexion ou une période sans abonnement: volume
+            réel inconnu)
+        """
+        times = np.asarray(times, dtype=np.int64)
+        buy = np.zeros(len(times))
+        sell = np.zeros(len(times))
+        source = bucket_seconds if bucket_seconds in self._buckets else 60
+        if source not in self._buckets or bucket_seconds % source:
+            raise ValueError(f"No trade buckets for {bucket_seconds}s candles")
+
+        arrays = self.arrays(source)
+        if len(times) and len(arrays["time"]):
+            # Chaque bucket est rattaché à la bougie qui le contient
+            keys = (arrays["time"] // bucket_seconds) * bucket_seconds
+            index = np.searchsorted(times, keys)
+            valid = index < len(times)
+            valid[valid] = times[index[valid]] == keys[valid]
+            np.add.at(buy, index[valid], arrays["buy_volume"][valid])
+            np.add.at(sell, index[valid], arrays["sell_volume"][valid])
+
+        with self._lock:
+            segments = list(self._segments)
+            if self._segment_start is not None:
+                segments.append((self._segment_start, np.iinfo(np.int64).max))
+        # Couverture: la bougie doit tenir dans un intervalle couvert et avoir encore ses buckets
+        starts_ms = times * 1000
+        ends_ms = starts_ms + bucket_seconds * 1000
+        covered = np.zeros(len(times), dtype=bool)
+        for first_ms, last_ms in segments:
+            covered |= (starts_ms >= first_ms) & (ends_ms <= last_ms + 1)
+        if len(arrays["time"]):
+            covered &= times >= int(arrays["time"][0])
+        else:
+            covered[:] = False
+        buy[~covered] = np.nan
+        sell[~covered] = np.nan
+        return buy, sell
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {"trades_received": self.trades_received, "trades_dropped": self.trades_dropped}
+            for seconds, buckets in self._buckets.items():
+                stats[f"buckets_{seconds}s"] = len(buckets)
+            return stats